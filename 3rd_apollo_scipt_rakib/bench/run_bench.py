@@ -0,0 +1,273 @@
+# bench/run_bench.py
+"""
+Offline benchmark for the page-processing loop.
+
+Serves bench/fixtures over a local HTTP server and drives N pages of the
+Sales Navigator stand-in through the real modules (handle_first_page,
+handle_each_page, click_next_page) in a local Chrome. No LinkedIn session,
+Apollo extension or network access is needed.
+
+Examples (run from the project folder):
+    python bench/run_bench.py --pages 10
+    python bench/run_bench.py --pages 20 --empty 3 --missing-iframe 5 --stale 8
+    python bench/run_bench.py --pages 5 --pacing --json bench_result.json
+    python bench/run_bench.py --pages 10 --launch-profile lean --perf
+    python bench/run_bench.py --pages 10 --freeze 4 --command-timeout 5 --phase-deadline 10
+"""
+
+import argparse
+import functools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(PROJECT_DIR, "bench", "fixtures")
+sys.path.insert(0, PROJECT_DIR)
+
+from selenium import webdriver  # noqa: E402
+from selenium.webdriver.chrome.service import Service  # noqa: E402
+
+from modules import (  # noqa: E402
+    handle_each_page,
+    handle_first_page,
+    handle_next_page,
+    pacing,
+    page_watchdog,
+    perf_sampler,
+    resource_blocking,
+    run_ledger,
+    run_log,
+    run_metrics,
+)
+from modules.apollo_list import MY_DESIRED_LIST, list_key, target_lists  # noqa: E402
+from modules.frame_context import frames  # noqa: E402
+from modules.driver_setup import DEFAULT_LAUNCH_PROFILE, LAUNCH_PROFILES, apply_launch_profile  # noqa: E402
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fixture_server():
+    """Serve the fixture folder on 127.0.0.1 (random free port) in a daemon thread."""
+    handler = functools.partial(_QuietHandler, directory=FIXTURES_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_driver(chromedriver=None, headless=True, blocked_urls=None, launch_profile=DEFAULT_LAUNCH_PROFILE):
+    """
+    Local Chrome with a throwaway profile (no extension needed), launched
+    with the same profile switches as get_driver.
+    """
+    options = webdriver.ChromeOptions()
+    apply_launch_profile(options, launch_profile, headless)
+    if blocked_urls:
+        resource_blocking.enable_network_log(options)
+    options.add_argument(f"--user-data-dir={tempfile.mkdtemp(prefix='apollo-bench-')}")
+    service = Service(chromedriver) if chromedriver else Service()
+    driver = webdriver.Chrome(service=service, options=options)
+    if resource_blocking.apply_block_list(driver, blocked_urls):
+        resource_blocking.report.enabled = True
+    return driver
+
+
+def count_commands(driver):
+    """
+    Wraps driver.execute so every WebDriver command (one chromedriver
+    HTTP round trip) is counted by name. Returns the Counter.
+    """
+    counter = Counter()
+    original = driver.execute
+
+    def counting_execute(driver_command, params=None):
+        counter[driver_command] += 1
+        return original(driver_command, params)
+
+    driver.execute = counting_execute
+    return counter
+
+
+def disable_pacing():
+    """Zero every pacing delay (bench measures work, not waiting)."""
+    pacing.pacing = pacing.PacingPolicy(
+        dwell_min=0, dwell_max=0,
+        actions={name: (0, 0) for name in pacing.ACTION_DELAYS},
+    )
+
+
+def fixture_url(base, args):
+    query = {
+        "page": 1,
+        "pages": args.pages,
+        "lists": "|".join(target_lists(args.lists)),
+        "empty": args.empty,
+        "noiframe": args.missing_iframe,
+        "stale": args.stale,
+        "partial": args.partial,
+        "freeze": args.freeze,
+        "freeze_ms": args.freeze_ms,
+        "inject_ms": args.inject_ms,
+        "nav_ms": args.nav_ms,
+    }
+    return f"{base}/results.html?{urlencode({k: v for k, v in query.items() if v != ''})}"
+
+
+def run(args):
+    server = start_fixture_server()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    workdir = tempfile.mkdtemp(prefix="apollo-bench-out-")
+
+    # Keep the bench's side effects out of the real output files
+    run_log.setup_logging(log_dir=workdir, console_level="WARNING")
+    run_ledger.ledger = run_ledger.RunLedger(os.path.join(workdir, "run_ledger.sqlite3"))
+    run_metrics.metrics = run_metrics.RunMetrics(os.path.join(workdir, "metrics.jsonl"))
+    if not args.pacing:
+        disable_pacing()
+    handle_each_page.FULL_FLOW_MODE = args.full_flow
+    perf_sampler.sampler.enabled = args.perf
+    # No supervisor here to replace a killed browser: deadlines abort, never reset
+    page_watchdog.watchdog.phase_deadline = args.phase_deadline
+    page_watchdog.watchdog.command_timeout = args.command_timeout
+    page_watchdog.watchdog.reset_after = 0
+
+    launch_started = time.monotonic()
+    driver = build_driver(args.chromedriver, headless=not args.headed,
+                          blocked_urls=resource_blocking.load_block_list(args.block_resources),
+                          launch_profile=args.launch_profile)
+    launch_seconds = time.monotonic() - launch_started
+    page_watchdog.watchdog.attach(driver)
+    commands = count_commands(driver)
+    try:
+        started = time.monotonic()
+        driver.get(fixture_url(base, args))
+        handle_first_page.handle_first_page(driver, driver.current_url)
+        first_page_commands = sum(commands.values())
+
+        for _ in range(args.pages):
+            url = driver.current_url
+            run_metrics.start_page(url)
+            processed = handle_each_page.handle_each_page(driver, url, target_lists(args.lists))
+            perf_sampler.sample_page(driver, url)
+            with run_metrics.span("click_next_page"):
+                has_next = handle_next_page.click_next_page(driver)
+            resource_blocking.collect(driver)
+            record = run_metrics.end_page("ok" if processed else "skipped")
+            run_ledger.ledger.record_page(record, list_key(args.lists))
+            if not has_next:
+                break
+        wall = time.monotonic() - started
+        frame_switches = (frames(driver).switches, frames(driver).skipped_switches)
+    finally:
+        driver.quit()
+        server.shutdown()
+        run_ledger.ledger.close()
+
+    pages = run_metrics.metrics.pages
+    retry_time = sum(p["duration"] for page in pages for p in page["phases"]
+                     if p["attempt"] > 1 or p["phase"] == "recovery")
+    total_commands = sum(commands.values())
+    return {
+        "pages": len(pages),
+        "launch_profile": args.launch_profile,
+        "launch_seconds": round(launch_seconds, 3),
+        "skipped": sum(1 for page in pages if page["outcome"] != "ok"),
+        "wall_seconds": round(wall, 3),
+        "seconds_per_page": round(wall / max(len(pages), 1), 3),
+        "commands_total": total_commands,
+        "commands_first_page": first_page_commands,
+        "commands_per_page": round((total_commands - first_page_commands) / max(len(pages), 1), 1),
+        "commands_by_name": dict(commands.most_common()),
+        "frame_switches": frame_switches[0],
+        "frame_switches_skipped": frame_switches[1],
+        "retries": sum(page["attempts"] - 1 for page in pages),
+        "verification": dict(Counter((page.get("verification") or {}).get("status", "none") for page in pages)),
+        "retry_overhead_seconds": round(retry_time, 3),
+        "timeouts": dict(Counter(f"{t['scope']}:{t['phase']}" for page in pages for t in page.get("timeouts", []))),
+        "summary": run_metrics.metrics.summary(),
+        "perf": perf_sampler.sampler.summary() if args.perf else None,
+        "blocking": resource_blocking.report.summary() if resource_blocking.report.enabled else None,
+        "artifacts": workdir,
+    }
+
+
+def print_report(result):
+    print(result["summary"])
+    if result["perf"]:
+        print(result["perf"])
+    if result["blocking"]:
+        print(result["blocking"])
+    print(f"[Bench] Launch profile: {result['launch_profile']} ({result['launch_seconds']:.2f}s to start)")
+    print(f"[Bench] Pages: {result['pages']} (skipped {result['skipped']})")
+    print(f"[Bench] Wall time: {result['wall_seconds']:.2f}s "
+          f"({result['seconds_per_page']:.2f}s/page)")
+    print(f"[Bench] WebDriver commands: {result['commands_total']} total, "
+          f"{result['commands_first_page']} for first page, "
+          f"{result['commands_per_page']} per page")
+    for name, count in list(result["commands_by_name"].items())[:10]:
+        print(f"    {name:<32}{count:>6}")
+    print(f"[Bench] Frame switches: {result['frame_switches']} done, "
+          f"{result['frame_switches_skipped']} skipped as redundant")
+    print(f"[Bench] Verification: {result['verification']}")
+    print(f"[Bench] Watchdog timeouts: {result['timeouts'] or 'none'}")
+    print(f"[Bench] Retries: {result['retries']}, "
+          f"retry overhead {result['retry_overhead_seconds']:.2f}s")
+    print(f"[Bench] Artifacts (metrics.jsonl, run_ledger.sqlite3): {result['artifacts']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark for the Apollo page loop.")
+    parser.add_argument("--pages", type=int, default=10, help="Number of result pages to drive.")
+    parser.add_argument("--list", action="append", dest="lists", default=None, metavar="NAME",
+                        help="Target list; repeat for multi-list mode (offered by the fixture picker).")
+    parser.add_argument("--empty", default="", help="Pages (e.g. '3,7') that show the empty state once.")
+    parser.add_argument("--missing-iframe", default="", help="Pages whose Apollo iframe is missing on first load.")
+    parser.add_argument("--stale", default="", help="Pages whose sidebar re-renders right after opening.")
+    parser.add_argument("--partial", default="",
+                        help="Pages where Apollo's first save confirms fewer contacts than selected.")
+    parser.add_argument("--freeze", default="",
+                        help="Pages whose tab freezes (renderer hang) right after the results render.")
+    parser.add_argument("--freeze-ms", type=int, default=15000, help="Length of a --freeze hang.")
+    parser.add_argument("--phase-deadline", type=float, default=page_watchdog.DEFAULT_PHASE_DEADLINE,
+                        help="Watchdog deadline per phase, as in main.py (use one below --freeze-ms).")
+    parser.add_argument("--command-timeout", type=float, default=page_watchdog.COMMAND_TIMEOUT,
+                        help="Bound on one WebDriver command, as in main.py (below --freeze-ms "
+                             "makes a freeze abort the page into recovery).")
+    parser.add_argument("--inject-ms", type=int, default=300, help="Delay before the Apollo iframe appears.")
+    parser.add_argument("--nav-ms", type=int, default=200, help="Simulated results fetch after Next.")
+    parser.add_argument("--full-flow", choices=["macro", "steps"], default=handle_each_page.FULL_FLOW_MODE,
+                        help="How do_full_add_to_list runs the full flow.")
+    parser.add_argument("--pacing", action="store_true", help="Keep the human_delay pacing waits.")
+    parser.add_argument("--launch-profile", choices=sorted(LAUNCH_PROFILES), default=DEFAULT_LAUNCH_PROFILE,
+                        help="Chrome launch profile, as in main.py (compare with --perf for renderer memory).")
+    parser.add_argument("--block-resources", default="off",
+                        help="Block-list to apply ('default', 'off' or a file), as in main.py.")
+    parser.add_argument("--perf", action="store_true",
+                        help="Sample CDP performance metrics after each page (adds WebDriver commands).")
+    parser.add_argument("--headed", action="store_true", help="Show the browser window.")
+    parser.add_argument("--chromedriver", default=None, help="Path to a local chromedriver binary.")
+    parser.add_argument("--json", default=None, help="Also write the result to this JSON file.")
+    args = parser.parse_args(argv)
+    args.lists = args.lists or [MY_DESIRED_LIST]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    result = run(args)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in result.items() if k != "summary"}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+# bench/simulate_run.py
+"""
+Simulates a run in virtual time (modules.clock): the real handle_each_page
+and recovery policy work against SimDriver, a stand-in for Chrome that
+answers the page handlers' scripts from a simulated Apollo sidebar, spends
+virtual time on each command and fails on the pages it is told to. The
+pacing dwell and action pauses, the pages-per-hour cap and the recovery
+backoff all sleep on the virtual clock, so a 200-page run takes well under
+a second.
+
+The run is checked at the end against what the configuration says it
+should do, independently of how the code does it:
+  - pages with 1-3 recoverable failures (each class once) are added, pages
+    that fail on every attempt are skipped
+  - the recovery backoff adds up to BACKOFF_BASE doubled per retry of the
+    page and capped at BACKOFF_MAX
+  - the number of sleeps matches the waits a page takes (dwell, 'Select
+    all', save, next page, one backoff per retry) and their total lies
+    within the configured ACTION_DELAYS and dwell ranges
+  - the same seed gives the same sleeps, and the pages-per-hour cap holds
+Exits 1 if any of this fails.
+
+Examples (run from the project folder):
+    python bench/simulate_run.py --pages 200 --fail-rate 0.1 --seed 7
+    python bench/simulate_run.py --pages 200 --max-pages-per-hour 90 --json sim.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import urllib3  # noqa: E402
+from selenium.common.exceptions import StaleElementReferenceException  # noqa: E402
+
+from modules import (  # noqa: E402
+    add_verification,
+    apollo_session,
+    clock,
+    dom_waits,
+    pacing,
+    page_snapshot,
+    recovery,
+    run_log,
+    run_metrics,
+)
+from modules.handle_each_page import handle_each_page  # noqa: E402
+
+SIM_LIST = "Simulated list"
+CONTACTS_PER_PAGE = 25
+
+# Virtual time each simulated browser command takes (seconds)
+WORK_SECONDS = {
+    "find": 0.1,
+    "probe": 0.05,
+    "page_snapshot": 0.3,
+    "click": 0.2,
+    "arm_verification": 0.05,
+    "confirmation": 1.5,
+    "click_next_page": 1.5,
+}
+
+# Virtual time each recovery remedy takes
+REMEDY_SECONDS = {
+    recovery.REFIND: 0.1,
+    recovery.RESWITCH: 0.3,
+    recovery.REOPEN_SIDEBAR: 2.0,
+    recovery.REFRESH: 6.0,
+}
+
+# Injected failures: the first three break the sidebar snapshot, a mismatch
+# makes Apollo confirm one contact less than was selected. Each maps to the
+# failure class recovery must sort it into. STALE has no class budget
+# (recovery.CLASS_BUDGETS), so a page failing on it every attempt uses all
+# of its attempts.
+STALE = "stale"
+EMPTY = "empty"
+COMMAND_TIMEOUT = "command_timeout"
+MISMATCH = "mismatch"
+FAILURE_CLASSES = {
+    STALE: recovery.STALE_ELEMENT,
+    EMPTY: recovery.EMPTY_RESULTS,
+    COMMAND_TIMEOUT: recovery.TIMEOUT,
+    MISMATCH: recovery.ADD_NOT_CONFIRMED,
+}
+FAILURE_KINDS = [STALE, EMPTY, COMMAND_TIMEOUT, MISMATCH]
+SNAPSHOT_FAILURES = {STALE, EMPTY, COMMAND_TIMEOUT}
+
+
+class SimElement:
+    """Stand-in WebElement: click() takes virtual time and runs `on_click`."""
+
+    def __init__(self, driver, on_click=None):
+        self.driver = driver
+        self.on_click = on_click
+
+    def click(self):
+        self.driver.work("click")
+        if self.on_click:
+            self.on_click()
+
+
+class SimSwitchTo:
+    def frame(self, element):
+        pass
+
+    def default_content(self):
+        pass
+
+
+class SimDriver:
+    """
+    Just enough of a Selenium driver for handle_each_page. Each script the
+    page handlers and the recovery probe send (snapshot, element wait,
+    verification arm/wait, page/sidebar probe, clicks) is answered from the
+    simulated page, which is always loaded with the sidebar open; the
+    selection survives the simulated remedies. load_page() sets the
+    failures for the next page, one per attempt, in order.
+    """
+
+    def __init__(self, virtual):
+        self.virtual = virtual
+        self.switch_to = SimSwitchTo()
+        self.failures = []
+        self.selected = False
+
+    def load_page(self, failures):
+        self.failures = list(failures)
+        self.selected = False
+
+    def work(self, kind):
+        self.virtual.advance(WORK_SECONDS[kind])
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, *args):
+        if script is page_snapshot._SNAPSHOT_JS:
+            return self._snapshot()
+        if script is add_verification._WAIT_JS:
+            return self._confirmation()
+        if script is dom_waits._WAIT_FOR_ANY_JS:
+            self.work("find")
+            return [0, SimElement(self)]
+        raise NotImplementedError("SimDriver got an async script it doesn't simulate")
+
+    def execute_script(self, script, *args):
+        if script is add_verification._ARM_JS:
+            self.work("arm_verification")
+            return f"{CONTACTS_PER_PAGE} selected"
+        if script is apollo_session._PAGE_PROBE_JS:
+            self.work("probe")
+            return {"ready_state": "complete", "iframe": True}
+        if script is apollo_session._SIDEBAR_PROBE_JS:
+            self.work("probe")
+            return {"sidebar": True}
+        if script == "arguments[0].click();":
+            args[0].click()
+            return None
+        raise NotImplementedError("SimDriver got a script it doesn't simulate")
+
+    def _next_failure(self, kinds):
+        if self.failures and self.failures[0] in kinds:
+            return self.failures.pop(0)
+        return None
+
+    def _snapshot(self):
+        self.work("page_snapshot")
+        failure = self._next_failure(SNAPSHOT_FAILURES)
+        if failure == STALE:
+            raise StaleElementReferenceException("simulated stale handle")
+        if failure == COMMAND_TIMEOUT:
+            raise urllib3.exceptions.ReadTimeoutError(None, "sim://chromedriver", "simulated read timeout")
+        return {
+            "ready": True,
+            "toggle": SimElement(self, self._select_all),
+            "toggle_text": "Clear selection" if self.selected else "Select all",
+            "all_selected": self.selected,
+            "last_action": SimElement(self),
+            "last_action_text": f"Add to list “{SIM_LIST}”",
+            "last_action_list": SIM_LIST,
+            "last_action_lists": [SIM_LIST],
+            "empty_state": failure == EMPTY,
+            "parent_readable": True,
+            "next_enabled": True,
+            "matched": {},
+        }
+
+    def _select_all(self):
+        self.selected = True
+
+    def _confirmation(self):
+        self.work("confirmation")
+        added = CONTACTS_PER_PAGE - 1 if self._next_failure({MISMATCH}) else CONTACTS_PER_PAGE
+        return {"text": f"{added} contacts added to {SIM_LIST}", "error": False}
+
+
+def plan_page(failure_rng, args):
+    """Failures for one page and the retries it should take: (failures, retries, fatal)."""
+    roll = failure_rng.random()
+    if roll < args.fatal_rate:
+        return [STALE] * args.page_attempts, args.page_attempts - 1, True
+    recoverable = min(3, len(FAILURE_KINDS), args.page_attempts - 1)
+    if roll < args.fatal_rate + args.fail_rate and recoverable:
+        failures = failure_rng.sample(FAILURE_KINDS, failure_rng.randint(1, recoverable))
+        return failures, len(failures), False
+    return [], 0, False
+
+
+def simulate(args):
+    """Run the simulation once; returns the result dict (virtual clock included)."""
+    virtual = clock.use_virtual_time(seed_value=args.seed)
+    failure_rng = random.Random(args.seed)
+    pacing.pacing = pacing.PacingPolicy(max_pages_per_hour=args.max_pages_per_hour)
+    run_metrics.metrics = run_metrics.RunMetrics(os.path.join(args.workdir, "metrics.jsonl"))
+    # handle_each_page uses the shared policy; configure it as main.py does
+    policy = recovery.policy
+    policy.max_attempts = args.page_attempts
+    policy.apply = lambda driver, remedy: virtual.advance(REMEDY_SECONDS[remedy])
+    policy.stats = {}
+    driver = SimDriver(virtual)
+
+    plan = {"retries": [], "fatal": 0, "kinds": set()}
+    injected = 0
+    skipped = 0
+    wall_started = time.perf_counter()
+    for page in range(1, args.pages + 1):
+        failures, retries, fatal = plan_page(failure_rng, args)
+        injected += len(failures)
+        plan["kinds"].update(failures)
+        plan["retries"].append(retries)
+        plan["fatal"] += fatal
+
+        url = f"sim://page/{page}"
+        driver.load_page(failures)
+        run_metrics.start_page(url)
+        pacing.page_started()
+        processed = handle_each_page(driver, url, SIM_LIST)
+        skipped += not processed
+        with run_metrics.span("dwell"):
+            pacing.dwell()
+        if page < args.pages:
+            with run_metrics.span("click_next_page"):
+                driver.work("click_next_page")
+            pacing.pause("after_next")
+        run_metrics.end_page("ok" if processed else "skipped")
+        pacing.page_finished(remaining_pages=args.pages - page)
+    wall = time.perf_counter() - wall_started
+
+    return {
+        "pages": args.pages,
+        "skipped": skipped,
+        "failures_injected": injected,
+        "virtual_hours": round(virtual.now / 3600, 3),
+        "virtual_sleeps": len(virtual.sleeps),
+        "slept_seconds": math.fsum(virtual.sleeps),
+        "pacing_wait_seconds": pacing.pacing.waiting,
+        "wall_ms": round(wall * 1000, 1),
+        "pacing_report": pacing.pacing.report(),
+        "recovery_summary": policy.summary(),
+        "summary": run_metrics.metrics.summary(),
+        "_plan": plan,
+        "_remedies": set(policy.stats),
+        "_sleeps": list(virtual.sleeps),
+        "_elapsed": virtual.now,
+    }
+
+
+def expected_waits(plan, args):
+    """
+    What the configuration says the run should sleep, from the page plan:
+    {"skipped", "sleeps", "backoff", "pacing_min", "pacing_max"}.
+    """
+    pages = args.pages
+    ok_pages = pages - plan["fatal"]
+    backoff = math.fsum(
+        min(recovery.BACKOFF_BASE * 2 ** retry, recovery.BACKOFF_MAX)
+        for retries in plan["retries"] for retry in range(retries)
+    )
+    # Per added page one 'Select all' and one save pause; per page a dwell,
+    # and an 'after_next' pause before every page but the first
+    actions = pacing.ACTION_DELAYS
+    counts = {"after_select_all": ok_pages, "after_save": ok_pages, "after_next": pages - 1}
+    dwell_min, dwell_max = pacing.DWELL_MIN, pacing.DWELL_MAX
+    if args.max_pages_per_hour:
+        dwell_max = max(dwell_max, 3600.0 / args.max_pages_per_hour)
+    return {
+        "skipped": plan["fatal"],
+        "sleeps": sum(counts.values()) + pages + sum(plan["retries"]),
+        "backoff": backoff,
+        "pacing_min": math.fsum(actions[name][0] * n for name, n in counts.items()) + pages * dwell_min,
+        "pacing_max": math.fsum(sum(actions[name]) * n for name, n in counts.items()) + pages * dwell_max,
+    }
+
+
+def check(result, replay, args):
+    """The invariants a scheduling change must keep. Returns a list of failures."""
+    problems = []
+    expected = expected_waits(result["_plan"], args)
+    if result["skipped"] != expected["skipped"]:
+        problems.append(f"{result['skipped']} pages skipped, expected {expected['skipped']} "
+                        f"(pages failing on every attempt)")
+    classes = {failure for failure, _ in result["_remedies"]}
+    injected_classes = {FAILURE_CLASSES[kind] for kind in result["_plan"]["kinds"]}
+    if classes != injected_classes:
+        problems.append(f"recovery saw classes {sorted(classes)}, injected {sorted(injected_classes)}")
+    if STALE in result["_plan"]["kinds"] and (recovery.STALE_ELEMENT, recovery.REFIND) not in result["_remedies"]:
+        problems.append("a stale handle was never answered with a re-find")
+    if result["virtual_sleeps"] != expected["sleeps"]:
+        problems.append(f"{result['virtual_sleeps']} sleeps, expected {expected['sleeps']}")
+    backoff = result["slept_seconds"] - result["pacing_wait_seconds"]
+    if not math.isclose(backoff, expected["backoff"], rel_tol=1e-9, abs_tol=1e-6):
+        problems.append(f"recovery slept {backoff!r}s, the configured backoff is {expected['backoff']!r}s")
+    waited = result["pacing_wait_seconds"]
+    if not expected["pacing_min"] - 1e-6 <= waited <= expected["pacing_max"] + 1e-6:
+        problems.append(f"pacing waited {waited:.1f}s, outside the configured "
+                        f"{expected['pacing_min']:.1f}s .. {expected['pacing_max']:.1f}s")
+    if replay["_sleeps"] != result["_sleeps"]:
+        problems.append(f"seed {args.seed} did not reproduce the same sleeps")
+    if args.max_pages_per_hour:
+        floor = args.pages * 3600.0 / args.max_pages_per_hour
+        if result["_elapsed"] + 1e-6 < floor:
+            problems.append(f"{args.pages} pages took {result['_elapsed']:.0f}s, "
+                            f"below the {args.max_pages_per_hour} pages/hour floor of {floor:.0f}s")
+    return problems
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Virtual-time simulation of pacing and recovery.")
+    parser.add_argument("--pages", type=int, default=200, help="Number of pages to simulate.")
+    parser.add_argument("--fail-rate", type=float, default=0.1,
+                        help="Share of pages that get 1-3 recoverable failures.")
+    parser.add_argument("--fatal-rate", type=float, default=0.02,
+                        help="Share of pages that fail on every attempt (logged & skipped).")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the failures and the pacing picks.")
+    parser.add_argument("--max-pages-per-hour", type=int, default=pacing.MAX_PAGES_PER_HOUR,
+                        help="Pages-per-hour cap, as in main.py (0 = none).")
+    parser.add_argument("--page-attempts", type=int, default=recovery.MAX_ATTEMPTS,
+                        help="Attempts per page, as in main.py.")
+    parser.add_argument("--json", default=None, help="Also write the result to this JSON file.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    args.page_attempts = max(1, args.page_attempts)
+    args.workdir = tempfile.mkdtemp(prefix="apollo-sim-")
+    run_log.setup_logging(log_dir=args.workdir, console_level="ERROR")
+    try:
+        result = simulate(args)
+        replay = simulate(args)
+    finally:
+        clock.use_real_time()
+
+    print(result["summary"])
+    print(result["pacing_report"])
+    print(result["recovery_summary"])
+    print(f"[Sim] {result['pages']} pages ({result['skipped']} skipped, "
+          f"{result['failures_injected']} failures injected) = {result['virtual_hours']} h virtual "
+          f"in {result['wall_ms']} ms")
+    backoff = max(result["slept_seconds"] - result["pacing_wait_seconds"], 0.0)
+    print(f"[Sim] Slept {result['slept_seconds']:.3f}s in {result['virtual_sleeps']} sleeps: "
+          f"pacing {result['pacing_wait_seconds']:.3f}s + backoff {backoff:.3f}s")
+
+    problems = check(result, replay, args)
+    for problem in problems:
+        print(f"[Sim] FAILED: {problem}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({k: v for k, v in result.items() if not k.startswith("_") and k != "summary"}, f, indent=2)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
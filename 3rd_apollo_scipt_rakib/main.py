@@ -1,78 +1,405 @@
-# main.py
-
-import random
-import time
-from modules.driver_setup import get_driver
-from modules.prompt_url import get_base_url
-from modules.handle_first_page import handle_first_page
-from modules.handle_each_page import handle_each_page
-from modules.handle_next_page import click_next_page
-
-# Possible random navigation delays (seconds)
-NAVIGATION_DELAYS = [16, 20, 24, 28, 32]
-
-def main():
-    try:
-        driver = get_driver(
-            user_data_dir=r"D:\3rd_Chrome_rakib_linkedin_apollo",  # Adjust if needed
-            profile_dir="Profile 19"
-        )
-
-        # 1) Get the start page, load it
-        base_url = get_base_url()
-        driver.get(base_url)
-        print("Page loaded successfully!")
-
-        # 2) Open Apollo on the first page
-        #    (handle_first_page will retry 3 times & log if it fails all 3)
-        current_page_url = driver.current_url
-        handle_first_page(driver, current_page_url)
-
-        # 3) Keep track of last random delay so we don't repeat
-        last_delay = None
-
-        # 4) Loop over pages
-        while True:
-            current_page_url = driver.current_url
-
-            # Process the current page
-            # handle_each_page will also retry 3 times & log if it fails
-            handle_each_page(driver, current_page_url)
-
-            # Choose a new random delay that isn't the same as the last one
-            chosen_delay = pick_non_repeating_delay(NAVIGATION_DELAYS, last_delay)
-            last_delay = chosen_delay
-
-            print(f"Current page: {current_page_url}")
-            print(f"Spending {chosen_delay} seconds on this page...")
-            time.sleep(chosen_delay)
-
-            print("Moving to the next page...")
-            has_next = click_next_page(driver)
-            if not has_next:
-                break
-
-    except Exception as e:
-        print(f"An unexpected error occurred: {e}")
-        print("Browser remains open. Close it manually if needed.")
-
-    while True:
-        pass
-
-
-def pick_non_repeating_delay(delay_options, last_delay):
-    """
-    Picks a random delay from `delay_options` that is NOT the same as `last_delay`.
-    If by chance the random pick equals `last_delay`, it retries until it gets a different value.
-    """
-    if len(delay_options) == 1:
-        return delay_options[0]
-
-    new_delay = random.choice(delay_options)
-    while new_delay == last_delay:
-        new_delay = random.choice(delay_options)
-    return new_delay
-
-
-if __name__ == "__main__":
-    main()
+# main.py
+
+import argparse
+import atexit
+import signal
+from modules.driver_setup import DEFAULT_LAUNCH_PROFILE, LAUNCH_PROFILES, LEAN_JS_HEAP_MB, get_driver, timed_get
+from modules.prompt_url import get_base_url
+from modules.handle_first_page import handle_first_page
+from modules.handle_each_page import handle_each_page
+from modules.handle_next_page import click_next_page
+from modules.apollo_list import MY_DESIRED_LIST, describe_lists, list_key, target_lists
+from modules.checkpoint import (
+    CHECKPOINT_FILE,
+    load_checkpoint,
+    new_checkpoint,
+    record_page,
+    save_checkpoint,
+)
+from modules.run_metrics import start_page, span, end_page, print_summary
+from modules import add_verification, clock, perf_sampler, resource_blocking
+from modules.page_watchdog import COMMAND_TIMEOUT, PAGE_DEADLINE, print_watchdog_report, watchdog
+from modules.selector_registry import print_selector_stats
+from modules.recovery import MAX_ATTEMPTS, policy, print_recovery_stats
+from modules.retry_pass import retry_failed_pages
+from modules.run_ledger import close_ledger, ledger
+from modules.job_queue import load_jobs
+from modules.apollo_session import print_session_stats, session_for
+from modules.pagination import current_page, goto_page, last_page, page_from_url, url_for_page
+from modules import pacing
+from modules.session_supervisor import (
+    RECYCLE_AFTER_FAILURES,
+    RECYCLE_AFTER_PAGES,
+    RECYCLE_HEAP_MB,
+    RECYCLE_RSS_MB,
+    SessionSupervisor,
+)
+from modules.run_log import CONSOLE_LEVEL, LOG_DIR, get_logger, set_context, setup_logging
+
+log = get_logger(__name__)
+
+class ShutdownRequested(BaseException):
+    """
+    Raised from the SIGINT/SIGTERM handler. Derives from BaseException so the
+    broad `except Exception` blocks in the page handlers don't swallow it.
+    """
+
+
+def _request_shutdown(signum, frame):
+    raise ShutdownRequested(signal.Signals(signum).name)
+
+
+def _phase_deadline(text):
+    """--phase-deadline value: 'SECONDS' (every phase) or 'PHASE=SECONDS'."""
+    phase, _, seconds = text.rpartition("=")
+    try:
+        return phase or None, float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected SECONDS or PHASE=SECONDS, got {text!r}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Add Sales Navigator search results to an Apollo list.")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue from the last unfinished page saved in the checkpoint file.")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE,
+                        help=f"Checkpoint file path (default: {CHECKPOINT_FILE}).")
+    parser.add_argument("--recycle-pages", type=int, default=RECYCLE_AFTER_PAGES,
+                        help="Restart the browser after this many pages (0 = never).")
+    parser.add_argument("--recycle-heap-mb", type=int, default=RECYCLE_HEAP_MB,
+                        help="Restart the browser when the tab's JS heap exceeds this (0 = off; "
+                             f"must stay below the lean profile's {LEAN_JS_HEAP_MB} MB V8 cap).")
+    parser.add_argument("--recycle-rss-mb", type=int, default=RECYCLE_RSS_MB,
+                        help="Restart the browser when a renderer's RSS exceeds this (0 = off, needs psutil).")
+    parser.add_argument("--recycle-failures", type=int, default=RECYCLE_AFTER_FAILURES,
+                        help="Restart the browser after this many failed pages in a row (0 = off).")
+    parser.add_argument("--chromedriver", default=None,
+                        help="Pinned chromedriver binary (no version lookup, works offline).")
+    parser.add_argument("--offline", action="store_true",
+                        help="Never call webdriver_manager; use the pinned or cached chromedriver only.")
+    parser.add_argument("--start-page", type=int, default=None,
+                        help="Result page to start a new run at (jumps there directly; "
+                             "default: the page in the URL, else 1).")
+    parser.add_argument("--end-page", type=int, default=None,
+                        help="Stop after this result page. Without it the progress ETA is "
+                             "estimated from the total page count shown in the pager.")
+    parser.add_argument("--pacing-config", default=None,
+                        help="JSON/YAML pacing policy (dwell range, action delays, pages-per-hour cap).")
+    parser.add_argument("--max-pages-per-hour", type=int, default=None,
+                        help="Cap throughput at this many pages per hour (stretches the dwell).")
+    parser.add_argument("--list", action="append", default=None, dest="lists", metavar="NAME",
+                        help="Target Apollo list; repeat to add every page to several lists in one pass "
+                             f"(default: {MY_DESIRED_LIST!r}).")
+    parser.add_argument("--jobs", default=None,
+                        help="Job file (JSON/YAML) of {url, list} searches to run back to back "
+                             "in one browser session instead of prompting for a URL.")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Only retry the pages that failed for this list (run ledger), then exit.")
+    parser.add_argument("--retry-at-end", action="store_true",
+                        help="After the last page, retry the pages that failed for this list.")
+    parser.add_argument("--redo-done", action="store_true",
+                        help="Process pages even if the run ledger has them completed for this list.")
+    parser.add_argument("--page-attempts", type=int, default=MAX_ATTEMPTS,
+                        help=f"Attempts per page before it is logged & skipped (default: {MAX_ATTEMPTS}).")
+    parser.add_argument("--launch-profile", choices=sorted(LAUNCH_PROFILES), default=DEFAULT_LAUNCH_PROFILE,
+                        help="Chrome launch profile: 'standard' (maximized) or 'lean' (small viewport, "
+                             "no background services, capped renderers/caches).")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run Chrome in the new headless mode (extensions, incl. Apollo, still load).")
+    parser.add_argument("--block-resources", default="off",
+                        help="Images/fonts/media/trackers to block: 'off', 'default', or a JSON/YAML "
+                             "file {use_defaults, block, allow} (default: off).")
+    parser.add_argument("--perf-sample", action="store_true",
+                        help="Sample JS heap, DOM nodes, layout/script time and renderer memory "
+                             "after each page into metrics.jsonl; flag pages where they jump.")
+    parser.add_argument("--require-confirmation", action="store_true",
+                        help="Retry a page in place when Apollo shows no confirmation after saving "
+                             "(by default it is only logged as 'unconfirmed').")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed the random dwell/delay/user-agent picks (repeatable pacing).")
+    parser.add_argument("--page-deadline", type=float, default=PAGE_DEADLINE,
+                        help="Watchdog: seconds one page may take, retries included, dwell excluded "
+                             f"(0 = off, default: {PAGE_DEADLINE}).")
+    parser.add_argument("--phase-deadline", type=_phase_deadline, action="append", default=[],
+                        metavar="[PHASE=]SECONDS",
+                        help="Watchdog: seconds a phase may take; SECONDS sets every phase, "
+                             "PHASE=SECONDS one phase (e.g. process_last_action=300). Repeatable.")
+    parser.add_argument("--command-timeout", type=float, default=COMMAND_TIMEOUT,
+                        help=f"Seconds a single WebDriver command may hang (default: {COMMAND_TIMEOUT}).")
+    parser.add_argument("--log-dir", default=LOG_DIR,
+                        help=f"Directory for the rotating JSON run logs (default: {LOG_DIR}).")
+    parser.add_argument("--console-level", default=CONSOLE_LEVEL,
+                        choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help=f"Console log level (default: {CONSOLE_LEVEL}).")
+    args = parser.parse_args(argv)
+    if args.launch_profile == "lean" and args.recycle_heap_mb >= LEAN_JS_HEAP_MB:
+        parser.error(f"--recycle-heap-mb {args.recycle_heap_mb} must be below the lean profile's "
+                     f"{LEAN_JS_HEAP_MB} MB V8 heap cap, or the renderer runs out of memory first.")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # First, so every later atexit report is still logged before the writer stops
+    setup_logging(log_dir=args.log_dir, console_level=args.console_level)
+
+    # Per-phase latency summary (JSONL records go to metrics.jsonl as we go)
+    atexit.register(print_summary)
+    atexit.register(print_selector_stats)
+    atexit.register(print_recovery_stats)
+    atexit.register(print_session_stats)
+    atexit.register(print_watchdog_report)
+    atexit.register(add_verification.print_verification_report)
+    atexit.register(close_ledger)
+    policy.max_attempts = max(1, args.page_attempts)
+    add_verification.REQUIRE_CONFIRMATION = args.require_confirmation
+    if args.seed is not None:
+        clock.seed(args.seed)
+    watchdog.page_deadline = args.page_deadline
+    watchdog.command_timeout = args.command_timeout
+    for phase, seconds in args.phase_deadline:
+        if phase is None:
+            watchdog.phase_deadline = seconds
+        else:
+            watchdog.phase_deadlines[phase] = seconds
+    signal.signal(signal.SIGINT, _request_shutdown)
+    signal.signal(signal.SIGTERM, _request_shutdown)
+
+    # Validate the job file and pacing config before paying for a browser start
+    jobs = load_jobs(args.jobs) if args.jobs else None
+    blocked_urls = resource_blocking.load_block_list(args.block_resources)
+    if args.pacing_config:
+        pacing.pacing = pacing.PacingPolicy.from_config(args.pacing_config)
+    if args.max_pages_per_hour is not None:
+        pacing.pacing.max_pages_per_hour = args.max_pages_per_hour
+    atexit.register(pacing.print_pacing_report)
+    perf_sampler.sampler.enabled = args.perf_sample
+    atexit.register(perf_sampler.print_perf_summary)
+    atexit.register(resource_blocking.print_blocking_report)
+
+    lists = target_lists(args.lists or MY_DESIRED_LIST)
+    list_name = lists[0] if len(lists) == 1 else list(lists)
+
+    state = None
+    try:
+        supervisor = SessionSupervisor(
+            lambda: get_driver(
+                user_data_dir=r"D:\3rd_Chrome_rakib_linkedin_apollo",  # Adjust if needed
+                profile_dir="Profile 19",
+                chromedriver=args.chromedriver,
+                offline=args.offline,
+                blocked_urls=blocked_urls,
+                launch_profile=args.launch_profile,
+                headless=args.headless,
+            ),
+            max_pages=args.recycle_pages,
+            max_heap_mb=args.recycle_heap_mb,
+            max_rss_mb=args.recycle_rss_mb,
+            max_failures=args.recycle_failures,
+        )
+        driver = supervisor.start()
+
+        if args.retry_failed:
+            ledger.start_run(None, list_key(list_name), mode="retry")
+            retry_failed_pages(driver, list_name)
+            ledger.finish_run()
+            return
+
+        if jobs:
+            first_job, state = _resume_job(args, len(jobs))
+            for job_index in range(first_job, len(jobs)):
+                job = jobs[job_index]
+                if state is None:
+                    state = new_checkpoint(job["url"], job["list"],
+                                           start_page=job["start_page"] or args.start_page,
+                                           end_page=job["end_page"] or args.end_page)
+                    state["job_index"] = job_index
+                    save_checkpoint(state, args.checkpoint)
+                log.info(f"=== Job {job_index + 1}/{len(jobs)} ({job['name']}): {describe_lists(job['list'])} ===")
+                driver = run_search(driver, supervisor, state, args, create_missing=job["create_list"])
+                state = None
+            log.info(f"All {len(jobs)} job(s) finished.")
+        else:
+            # 1) Get the start page (from the checkpoint with --resume)
+            if args.resume:
+                state = load_checkpoint(args.checkpoint)
+                if state is None:
+                    log.info(f"No checkpoint found at {args.checkpoint}. Starting a new run.")
+                elif state.get("finished"):
+                    log.info("The checkpointed run already finished. Starting a new run.")
+                    state = None
+                else:
+                    log.info(f"Resuming at page {state['page_index']}: {state['page_url']}")
+                    if args.end_page:
+                        state["end_page"] = args.end_page
+
+            if state is None:
+                base_url = get_base_url()
+                state = new_checkpoint(base_url, list_name,
+                                       start_page=args.start_page, end_page=args.end_page)
+                save_checkpoint(state, args.checkpoint)
+
+            run_search(driver, supervisor, state, args)
+
+    except ShutdownRequested as e:
+        _flush_on_shutdown(state, args.checkpoint, e)
+        return
+
+    except Exception as e:
+        log.exception(f"An unexpected error occurred: {e}")
+        if state is not None:
+            log.info(f"Progress is saved in {args.checkpoint}; restart with --resume to continue.")
+
+    # Keep the browser open for inspection without burning CPU
+    log.info("Browser remains open. Press Ctrl+C to exit.")
+    try:
+        while True:
+            clock.sleep(1)
+    except ShutdownRequested:
+        log.info("Exiting.")
+
+
+def run_search(driver, supervisor, state, args, create_missing=False):
+    """
+    Runs one search (checkpoint `state`: start URL + Apollo list(s)) page by page
+    in the current browser session. Returns the driver (a new one if the
+    supervisor recycled the browser on the way).
+    """
+    list_name = state["list_name"]
+    key = list_key(list_name)
+    ledger.start_run(state["base_url"], key)
+
+    # 1) Load the start page
+    timed_get(driver, state["page_url"])
+    session_for(driver).loaded()
+    log.info("Page loaded successfully!")
+
+    # The URL should have landed on the checkpointed page; jump there if it didn't
+    landed = current_page(driver)
+    if landed is not None and landed != state["page_index"]:
+        log.warning(f"Landed on page {landed} instead of {state['page_index']}.")
+        goto_page(driver, state["page_index"])
+
+    # 2) Open Apollo on the first page
+    #    (handle_first_page retries with the recovery ladder & logs if it fails)
+    current_page_url = driver.current_url
+    handle_first_page(driver, current_page_url)
+
+    # 3) Loop over pages
+    total_pages = None
+    while True:
+        current_page_url = driver.current_url
+        start_page(current_page_url)
+        set_context(page_index=state["page_index"])
+        pacing.page_started()
+
+        if not args.redo_done and ledger.is_done(current_page_url, key):
+            # Completed for this list (set) in an earlier run => no work, no dwell
+            log.info(f"Already added to {describe_lists(list_name)} in an earlier run: {current_page_url}")
+            processed = True
+            outcome = "already_done"
+        else:
+            # Process the current page
+            # handle_each_page retries with the recovery ladder & logs if it fails
+            processed = handle_each_page(driver, current_page_url, list_name, create_missing)
+            outcome = "ok" if processed else "skipped"
+            if watchdog.session_lost:
+                # The watchdog killed a hung browser => continue from this page in a new one
+                driver = supervisor.recycle(state["page_url"], watchdog.recycle_reason)
+            with span("perf_sample"):
+                perf_sampler.sample_page(driver, current_page_url)
+
+            # Dwell from the pacing policy (random, non-repeating, pages-per-hour cap)
+            log.info(f"Current page: {current_page_url}")
+            with span("dwell"):
+                seconds = pacing.dwell()
+            log.info(f"Spent {seconds:.0f} seconds on this page.")
+
+        if state.get("end_page") and state["page_index"] >= state["end_page"]:
+            log.info(f"Reached the end page ({state['end_page']}).")
+            has_next = False
+        else:
+            log.info("Moving to the next page...")
+            driver, has_next = _click_next(driver, supervisor, state)
+        resource_blocking.collect(driver)
+        record = end_page(outcome)
+        end = state.get("end_page") or total_pages
+        if end is None:
+            # Open-ended run => take the ETA from the pager (read once it renders)
+            end = total_pages = last_page(driver)
+        pacing.page_finished(remaining_pages=max(end - state["page_index"], 0) if end else None)
+        if outcome != "already_done":
+            ledger.record_page(record, key, page_index=state["page_index"])
+
+        # Page done => checkpoint now points at the next unfinished page
+        # (with an explicit page parameter, so --resume is a single navigation)
+        next_url = None
+        if has_next:
+            next_url = driver.current_url
+            if page_from_url(next_url) is None:
+                next_url = url_for_page(next_url, state["page_index"] + 1)
+        record_page(state, outcome, next_url, args.checkpoint)
+        if not has_next:
+            break
+
+        # Rebuild a bloated/failing browser before the next page
+        supervisor.page_done(processed)
+        reason = supervisor.recycle_reason()
+        if reason:
+            driver = supervisor.recycle(state["page_url"], reason)
+
+    log.info(f"Run finished: {state['counters']}")
+
+    if args.retry_at_end:
+        retry_failed_pages(driver, list_name)
+    ledger.finish_run()
+    return driver
+
+
+def _click_next(driver, supervisor, state):
+    """
+    click_next_page; if it hangs (WebDriver command timeout, or the watchdog
+    reset the browser), reloads the current page in a new browser and clicks
+    once more. Returns (driver, has_next).
+    """
+    try:
+        with span("click_next_page"):
+            return driver, click_next_page(driver)
+    except Exception as e:
+        if not watchdog.timed_out(e):
+            raise
+        log.warning(f"[Watchdog] Moving to the next page timed out ({type(e).__name__}); "
+                    f"reloading page {state['page_index']} in a new browser...")
+        driver = supervisor.recycle(state["page_url"], watchdog.recycle_reason or "'Next' timed out")
+    with span("click_next_page"):
+        return driver, click_next_page(driver)
+
+
+def _resume_job(args, job_count):
+    """
+    For --jobs --resume: (index of the job to start at, its unfinished checkpoint or None).
+    """
+    if not args.resume:
+        return 0, None
+    state = load_checkpoint(args.checkpoint)
+    if state is None or "job_index" not in state:
+        log.info(f"No job checkpoint found at {args.checkpoint}. Starting with the first job.")
+        return 0, None
+    if state.get("finished"):
+        log.info(f"Job {state['job_index'] + 1} finished last time. Continuing with the next job.")
+        return min(state["job_index"] + 1, job_count), None
+    log.info(f"Resuming job {state['job_index'] + 1} at page {state['page_index']}: {state['page_url']}")
+    return state["job_index"], state
+
+
+def _flush_on_shutdown(state, checkpoint_path, signal_name):
+    """Persist the current (unfinished) page so --resume starts right here."""
+    log.info(f"Received {signal_name}. Saving checkpoint and exiting...")
+    if state is not None:
+        save_checkpoint(state, checkpoint_path)
+        log.info(f"Saved: page {state['page_index']} -> {state['page_url']}")
+
+
+if __name__ == "__main__":
+    main()
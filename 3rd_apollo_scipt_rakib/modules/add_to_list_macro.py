@@ -0,0 +1,183 @@
+# modules/add_to_list_macro.py
+
+from selenium.common.exceptions import WebDriverException
+
+from modules.apollo_list import target_lists
+from modules.dom_waits import LOCATOR_JS, ensure_script_timeout
+from modules.selector_registry import locators, note_match
+
+# Registry elements clicked by the macro, in order (remove buttons handled separately)
+MACRO_STEPS = [
+    ("open_panel", "add_to_list_label"),
+    ("remove_existing", "remove_list_buttons"),
+    ("open_picker", "select_lists_button"),
+    ("pick_list", "list_option"),
+    ("apply", "apply_button"),
+    ("add", "add_button"),
+]
+
+# Runs the whole "full flow" inside the Apollo iframe in one async script.
+# Each step waits for its element via DOM mutations (no polling), clicks it
+# and records its duration. Resolves with a result object, never rejects.
+_MACRO_JS = LOCATOR_JS + """
+var args = arguments[0];
+var done = arguments[arguments.length - 1];
+var result = { ok: false, failed_step: null, error: null, steps: [], matched: {}, removed: 0 };
+var started = performance.now();
+
+function findAll(loc) {
+    var kind = loc[0], value = loc[1];
+    try {
+        if (kind === 'xpath') {
+            var snap = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var out = [];
+            for (var i = 0; i < snap.snapshotLength; i++) out.push(snap.snapshotItem(i));
+            return out;
+        }
+        if (kind === 'css selector') return Array.prototype.slice.call(document.querySelectorAll(value));
+    } catch (e) {}
+    var one = find(loc);
+    return one ? [one] : [];
+}
+
+function waitFor(locs, ms) {
+    return new Promise(function (resolve) {
+        waitUntil(function () { return firstMatch(locs, document, true); }, ms, resolve);
+    });
+}
+
+function nextMutation(ms) {
+    return new Promise(function (resolve) {
+        var observer = new MutationObserver(function () { observer.disconnect(); resolve(true); });
+        observer.observe(document.documentElement, { childList: true, subtree: true, attributes: true });
+        setTimeout(function () { observer.disconnect(); resolve(false); }, ms);
+    });
+}
+
+function pause() {
+    return new Promise(function (resolve) { setTimeout(resolve, args.step_delay_ms); });
+}
+
+function fail(step, message, name, absent) {
+    var err = new Error(message);
+    err.step = step;
+    err.target = name;
+    err.absent = !!absent;
+    return err;
+}
+
+// A picker entry that never became clickable is only "absent" if the picker
+// has rendered other entries and none of them matches
+function optionAbsent(name) {
+    return !!firstMatch(args.any_option, document, false) && !firstMatch(args.locators[name], document, false);
+}
+
+async function clickStep(step, name) {
+    var t0 = performance.now();
+    var hit = await waitFor(args.locators[name], args.step_timeout_ms);
+    if (!hit) {
+        result.steps.push({ step: step, ms: Math.round(performance.now() - t0), ok: false });
+        var absent = step === 'pick_list' && optionAbsent(name);
+        throw fail(step, name + (absent ? ' is not in the picker' : ' not found within ' + args.step_timeout_ms + 'ms'),
+                   name, absent);
+    }
+    result.matched[name] = hit[0];
+    hit[1].scrollIntoView({ block: 'center' });
+    hit[1].click();
+    result.steps.push({ step: step, ms: Math.round(performance.now() - t0), ok: true });
+    if (args.step_delay_ms) await pause();
+}
+
+async function removeStep(step, name) {
+    var t0 = performance.now();
+    // Click one Remove button at a time; wait for the chip list to re-render in between
+    for (var guard = 0; guard < 25; guard++) {
+        var buttons = [];
+        for (var i = 0; i < args.locators[name].length && !buttons.length; i++) {
+            buttons = findAll(args.locators[name][i]);
+            if (buttons.length) result.matched[name] = i;
+        }
+        if (!buttons.length) break;
+        buttons[0].click();
+        result.removed++;
+        await nextMutation(1000);
+    }
+    result.steps.push({ step: step, ms: Math.round(performance.now() - t0), ok: true });
+}
+
+(async function () {
+    try {
+        for (var i = 0; i < args.steps.length; i++) {
+            var step = args.steps[i][0], name = args.steps[i][1];
+            if (name === 'remove_list_buttons') await removeStep(step, name);
+            else await clickStep(step, name);
+        }
+        result.ok = true;
+    } catch (e) {
+        result.failed_step = e.step || 'script';
+        result.failed_target = e.target || null;
+        result.option_absent = !!e.absent;
+        result.error = e.message || String(e);
+    }
+    result.total_ms = Math.round(performance.now() - started);
+    done(result);
+})();
+"""
+
+
+def run_add_to_list_macro(driver, list_name, step_timeout=10, step_delay=0.0):
+    """
+    Runs the full add-to-list flow (open panel, remove existing lists, open
+    picker, pick `list_name` - every name when it is a sequence - Apply, Add)
+    as one injected async script.
+    Must be called with the driver inside the Apollo iframe.
+
+    Returns a dict:
+      ok           - True if every step completed
+      failed_step  - name of the step that failed (or None)
+      failed_list  - list name missing from the rendered picker (or None; a
+                     pick that merely timed out is a plain failed step)
+      error        - failure message (or None)
+      steps        - [{"step", "ms", "ok"}, ...] per-step timings
+      removed      - number of existing list chips removed
+      total_ms     - total in-page time
+    """
+    names = target_lists(list_name)
+    steps = []
+    for step, name in MACRO_STEPS:
+        if name == "list_option":
+            # One pick per target list, each with its own locators
+            steps += [(step, f"{name}#{i}") for i in range(len(names))]
+        else:
+            steps.append((step, name))
+
+    index_maps = {}
+    script_locators = {}
+    for _, key in steps:
+        name, _, number = key.partition("#")
+        ordered = locators(name, value=names[int(number)] if number else None)
+        index_maps[key] = [index for index, _ in ordered]
+        script_locators[key] = [[by, value] for _, (by, value) in ordered]
+
+    args = {
+        "steps": [list(step) for step in steps],
+        "locators": script_locators,
+        "step_timeout_ms": int(step_timeout * 1000),
+        "step_delay_ms": int(step_delay * 1000),
+        "any_option": [[by, value] for _, (by, value) in locators("list_options")],
+    }
+
+    # Worst case: every step waits its full timeout, plus ~1s per removed chip
+    ensure_script_timeout(driver, step_timeout * len(steps) + 30)
+    try:
+        result = driver.execute_async_script(_MACRO_JS, args)
+    except WebDriverException as e:
+        return {"ok": False, "failed_step": "script", "failed_list": None, "error": e.msg or str(e),
+                "steps": [], "removed": 0, "total_ms": None}
+
+    for key, matched in result.pop("matched", {}).items():
+        note_match(key.partition("#")[0], index_maps[key][matched])
+    target = result.pop("failed_target", None) or ""
+    absent = result.pop("option_absent", False)
+    result["failed_list"] = names[int(target.partition("#")[2])] if absent and "#" in target else None
+    return result
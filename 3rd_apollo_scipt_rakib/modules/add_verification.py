@@ -0,0 +1,220 @@
+# modules/add_verification.py
+
+import re
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from modules.dom_waits import LOCATOR_JS, ensure_script_timeout
+from modules.frame_context import frames
+from modules.run_metrics import annotate
+from modules.selector_registry import locators
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# How long to wait for Apollo's confirmation/error message after the save click
+VERIFY_TIMEOUT = 8
+
+# A page with no confirmation message at all is 'unconfirmed'. The
+# action_toast / selected_count selectors are unverified (see
+# selector_registry), so by default that is only logged: the page still
+# counts as done in the run ledger and is not retried. True: it goes to the
+# recovery ladder like a mismatch.
+REQUIRE_CONFIRMATION = False
+
+# This many unconfirmed pages in a row => the selectors most likely don't
+# match this Apollo build: log an error and only wait UNCONFIRMED_TIMEOUT
+# for a message until one is seen again
+UNCONFIRMED_ALERT_STREAK = 3
+UNCONFIRMED_TIMEOUT = 1
+
+# Verification statuses (stored in the metrics record and the run ledger)
+CONFIRMED = "confirmed"
+MISMATCH = "mismatch"
+APOLLO_ERROR = "error"
+UNCONFIRMED = "unconfirmed"
+
+_COUNT_RE = re.compile(r"(\d[\d,]*)\s+(?:contacts?|people|persons?|leads?|records?)\b", re.IGNORECASE)
+_SELECTED_RE = re.compile(r"(\d[\d,]*)\s+selected", re.IGNORECASE)
+_ERROR_RE = re.compile(r"\b(error|failed|unable|could not|couldn't|at least|try again|limit)\b", re.IGNORECASE)
+
+
+class AddNotConfirmedError(Exception):
+    """Apollo reported an error, or confirmed a different number of contacts than were selected."""
+
+
+class AddUnconfirmedError(AddNotConfirmedError):
+    """No confirmation or error message from Apollo at all after the save click."""
+
+
+# Run-wide verification status counts, and the current run of unconfirmed pages
+status_counts = {}
+_unconfirmed_streak = 0
+
+
+# Inside the iframe: read the list-header text, mark the messages already on
+# screen (so an old one is never taken as this save's confirmation) and start
+# an observer that keeps the first new message in window.__apolloAddResult.
+_ARM_JS = LOCATOR_JS + """
+var args = arguments[0];
+
+function findAll(loc) {
+    try {
+        if (loc[0] === 'css selector') return Array.prototype.slice.call(document.querySelectorAll(loc[1]));
+        var snap = document.evaluate(loc[1], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var out = [];
+        for (var i = 0; i < snap.snapshotLength; i++) out.push(snap.snapshotItem(i));
+        return out;
+    } catch (e) { return []; }
+}
+
+function text(el) {
+    return el ? (el.innerText || el.textContent || '').trim() : '';
+}
+
+function freshToast() {
+    for (var i = 0; i < args.toast.length; i++) {
+        var all = findAll(args.toast[i]);
+        for (var j = 0; j < all.length; j++) {
+            var el = all[j];
+            if (el.hasAttribute('data-apollo-seen') || !text(el)) continue;
+            var cls = (el.className && el.className.baseVal !== undefined) ? el.className.baseVal : el.className;
+            return {
+                text: text(el),
+                error: /error|danger|fail/i.test(cls || '')
+            };
+        }
+    }
+    return null;
+}
+
+if (window.__apolloAddObserver) window.__apolloAddObserver.disconnect();
+args.toast.forEach(function (loc) {
+    findAll(loc).forEach(function (el) { el.setAttribute('data-apollo-seen', '1'); });
+});
+window.__apolloAddResult = null;
+window.__apolloFreshToast = freshToast;
+var observer = new MutationObserver(function () {
+    var hit = freshToast();
+    if (hit) { window.__apolloAddResult = hit; observer.disconnect(); }
+});
+observer.observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+window.__apolloAddObserver = observer;
+
+var header = firstMatch(args.selected, document, false);
+return header ? text(header[1]) : null;
+"""
+
+# Resolves with the message caught since arming (waiting for one if needed), or null
+_WAIT_JS = LOCATOR_JS + """
+var timeoutMs = arguments[0];
+var done = arguments[arguments.length - 1];
+if (window.__apolloAddResult === undefined) { done(null); return; }
+waitUntil(function () {
+    return window.__apolloAddResult || (window.__apolloFreshToast && window.__apolloFreshToast());
+}, timeoutMs, function (hit) {
+    if (window.__apolloAddObserver) window.__apolloAddObserver.disconnect();
+    window.__apolloAddResult = undefined;
+    done(hit);
+});
+"""
+
+
+def _script_locators(name):
+    return [[by, value] for _, (by, value) in locators(name)]
+
+
+def _parse_count(regex, text):
+    match = regex.search(text or "")
+    return int(match.group(1).replace(",", "")) if match else None
+
+
+def arm_verification(driver):
+    """
+    Call right before the save / Add / 'Create list & add' click. Starts
+    watching for Apollo's message and returns the number of contacts the
+    list header shows as selected (None if it can't be read).
+    """
+    ctx = frames(driver)
+    ctx.to_apollo()
+    try:
+        header = driver.execute_script(_ARM_JS, {
+            "toast": _script_locators("action_toast"),
+            "selected": _script_locators("selected_count"),
+        })
+    except WebDriverException as e:
+        log.warning(f"[Verify] Could not arm the confirmation watcher: {e.msg}")
+        return None
+    return _parse_count(_SELECTED_RE, header)
+
+
+def verify_add(driver, expected, list_name, timeout=VERIFY_TIMEOUT):
+    """
+    Waits for Apollo's confirmation or error message after the save click and
+    reconciles it with `expected` (from arm_verification). Records
+    {"status", "expected", "confirmed", "message"} on the page's metrics
+    record as "verification" and returns it.
+    Raises AddNotConfirmedError on an Apollo error, a count mismatch, or
+    (with REQUIRE_CONFIRMATION) no message at all, so the page is retried.
+    After UNCONFIRMED_ALERT_STREAK pages without any message it waits only
+    UNCONFIRMED_TIMEOUT seconds.
+    """
+    if not REQUIRE_CONFIRMATION and _unconfirmed_streak >= UNCONFIRMED_ALERT_STREAK:
+        timeout = min(timeout, UNCONFIRMED_TIMEOUT)
+    ctx = frames(driver)
+    ctx.to_apollo()
+    ensure_script_timeout(driver, timeout)
+    try:
+        message = driver.execute_async_script(_WAIT_JS, int(timeout * 1000))
+    except (TimeoutException, WebDriverException):
+        message = None
+
+    text = (message or {}).get("text")
+    confirmed = _parse_count(_COUNT_RE, text)
+    if message is None:
+        status = UNCONFIRMED
+    elif message.get("error") or (confirmed is None and _ERROR_RE.search(text or "")):
+        status = APOLLO_ERROR
+    elif expected is not None and confirmed is not None and confirmed != expected:
+        status = MISMATCH
+    else:
+        status = CONFIRMED
+
+    result = {"status": status, "expected": expected, "confirmed": confirmed, "message": text}
+    annotate(verification=result)
+    _count(status)
+
+    if status == CONFIRMED:
+        log.info(f"[Verify] Apollo confirmed {confirmed if confirmed is not None else 'the'} "
+                 f"contact(s) added to '{list_name}' (selected: {expected}).")
+        return result
+    if status == UNCONFIRMED:
+        log.warning(f"[Verify] Unconfirmed: no message from Apollo within {timeout}s after adding to "
+                    f"'{list_name}' (selected: {expected}).")
+        if _unconfirmed_streak == UNCONFIRMED_ALERT_STREAK:
+            log.error(f"[Verify] {_unconfirmed_streak} pages in a row without any Apollo confirmation: "
+                      f"the 'action_toast' / 'selected_count' selectors probably don't match this "
+                      f"Apollo build (see selector_registry); waiting only {UNCONFIRMED_TIMEOUT}s from now on.")
+        if not REQUIRE_CONFIRMATION:
+            return result
+        raise AddUnconfirmedError(f"No confirmation from Apollo for '{list_name}' within {timeout}s.")
+    if status == APOLLO_ERROR:
+        raise AddNotConfirmedError(f"Apollo reported an error: {text}")
+    raise AddNotConfirmedError(f"Apollo confirmed {confirmed} contact(s) but {expected} were selected.")
+
+
+def _count(status):
+    global _unconfirmed_streak
+    status_counts[status] = status_counts.get(status, 0) + 1
+    _unconfirmed_streak = _unconfirmed_streak + 1 if status == UNCONFIRMED else 0
+
+
+def print_verification_report():
+    """Verification status counts for the run; unconfirmed pages are a warning."""
+    if not status_counts:
+        return
+    log.info(f"[Verify] Verification results: {dict(sorted(status_counts.items()))}")
+    unconfirmed = status_counts.get(UNCONFIRMED, 0)
+    if unconfirmed:
+        log.warning(f"[Verify] {unconfirmed} page(s) got no confirmation from Apollo (counted as done; "
+                    f"check the 'action_toast' / 'selected_count' selectors).")
@@ -1,4 +1,34 @@
-# modules/apollo_list.py
-
-# The list name you want to ensure is used everywhere
-MY_DESIRED_LIST = "Ellucian Live - Datatel Users' Group-02"
+# modules/apollo_list.py
+
+# The list name you want to ensure is used everywhere
+MY_DESIRED_LIST = "Ellucian Live - Datatel Users' Group-02"
+
+# Joins the names of a multi-list target into one run ledger / checkpoint key
+LIST_KEY_SEPARATOR = " | "
+
+
+def target_lists(list_name):
+    """
+    The target as a tuple of list names. `list_name` is one name or a
+    sequence of names (multi-list mode); duplicates are dropped, order kept.
+    """
+    if isinstance(list_name, str):
+        names = [list_name]
+    else:
+        names = list(list_name or [])
+    seen = []
+    for name in names:
+        name = str(name).strip()
+        if name and name not in seen:
+            seen.append(name)
+    return tuple(seen)
+
+
+def list_key(list_name):
+    """Run ledger key for a target: the name itself for one list, 'A | B' for several."""
+    return LIST_KEY_SEPARATOR.join(target_lists(list_name))
+
+
+def describe_lists(list_name):
+    """Quoted names for log lines: 'A' or 'A', 'B'."""
+    return ", ".join(f"'{name}'" for name in target_lists(list_name))
@@ -0,0 +1,185 @@
+# modules/apollo_session.py
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+from modules.apollo_sidebar import open_apollo_in_iframe
+from modules.dom_waits import LOCATOR_JS, RECOVERY_CEILING, fast_wait
+from modules.frame_context import frames
+from modules.selector_registry import SIDEBAR_READY, locators, wait_for_apollo_iframe
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# Page states, in the order a page moves through them
+NOT_LOADED = "not_loaded"                # navigating, or the document can't be scripted
+PAGE_LOADED = "page_loaded"              # LinkedIn document ready, Apollo iframe not injected (yet)
+SIDEBAR_CLOSED = "sidebar_closed"        # iframe injected, contact panel not rendered
+SIDEBAR_OPEN = "sidebar_open"            # contact panel rendered
+CONTACTS_SELECTED = "contacts_selected"  # 'Select all' done for this page
+SAVED = "saved"                          # contacts added to the target list(s)
+STATES = [NOT_LOADED, PAGE_LOADED, SIDEBAR_CLOSED, SIDEBAR_OPEN, CONTACTS_SELECTED, SAVED]
+
+# Observation only: the iframe is there but can't be entered (probe())
+FRAME_UNREACHABLE = "frame_unreachable"
+
+# Main document: is the page loaded and is the Apollo iframe injected?
+_PAGE_PROBE_JS = LOCATOR_JS + """
+return {
+    ready_state: document.readyState,
+    iframe: !!firstMatch(arguments[0], document, false)
+};
+"""
+
+# Inside the iframe: is the contact panel rendered?
+_SIDEBAR_PROBE_JS = LOCATOR_JS + """
+return { sidebar: !!firstMatch(arguments[0], document, false) };
+"""
+
+# Run-wide counters over every session (a recycled browser gets a new one)
+stats = {"refreshes": 0, "sidebar_opens": 0, "opens_skipped": 0, "probes": 0}
+
+
+class ApolloSession:
+    """
+    Owns the page state of one driver: where the LinkedIn page and the Apollo
+    sidebar are (see STATES). Steps report what they did (loaded(), mark(),
+    results_changed()); refresh() and open_sidebar() are the only ways to
+    reload or (re)open, and ensure() takes the shortest path from the current
+    state to a goal - no reload when only the sidebar is closed, no opener
+    click when the sidebar is already open (a click would toggle it shut).
+
+    Get the session for a driver with session_for(driver).
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.state = NOT_LOADED
+
+    def at_least(self, state):
+        return STATES.index(self.state) >= STATES.index(state)
+
+    def mark(self, state):
+        """Record a transition done by a step (e.g. contacts selected, saved)."""
+        if state != self.state:
+            log.debug(f"[Session] {self.state} -> {state}")
+        self.state = state
+
+    def loaded(self):
+        """Call after driver.get()/refresh(): every frame and handle belongs to the old page."""
+        frames(self.driver).invalidate()
+        self.mark(PAGE_LOADED)
+
+    def results_changed(self):
+        """The SPA swapped in another result page: the sidebar stays, the selection doesn't."""
+        if self.at_least(SIDEBAR_OPEN):
+            self.mark(SIDEBAR_OPEN)
+
+    def probe(self):
+        """
+        Looks at the page (two cheap scripts) and returns the observed state:
+        NOT_LOADED, PAGE_LOADED, SIDEBAR_CLOSED, SIDEBAR_OPEN or
+        FRAME_UNREACHABLE. Leaves the driver in the main document.
+        """
+        stats["probes"] += 1
+        ctx = frames(self.driver)
+        try:
+            ctx.to_main()
+            page = self.driver.execute_script(
+                _PAGE_PROBE_JS, [[by, value] for _, (by, value) in locators("apollo_iframe")]
+            )
+        except WebDriverException:
+            # Can't even talk to the main document (mid-navigation / frame confusion)
+            ctx.invalidate()
+            return NOT_LOADED
+        if page["ready_state"] != "complete":
+            return NOT_LOADED
+        if not page["iframe"]:
+            return PAGE_LOADED
+
+        try:
+            ctx.to_apollo(timeout=5)
+            sidebar = self.driver.execute_script(
+                _SIDEBAR_PROBE_JS,
+                [[by, value] for name in SIDEBAR_READY for _, (by, value) in locators(name)],
+            )
+        except (TimeoutException, WebDriverException):
+            return FRAME_UNREACHABLE
+        finally:
+            ctx.to_main()
+        return SIDEBAR_OPEN if sidebar["sidebar"] else SIDEBAR_CLOSED
+
+    def sync(self):
+        """Probe and adopt the observed state (keeping selected/saved while the sidebar is open)."""
+        observed = self.probe()
+        if observed == FRAME_UNREACHABLE:
+            observed = SIDEBAR_CLOSED
+        if not (observed == SIDEBAR_OPEN and self.at_least(SIDEBAR_OPEN)):
+            self.mark(observed)
+        return self.state
+
+    def refresh(self):
+        """Reload the page and wait until the DOM is back."""
+        log.info("Refreshing browser now...")
+        stats["refreshes"] += 1
+        self.driver.refresh()
+        self.loaded()
+        fast_wait(self.driver, 20).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+        log.info("Browser refreshed successfully.")
+
+    def open_sidebar(self, iframe_timeout=RECOVERY_CEILING):
+        """
+        Gets the sidebar open from wherever the page is: waits for the iframe
+        if it isn't injected yet and clicks the opener only if the panel is
+        not already rendered. Returns True if the sidebar is open.
+        """
+        return self._open_from(self.sync(), iframe_timeout)
+
+    def _open_from(self, observed, iframe_timeout=RECOVERY_CEILING):
+        if self.at_least(SIDEBAR_OPEN):
+            stats["opens_skipped"] += 1
+            return True
+        if observed in (NOT_LOADED, PAGE_LOADED):
+            try:
+                wait_for_apollo_iframe(self.driver, iframe_timeout)
+            except TimeoutException:
+                log.warning("[Session] Apollo iframe did not appear.")
+                return False
+
+        stats["sidebar_opens"] += 1
+        if open_apollo_in_iframe(self.driver):
+            self.mark(SIDEBAR_OPEN)
+            return True
+        self.mark(SIDEBAR_CLOSED)
+        return False
+
+    def ensure(self, goal):
+        """
+        Shortest path to `goal` (PAGE_LOADED or SIDEBAR_OPEN): reload only if
+        the page isn't usable, open the sidebar only if it is closed.
+        Returns True if the goal state was reached.
+        """
+        observed = self.sync()
+        if observed == NOT_LOADED:
+            self.refresh()
+            observed = PAGE_LOADED
+        if goal == PAGE_LOADED:
+            return True
+        if goal == SIDEBAR_OPEN:
+            return self._open_from(observed)
+        raise ValueError(f"ensure() can't reach {goal!r}; the page steps move past {SIDEBAR_OPEN}.")
+
+
+def session_for(driver):
+    """The ApolloSession attached to `driver` (created on first use)."""
+    session = getattr(driver, "_apollo_session", None)
+    if session is None:
+        session = ApolloSession(driver)
+        driver._apollo_session = session
+    return session
+
+
+def print_session_stats():
+    log.info(f"[Session] {stats['refreshes']} refreshes, {stats['sidebar_opens']} sidebar opens, "
+             f"{stats['opens_skipped']} redundant opens skipped, {stats['probes']} state probes.")
@@ -0,0 +1,38 @@
+# modules/apollo_sidebar.py
+
+from modules.selector_registry import wait_for_sidebar_ready
+from modules.frame_context import frames
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+
+def open_apollo_in_iframe(driver):
+    """
+    Fallback approach:
+      - Wait for 'linkedin-sidebar-iframe'
+      - Click extension button from inside the iframe
+      - Wait until the sidebar renders its list header / action buttons
+    Returns True on success, False on error.
+    """
+    log.info("[Apollo] Attempting iframe-based approach...")
+    ctx = frames(driver)
+    try:
+        # Locate the Apollo iframe (cached until the next refresh)
+        ctx.to_apollo(timeout=15)
+
+        # Click the extension button within the iframe as soon as it is visible
+        ctx.use("apollo_opener", lambda btn: btn.click(), timeout=15, visible=True)
+
+        # Done once the sidebar shows the list header or the action buttons
+        wait_for_sidebar_ready(driver, timeout=15)
+        log.info("Opened the Apollo extension via iframe fallback.")
+        return True
+
+    except Exception as e:
+        log.warning(f"Error opening Apollo in iframe: {e}")
+        return False
+
+    finally:
+        # Always return to the main document
+        ctx.to_main()
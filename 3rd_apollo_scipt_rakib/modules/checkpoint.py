@@ -0,0 +1,88 @@
+# modules/checkpoint.py
+
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+from modules.pagination import page_from_url, url_for_page
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+def new_checkpoint(base_url, list_name, start_page=None, end_page=None):
+    """
+    Fresh checkpoint state for a run starting at `base_url`.
+    `page_url` always points at the next page that has NOT been finished yet;
+    with `start_page` it is `base_url` rewritten to that page (one navigation
+    instead of clicking Next from page 1), otherwise the page in `base_url`.
+    The run stops after `end_page` when it is set.
+    """
+    if start_page:
+        page_url = url_for_page(base_url, start_page)
+    else:
+        page_url = base_url
+        start_page = page_from_url(base_url) or 1
+    return {
+        "base_url": base_url,
+        "page_url": page_url,
+        "page_index": start_page,
+        "end_page": end_page,
+        "list_name": list_name,
+        "counters": {"processed": 0, "skipped": 0},
+        "finished": False,
+        "updated_at": None,
+    }
+
+
+def save_checkpoint(state, path=CHECKPOINT_FILE):
+    """
+    Atomically writes `state` to `path`: write to a temp file in the same
+    folder, fsync, then os.replace. A crash mid-write leaves the previous
+    checkpoint intact.
+    """
+    state["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".checkpoint-", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_checkpoint(path=CHECKPOINT_FILE):
+    """
+    Returns the saved checkpoint dict, or None if there is none (or it is unreadable).
+    """
+    if not os.path.isfile(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        log.warning(f"[Checkpoint] Could not read {path}: {e}")
+        return None
+
+
+def record_page(state, outcome, next_url, path=CHECKPOINT_FILE):
+    """
+    Called after a page is done: bumps counters, moves `page_url` to the next
+    unfinished page (or marks the run finished when there is none) and saves.
+    """
+    key = {"ok": "processed", "already_done": "already_done"}.get(outcome, "skipped")
+    state["counters"][key] = state["counters"].get(key, 0) + 1
+    if next_url:
+        state["page_url"] = next_url
+        state["page_index"] += 1
+    else:
+        state["finished"] = True
+    save_checkpoint(state, path)
@@ -0,0 +1,77 @@
+# modules/clock.py
+
+import random
+import time
+
+
+class SystemClock:
+    """Real time: time.monotonic() and a blocking time.sleep()."""
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Simulated time: sleep() records the request and moves the clock forward
+    without blocking, advance() stands in for work (page loads, clicks).
+    A whole run's waits can then be replayed in milliseconds and summed.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+        self.sleeps = []    # every requested sleep, in order
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds < 0:
+            raise ValueError("sleep length must be non-negative")
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def advance(self, seconds):
+        """Simulated work: time passes, but it isn't a sleep."""
+        self.now += seconds
+
+    @property
+    def slept(self):
+        return sum(self.sleeps)
+
+
+# Shared instances used for every deliberate wait and random pick (pacing,
+# human_delay, recovery backoff, metrics timing). Guards against real hangs
+# and browser timings (page_watchdog, dom_waits, startup) stay on real time.
+clock = SystemClock()
+rng = random.Random()
+
+
+def monotonic():
+    return clock.monotonic()
+
+
+def sleep(seconds):
+    clock.sleep(seconds)
+
+
+def seed(value):
+    """Make the random picks (dwell, delays, user agent) repeatable."""
+    rng.seed(value)
+
+
+def use_virtual_time(seed_value=None, start=0.0):
+    """Switch every module to a fresh VirtualClock (reseeding the RNG if given); returns it."""
+    global clock
+    clock = VirtualClock(start)
+    if seed_value is not None:
+        rng.seed(seed_value)
+    return clock
+
+
+def use_real_time():
+    global clock
+    clock = SystemClock()
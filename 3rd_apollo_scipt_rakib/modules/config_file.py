@@ -0,0 +1,22 @@
+# modules/config_file.py
+
+import json
+import os
+
+
+def load_data_file(path):
+    """
+    Parsed contents of a JSON file, or a YAML file (.yaml/.yml) when PyYAML
+    is installed. Raises ValueError for YAML without PyYAML.
+    """
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+
+    if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path} is YAML but PyYAML is not installed (pip install pyyaml), "
+                             "or use a .json file.")
+        return yaml.safe_load(text)
+    return json.loads(text)
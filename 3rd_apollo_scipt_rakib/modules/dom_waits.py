@@ -0,0 +1,159 @@
+# modules/dom_waits.py
+
+import time
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+# Polling interval for the remaining WebDriverWait calls (default is 0.5s)
+FAST_POLL = 0.1
+
+# Upper bound for waits that replace the old fixed sleeps after a refresh
+RECOVERY_CEILING = 20
+
+# Shared in-page helpers (prepended to the async scripts of this package):
+#   find(loc, doc)                  -> first element for a Selenium (by, value) pair, or null
+#   isVisible(el)                   -> rendered, enabled and not visibility:hidden
+#   firstMatch(locs, doc, visible)  -> [index, element] for the first matching locator, or null
+#   waitUntil(check, ms, done)      -> calls done(check()) as soon as check() is truthy
+#                                      (re-checked on every DOM mutation), or done(null) after ms
+LOCATOR_JS = """
+function find(loc, doc) {
+    var kind = loc[0], value = loc[1];
+    doc = doc || document;
+    try {
+        if (kind === 'css selector') return doc.querySelector(value);
+        if (kind === 'xpath') return doc.evaluate(
+            value, doc, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+        ).singleNodeValue;
+        if (kind === 'id') return doc.getElementById(value);
+        if (kind === 'class name') return doc.getElementsByClassName(value)[0] || null;
+        if (kind === 'tag name') return doc.getElementsByTagName(value)[0] || null;
+        if (kind === 'name') return doc.getElementsByName(value)[0] || null;
+    } catch (e) {}
+    return null;
+}
+
+function isVisible(el) {
+    return el.getClientRects().length > 0 && !el.disabled
+        && getComputedStyle(el).visibility !== 'hidden';
+}
+
+function firstMatch(locs, doc, visible) {
+    for (var i = 0; i < locs.length; i++) {
+        var el = find(locs[i], doc);
+        if (el && (!visible || isVisible(el))) return [i, el];
+    }
+    return null;
+}
+
+function waitUntil(check, timeoutMs, done) {
+    var hit = check();
+    if (hit) { done(hit); return; }
+
+    var finished = false;
+    var observer = new MutationObserver(function () {
+        if (finished) return;
+        var found = check();
+        if (found) {
+            finished = true;
+            observer.disconnect();
+            clearTimeout(timer);
+            done(found);
+        }
+    });
+    observer.observe(document.documentElement || document, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+    var timer = setTimeout(function () {
+        if (finished) return;
+        finished = true;
+        observer.disconnect();
+        done(null);
+    }, timeoutMs);
+}
+"""
+
+# Resolves with [index, element] for the first matching locator, or null on timeout.
+# Checks once immediately, then re-checks on every DOM mutation instead of polling.
+_WAIT_FOR_ANY_JS = LOCATOR_JS + """
+var locators = arguments[0], timeoutMs = arguments[1], visible = arguments[2];
+var done = arguments[arguments.length - 1];
+waitUntil(function () { return firstMatch(locators, document, visible); }, timeoutMs, done);
+"""
+
+
+def fast_wait(driver, timeout=10):
+    """
+    WebDriverWait with a 0.1s poll instead of the default 0.5s.
+    Use for conditions a DOM observer can't express (e.g. clickability checks).
+    """
+    return WebDriverWait(driver, timeout, poll_frequency=FAST_POLL)
+
+
+def wait_for_any(driver, locators, timeout=10, visible=False):
+    """
+    Waits in the *current* frame until one of `locators` matches.
+    Resolves as soon as the DOM changes to include a match (MutationObserver),
+    with `timeout` seconds as the ceiling.
+    Returns (index, element) of the first locator that matched.
+    Raises TimeoutException if nothing matched within `timeout`.
+    """
+    locators = list(locators)
+    started = time.monotonic()
+
+    ensure_script_timeout(driver, timeout)
+    try:
+        result = driver.execute_async_script(
+            _WAIT_FOR_ANY_JS,
+            [[by, value] for by, value in locators],
+            int(timeout * 1000),
+            bool(visible),
+        )
+    except TimeoutException:
+        result = None
+    except WebDriverException:
+        # Document unloaded mid-wait (navigation/refresh): finish with a fast poll
+        remaining = max(timeout - (time.monotonic() - started), FAST_POLL)
+        return _poll_for_any(driver, locators, remaining, visible)
+
+    if not result:
+        raise TimeoutException(f"None of {_describe(locators)} appeared within {timeout}s")
+    return result[0], result[1]
+
+
+def wait_for(driver, locator, timeout=10, visible=False):
+    """
+    Single-locator form of wait_for_any. Returns the element.
+    """
+    return wait_for_any(driver, [locator], timeout, visible)[1]
+
+
+def _poll_for_any(driver, locators, timeout, visible):
+    """Fallback used when the async script can't run (page was navigating)."""
+    def _match(drv):
+        for index, (by, value) in enumerate(locators):
+            try:
+                elements = drv.find_elements(by, value)
+            except WebDriverException:
+                return False
+            for element in elements:
+                if not visible or element.is_displayed():
+                    return index, element
+        return False
+
+    try:
+        return fast_wait(driver, timeout).until(_match)
+    except TimeoutException:
+        raise TimeoutException(f"None of {_describe(locators)} appeared within {timeout:.1f}s")
+
+
+def ensure_script_timeout(driver, timeout):
+    """Async scripts are bounded by the session script timeout; keep it above our ceiling."""
+    needed = timeout + 5
+    if getattr(driver, "_dom_wait_script_timeout", 0) < needed:
+        driver.set_script_timeout(needed)
+        driver._dom_wait_script_timeout = needed
+
+
+def _describe(locators):
+    return ", ".join(f"{by}={value!r}" for by, value in locators)
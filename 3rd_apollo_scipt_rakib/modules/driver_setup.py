@@ -1,92 +1,298 @@
-# modules/driver_setup.py
-
-import time
-import random
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-
-# List of possible user agents to rotate
-USER_AGENTS = [
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 11.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 11.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
-]
-
-def human_delay(base=20, var=10):
-    """
-    Adds a realistic random delay: base ± random(0, var).
-    e.g. human_delay(3,2) -> sleeps between 3 and 5 seconds
-    """
-    time.sleep(base + random.uniform(0, var))
-
-def get_driver(user_data_dir, profile_dir):
-    """
-    Configure and return a Selenium Chrome WebDriver.
-    Suppresses navigator.webdriver and other automation flags.
-    """
-    chrome_options = webdriver.ChromeOptions()
-
-    # Randomly pick a User-Agent from our list
-    chosen_ua = random.choice(USER_AGENTS)
-    chrome_options.add_argument(f"--user-agent={chosen_ua}")
-
-    chrome_options.add_argument(fr"--user-data-dir={user_data_dir}")
-    chrome_options.add_argument(f"--profile-directory={profile_dir}")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("--start-maximized")
-    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    chrome_options.add_experimental_option("useAutomationExtension", False)
-
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-
-    # Suppress navigator.webdriver
-    driver.execute_cdp_cmd(
-        "Page.addScriptToEvaluateOnNewDocument",
-        {
-            "source": """
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            });
-            """
-        },
-    )
-
-    return driver
-
-def simulate_slow_scrolling(driver, steps=3):
-    """
-    Slowly scroll down the page in small increments, waiting
-    randomly between each scroll for 3–5 seconds, to appear more human.
-    """
-    for _ in range(steps):
-        driver.execute_script(
-            "window.scrollBy(0, document.documentElement.clientHeight / 4);"
-        )
-        # Wait 3–5 sec
-        human_delay(3, 2)
-    print("Finished slow scrolling.")
-
-# Optionally remove or keep do_random_click if you want no random clicks at all:
-"""
-def do_random_click(driver):
-    # This function is no longer called in main.py.
-    try:
-        x_offset = random.randint(100, 300)
-        y_offset = random.randint(100, 500)
-        driver.execute_script(
-            f"document.elementFromPoint({x_offset}, {y_offset}).click();"
-        )
-        print(f"Random click at ({x_offset}, {y_offset}) done.")
-        human_delay(2, 2)
-    except Exception as e:
-        print(f"Random click failed: {e}")
-"""
+# modules/driver_setup.py
+
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from modules import clock
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# selenium, webdriver_manager and resource_blocking (which pulls in the
+# metrics/watchdog stack) are imported inside get_driver(): the page modules
+# only need human_delay, and the manager is only needed on a cache miss.
+
+# Chrome major version -> chromedriver path that worked with it
+DRIVER_CACHE_FILE = "driver_cache.json"
+
+# Pinned chromedriver (skips version lookup and the manager entirely)
+CHROMEDRIVER_ENV = "CHROMEDRIVER_PATH"
+
+# Timings (seconds) of the last get_driver() call, plus the first driver.get
+startup_timings = {}
+
+# V8 old-space cap of the "lean" profile (MB). SessionSupervisor's heap
+# recycle threshold (RECYCLE_HEAP_MB) is derived from it and must stay
+# below it, or the renderer runs out of memory before the browser is recycled.
+LEAN_JS_HEAP_MB = 1536
+
+# Extra Chrome switches per launch profile ("lean" is for shared VMs: fixed
+# smaller viewport, no background services, capped renderers and caches)
+LAUNCH_PROFILES = {
+    "standard": [
+        "--start-maximized",
+    ],
+    "lean": [
+        "--window-size=1280,900",
+        "--disable-gpu",
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-sync",
+        "--disable-domain-reliability",
+        "--disable-client-side-phishing-detection",
+        "--disable-breakpad",
+        "--disable-features=Translate,MediaRouter,OptimizationHints,"
+        "AutofillServerCommunication,CalculateNativeWinOcclusion",
+        "--metrics-recording-only",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--mute-audio",
+        "--renderer-process-limit=2",
+        "--disk-cache-size=52428800",
+        "--media-cache-size=1",
+        f"--js-flags=--max-old-space-size={LEAN_JS_HEAP_MB}",
+    ],
+}
+DEFAULT_LAUNCH_PROFILE = "standard"
+
+# List of possible user agents to rotate
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 11.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 11.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; WOW64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+]
+
+def human_delay(base=20, var=10):
+    """
+    Adds a realistic random delay: base ± random(0, var).
+    e.g. human_delay(3,2) -> sleeps between 3 and 5 seconds
+    """
+    clock.sleep(base + clock.rng.uniform(0, var))
+
+def detect_chrome_version():
+    """
+    Installed Chrome version string (e.g. '122.0.6261.95') without launching
+    it, or None if it can't be found. Windows reads the registry; elsewhere
+    the binary is asked for --version.
+    """
+    if sys.platform == "win32":
+        import winreg
+        for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+            try:
+                with winreg.OpenKey(root, r"Software\Google\Chrome\BLBeacon") as key:
+                    return winreg.QueryValueEx(key, "version")[0]
+            except OSError:
+                continue
+        return None
+
+    for binary in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser",
+                   "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"):
+        try:
+            out = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+        except (OSError, subprocess.SubprocessError):
+            continue
+        match = re.search(r"\d+(?:\.\d+)+", out)
+        if match:
+            return match.group(0)
+    return None
+
+
+def _load_driver_cache():
+    try:
+        with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_driver_cache(cache):
+    try:
+        with open(DRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        log.warning(f"[Driver] Could not write {DRIVER_CACHE_FILE}: {e}")
+
+
+def resolve_chromedriver(chromedriver=None, offline=False, refresh=False):
+    """
+    Path to a chromedriver for the installed Chrome, cheapest source first:
+      1) `chromedriver` argument or the CHROMEDRIVER_PATH env var (pinned, offline)
+      2) driver_cache.json entry for the installed Chrome major version
+      3) webdriver_manager (may touch the network), result cached for next time
+    `refresh=True` skips the cache (e.g. after the cached driver failed).
+    Returns (path, source). Raises RuntimeError when `offline` and nothing local fits.
+    """
+    pinned = chromedriver or os.environ.get(CHROMEDRIVER_ENV)
+    if pinned:
+        if not os.path.isfile(pinned):
+            raise RuntimeError(f"Pinned chromedriver not found: {pinned}")
+        return pinned, "pinned"
+
+    version = detect_chrome_version()
+    major = version.split(".")[0] if version else None
+    cache = _load_driver_cache()
+    cached = cache.get(major) if major else None
+    if cached and not refresh and os.path.isfile(cached):
+        return cached, "cache"
+
+    if offline:
+        raise RuntimeError(
+            f"Offline and no cached chromedriver for Chrome {version or '(not detected)'}; "
+            f"pass --chromedriver or set {CHROMEDRIVER_ENV}."
+        )
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager().install()
+    if major:
+        cache[major] = path
+        _save_driver_cache(cache)
+    return path, "manager"
+
+
+def apply_launch_profile(chrome_options, profile=DEFAULT_LAUNCH_PROFILE, headless=False):
+    """
+    Adds the LAUNCH_PROFILES switches for `profile` to `chrome_options`.
+    `headless` uses Chrome's new headless mode, which (unlike the old one)
+    loads extensions from the profile, so the Apollo sidebar still injects.
+    """
+    if profile not in LAUNCH_PROFILES:
+        raise ValueError(f"Unknown launch profile {profile!r}; choose from {sorted(LAUNCH_PROFILES)}")
+    for switch in LAUNCH_PROFILES[profile]:
+        if headless and switch == "--start-maximized":
+            # No screen to maximize to: give the page a real desktop viewport
+            switch = "--window-size=1920,1080"
+        chrome_options.add_argument(switch)
+    if headless:
+        chrome_options.add_argument("--headless=new")
+
+
+def get_driver(user_data_dir, profile_dir, chromedriver=None, offline=False, blocked_urls=None,
+               launch_profile=DEFAULT_LAUNCH_PROFILE, headless=False):
+    """
+    Configure and return a Selenium Chrome WebDriver.
+    Suppresses navigator.webdriver and other automation flags.
+    The chromedriver comes from resolve_chromedriver (pinned path, version
+    cache, then webdriver_manager); timings land in `startup_timings`.
+    `blocked_urls` (see resource_blocking.load_block_list) are blocked via
+    CDP Network.setBlockedURLs, with the network log on for the savings report.
+    `launch_profile` / `headless` pick the Chrome switches (apply_launch_profile).
+    """
+    startup_timings.clear()
+    t0 = time.perf_counter()
+    from selenium import webdriver
+    from selenium.common.exceptions import SessionNotCreatedException
+    from selenium.webdriver.chrome.service import Service
+    from modules import resource_blocking
+    startup_timings["imports"] = time.perf_counter() - t0
+    startup_timings["launch_profile"] = launch_profile + (" (headless)" if headless else "")
+
+    chrome_options = webdriver.ChromeOptions()
+
+    # Randomly pick a User-Agent from our list
+    chosen_ua = clock.rng.choice(USER_AGENTS)
+    chrome_options.add_argument(f"--user-agent={chosen_ua}")
+
+    chrome_options.add_argument(fr"--user-data-dir={user_data_dir}")
+    chrome_options.add_argument(f"--profile-directory={profile_dir}")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    apply_launch_profile(chrome_options, launch_profile, headless)
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+    if blocked_urls:
+        resource_blocking.enable_network_log(chrome_options)
+
+    t0 = time.perf_counter()
+    driver_path, source = resolve_chromedriver(chromedriver, offline)
+    startup_timings["resolve_driver"] = time.perf_counter() - t0
+    startup_timings["driver_source"] = source
+
+    t0 = time.perf_counter()
+    try:
+        driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+    except SessionNotCreatedException:
+        if source != "cache" or offline:
+            raise
+        # Chrome updated past the cached driver => resolve again once
+        log.info("[Driver] Cached chromedriver no longer matches Chrome; resolving a new one...")
+        driver_path, source = resolve_chromedriver(offline=offline, refresh=True)
+        startup_timings["driver_source"] = source
+        driver = webdriver.Chrome(service=Service(driver_path), options=chrome_options)
+    startup_timings["chrome_launch"] = time.perf_counter() - t0
+
+    # Suppress navigator.webdriver
+    driver.execute_cdp_cmd(
+        "Page.addScriptToEvaluateOnNewDocument",
+        {
+            "source": """
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+            """
+        },
+    )
+
+    if resource_blocking.apply_block_list(driver, blocked_urls):
+        resource_blocking.report.enabled = True
+
+    return driver
+
+def timed_get(driver, url):
+    """
+    driver.get(url); the first call after get_driver() is recorded as
+    'first_get' in startup_timings and the startup breakdown is printed.
+    """
+    t0 = time.perf_counter()
+    driver.get(url)
+    if startup_timings and "first_get" not in startup_timings:
+        startup_timings["first_get"] = time.perf_counter() - t0
+        print_startup_report()
+
+
+def print_startup_report():
+    if not startup_timings:
+        return
+    phases = ["imports", "resolve_driver", "chrome_launch", "first_get"]
+    parts = [f"{phase} {startup_timings[phase]:.2f}s" for phase in phases if phase in startup_timings]
+    total = sum(startup_timings[phase] for phase in phases if phase in startup_timings)
+    log.info(f"[Startup] {', '.join(parts)} (driver from {startup_timings.get('driver_source')}, "
+             f"{startup_timings.get('launch_profile')} profile); total {total:.2f}s")
+
+
+def simulate_slow_scrolling(driver, steps=3):
+    """
+    Slowly scroll down the page in small increments, waiting
+    randomly between each scroll for 3–5 seconds, to appear more human.
+    """
+    for _ in range(steps):
+        driver.execute_script(
+            "window.scrollBy(0, document.documentElement.clientHeight / 4);"
+        )
+        # Wait 3–5 sec
+        human_delay(3, 2)
+    log.info("Finished slow scrolling.")
+
+# Optionally remove or keep do_random_click if you want no random clicks at all:
+"""
+def do_random_click(driver):
+    # This function is no longer called in main.py.
+    try:
+        x_offset = random.randint(100, 300)
+        y_offset = random.randint(100, 500)
+        driver.execute_script(
+            f"document.elementFromPoint({x_offset}, {y_offset}).click();"
+        )
+        print(f"Random click at ({x_offset}, {y_offset}) done.")
+        human_delay(2, 2)
+    except Exception as e:
+        print(f"Random click failed: {e}")
+"""
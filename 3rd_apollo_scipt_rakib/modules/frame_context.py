@@ -0,0 +1,138 @@
+# modules/frame_context.py
+
+from contextlib import contextmanager
+
+from selenium.common.exceptions import (
+    NoSuchFrameException,
+    StaleElementReferenceException,
+)
+
+from modules.selector_registry import find, wait_for_apollo_iframe
+
+MAIN = "main"
+APOLLO = "apollo"
+
+
+class FrameContext:
+    """
+    Tracks which frame the driver is in (main LinkedIn document or the Apollo
+    'linkedin-sidebar-iframe') so redundant switches are skipped, and caches
+    the iframe element plus stable element handles until the next navigation
+    or refresh. Cached handles are re-resolved once on StaleElementReferenceException.
+
+    Get the context for a driver with frames(driver); all frame switching
+    should go through it so the tracked frame stays correct.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.current = MAIN
+        self._iframe = None
+        self._elements = {}   # (frame, name) -> WebElement
+        self.switches = 0
+        self.skipped_switches = 0
+
+    def invalidate(self):
+        """
+        Call after driver.get()/refresh(): WebDriver is back in the top-level
+        document and every cached handle belongs to the old page.
+        """
+        self.current = MAIN
+        self._iframe = None
+        self._elements.clear()
+
+    def to_main(self):
+        """Switch to the LinkedIn document (no-op if already there)."""
+        if self.current == MAIN:
+            self.skipped_switches += 1
+            return
+        self.driver.switch_to.default_content()
+        self.switches += 1
+        self.current = MAIN
+
+    def to_apollo(self, timeout=20):
+        """
+        Switch into the Apollo iframe (no-op if already there). Uses the cached
+        iframe element; re-locates it if it went stale or was never found.
+        Raises TimeoutException if the iframe does not appear within `timeout`.
+        """
+        if self.current == APOLLO:
+            self.skipped_switches += 1
+            return
+        self.to_main()
+        if self._iframe is not None:
+            try:
+                self.driver.switch_to.frame(self._iframe)
+                self.switches += 1
+                self.current = APOLLO
+                return
+            except (StaleElementReferenceException, NoSuchFrameException):
+                self._drop_frame_cache()
+
+        self._iframe = wait_for_apollo_iframe(self.driver, timeout)
+        self.driver.switch_to.frame(self._iframe)
+        self.switches += 1
+        self.current = APOLLO
+
+    @contextmanager
+    def apollo(self, timeout=20):
+        """Run the block inside the Apollo iframe, then return to the previous frame."""
+        previous = self.current
+        self.to_apollo(timeout)
+        try:
+            yield self
+        finally:
+            if previous == MAIN:
+                self.to_main()
+
+    @contextmanager
+    def main_document(self):
+        """Run the block in the LinkedIn document, then return to the previous frame."""
+        previous = self.current
+        self.to_main()
+        try:
+            yield self
+        finally:
+            if previous == APOLLO:
+                self.to_apollo()
+
+    def remember(self, name, element):
+        """Cache a handle (e.g. from a page snapshot) for the current frame."""
+        if element is not None:
+            self._elements[(self.current, name)] = element
+
+    def element(self, name, timeout=10, visible=False):
+        """Cached handle for registry element `name` in the current frame, found on first use."""
+        key = (self.current, name)
+        if key not in self._elements:
+            self._elements[key] = find(self.driver, name, timeout, visible)
+        return self._elements[key]
+
+    def use(self, name, action, timeout=10, visible=False):
+        """
+        Calls action(element) with the cached handle for `name`; on a stale
+        handle, re-finds the element once and retries. Returns action's result.
+        """
+        try:
+            return action(self.element(name, timeout, visible))
+        except StaleElementReferenceException:
+            self._elements.pop((self.current, name), None)
+            return action(self.element(name, timeout, visible))
+
+    def forget_elements(self):
+        """Drop cached element handles but keep the iframe handle and current frame."""
+        self._elements.clear()
+
+    def _drop_frame_cache(self):
+        self._iframe = None
+        for key in [k for k in self._elements if k[0] == APOLLO]:
+            del self._elements[key]
+
+
+def frames(driver):
+    """The FrameContext attached to `driver` (created on first use)."""
+    ctx = getattr(driver, "_apollo_frames", None)
+    if ctx is None:
+        ctx = FrameContext(driver)
+        driver._apollo_frames = ctx
+    return ctx
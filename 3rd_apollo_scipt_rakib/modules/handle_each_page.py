@@ -1,188 +1,299 @@
-# modules/handle_each_page.py
-
-import re
-import time
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-
-from modules.driver_setup import human_delay
-from modules.apollo_list import MY_DESIRED_LIST
-from modules.browser_refresh import check_and_refresh_if_needed, refresh_browser_if_needed
-from modules.handle_first_page import open_apollo_in_iframe
-from modules.not_scraped_logger import log_not_scraped
-
-def handle_each_page(driver, current_url):
-    """
-    1) check_and_refresh_if_needed -> if 'no contacts' found, refresh once
-    2) Try up to 3 times to:
-       - Switch to Apollo iframe
-       - Ensure all selected
-       - Process last action (or do_full_add_to_list)
-      If an error occurs:
-       - Refresh + wait 10s
-       - Re-open Apollo extension (since extension closes after refresh)
-       - Retry
-    3) If still failing after 3 attempts, log to CSV & skip page.
-    """
-
-    # 1) Optional refresh if 'no contacts'
-    refreshed = check_and_refresh_if_needed(driver)
-    if refreshed:
-        human_delay(2, 1)
-
-    max_attempts = 3
-
-    for attempt in range(1, max_attempts + 1):
-        try:
-            print(f"[Each Page] Attempt {attempt}/{max_attempts}...")
-
-            # Switch to iframe
-            switch_to_apollo_iframe(driver)
-
-            # Ensure all selected
-            ensure_all_selected(driver)
-
-            # Add to list or do full flow
-            process_last_action(driver)
-
-            # Success => break out
-            break
-
-        except Exception as e:
-            print(f"[Each Page] Error on attempt {attempt}: {e}")
-
-            if attempt < max_attempts:
-                print("[Each Page] Refreshing browser & re-opening Apollo, then retrying...")
-                refresh_browser_if_needed(driver)
-                time.sleep(10)  # must wait 10s after refresh
-                open_apollo_in_iframe(driver)  # re-open extension
-                human_delay(2, 1)  # short wait for extension to load
-            else:
-                print(f"[Each Page] Failed after {max_attempts} attempts. Logging & skipping this page.")
-                log_not_scraped(current_url, str(e))
-                return
-
-    # Switch back to main doc each time
-    driver.switch_to.default_content()
-
-
-def switch_to_apollo_iframe(driver):
-    """
-    Switch to the existing Apollo sidebar iframe.
-    Raises an exception if not found in 20s.
-    """
-    iframe = WebDriverWait(driver, 20).until(
-        EC.presence_of_element_located((By.XPATH, '//*[@id="linkedin-sidebar-iframe"]'))
-    )
-    driver.switch_to.frame(iframe)
-
-
-def ensure_all_selected(driver):
-    """
-    If 'Select all' is available, click it. Otherwise, do nothing.
-    """
-    try:
-        header_div = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.x_FsSHV.list-header"))
-        )
-        selection_toggle = header_div.find_element(By.CLASS_NAME, "x_ZYlnk").text.strip()
-
-        if "Select all" in selection_toggle:
-            print("[Each Page] No contacts selected. Clicking 'Select all'...")
-            header_div.find_element(By.CLASS_NAME, "x_ZYlnk").click()
-            human_delay(1, 0.5)
-        else:
-            print(f"[Each Page] Contacts already selected (Toggle text: '{selection_toggle}').")
-    except Exception as e:
-        print(f"Error ensuring all contacts are selected: {e}")
-
-
-def process_last_action(driver):
-    """
-    Check if last action = "Add to list “MY_DESIRED_LIST”".
-      - If yes, just click to save.
-      - Otherwise, do do_full_add_to_list.
-    """
-    last_action_elem = driver.find_element(By.CSS_SELECTOR, "div.x_xCUI9")
-    full_text = last_action_elem.text.strip()
-
-    match = re.search(r'Add to list “([^”]+)”', full_text)
-    if match:
-        dynamic_list_name = match.group(1).strip()
-        print(f"[Each Page] Last action shows list: '{dynamic_list_name}'")
-
-        if dynamic_list_name == MY_DESIRED_LIST:
-            print("[Each Page] Matches desired list! Clicking to save data...")
-            driver.execute_script("arguments[0].click();", last_action_elem)
-            human_delay(1, 0.5)
-        else:
-            print(f"[Each Page] Different list '{dynamic_list_name}'. Doing full flow.")
-            do_full_add_to_list(driver)
-    else:
-        print(f"[Each Page] Could not parse the list name from '{full_text}'. Doing FULL flow.")
-        do_full_add_to_list(driver)
-
-
-def do_full_add_to_list(driver):
-    """
-    The 'full flow' to manually add contacts to the desired list.
-    Retries up to 3 times if something fails.
-    """
-    attempts = 3
-    for attempt in range(1, attempts + 1):
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//div[@class='x_S1bDQ']//label[@class='x_mPXlR']"))
-            ).click()
-            human_delay(1, 0.5)
-
-            remove_buttons = driver.find_elements(
-                By.XPATH, "//button[contains(@aria-label, 'Remove')]"
-            )
-            for remove_button in remove_buttons:
-                driver.execute_script("arguments[0].click();", remove_button)
-                human_delay(0.5, 0.2)
-
-            select_lists_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//div[@class='x_pr73O']/span[@class='x_cnXw0']"))
-            )
-            select_lists_button.click()
-            human_delay(1, 0.5)
-
-            desired_list_elem = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, f"//div[@data-value='{MY_DESIRED_LIST}']"))
-            )
-            desired_list_elem.click()
-            human_delay(1, 0.5)
-
-            apply_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//button[span[contains(text(), 'Apply')]]"))
-            )
-            apply_button.click()
-            human_delay(1, 0.5)
-
-            add_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//button[span[contains(text(), 'Add')]]"))
-            )
-            add_button.click()
-            print("[Each Page] Data saved successfully (FULL flow).")
-
-            human_delay(1, 0.5)
-            return
-
-        except Exception as e:
-            print(f"[Each Page] Error in do_full_add_to_list attempt {attempt}/{attempts}: {e}")
-            if attempt < attempts:
-                print("[Each Page] Retrying do_full_add_to_list flow...")
-                human_delay(2, 1)
-            else:
-                # Re-raise so handle_each_page can log/skip
-                raise e
+# modules/handle_each_page.py
+
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+
+from modules.pacing import pause
+from modules.selector_registry import find_all, find_clickable
+from modules.apollo_list import MY_DESIRED_LIST, describe_lists, target_lists
+from modules.apollo_session import CONTACTS_SELECTED, SAVED, session_for
+from modules.not_scraped_logger import log_not_scraped
+from modules.page_snapshot import take_snapshot, forget_snapshot
+from modules.frame_context import frames
+from modules.run_metrics import span, set_attempt, annotate
+from modules.add_to_list_macro import run_add_to_list_macro
+from modules.add_verification import arm_verification, verify_add
+from modules.list_creation import ListNotFoundError, create_new_list
+from modules.run_ledger import PATH_CREATE_LIST, PATH_FULL_FLOW, PATH_LAST_ACTION
+from modules.recovery import (
+    EmptyResultsError,
+    PanelNotOpenedError,
+    SidebarClosedError,
+    policy,
+)
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# How do_full_add_to_list runs the full flow:
+#   "macro" - one injected async script (add_to_list_macro), falls back to "steps" on failure
+#   "steps" - one WebDriver command per click (original flow)
+FULL_FLOW_MODE = "macro"
+
+def handle_each_page(driver, current_url, list_name=MY_DESIRED_LIST, create_missing=False):
+    """
+    Adds the contacts on the current page to the Apollo list `list_name`, or
+    to every list when it is a sequence of names (creating missing lists
+    first if `create_missing` is set).
+    1) Try up to recovery.policy.max_attempts times to:
+       - Switch to Apollo iframe
+       - Read the sidebar state in one round trip (page_snapshot); a
+        'no contacts' page fails the attempt as empty results, which the
+        recovery ladder answers with a refresh
+       - Ensure all selected
+       - Process last action (or do_full_add_to_list), then check Apollo's
+         confirmation against the selected count (add_verification)
+      If an error occurs, recovery.policy classifies it and applies the
+      cheapest remedy that hasn't been tried for that class on this page
+      (re-find, re-switch frame, reopen sidebar, refresh), then retries.
+    2) If still failing, log to the run ledger & skip page.
+    Each phase is timed through run_metrics.span.
+    Returns True if the page was processed, False if it was logged & skipped.
+    """
+
+    forget_snapshot()
+
+    max_attempts = policy.max_attempts
+    policy.begin_page()
+
+    for attempt in range(1, max_attempts + 1):
+        try:
+            log.info(f"[Each Page] Attempt {attempt}/{max_attempts}...")
+            set_attempt(attempt)
+
+            # Switch to iframe
+            with span("switch_to_apollo_iframe"):
+                switch_to_apollo_iframe(driver)
+
+            # One round trip: toggle, last action, empty state, pager
+            with span("page_snapshot"):
+                snapshot = take_snapshot(driver, timeout=10)
+            if snapshot["empty_state"]:
+                raise EmptyResultsError("Apollo shows 'There are no contacts on this page'.")
+            if not snapshot["ready"]:
+                raise SidebarClosedError("Apollo sidebar did not render within 10s.")
+
+            # Ensure all selected
+            with span("ensure_all_selected"):
+                ensure_all_selected(driver, snapshot)
+
+            # Add to list or do full flow
+            with span("process_last_action"):
+                process_last_action(driver, snapshot, list_name, create_missing)
+            session_for(driver).mark(SAVED)
+
+            # Success => break out
+            policy.page_succeeded()
+            break
+
+        except Exception as e:
+            log.warning(f"[Each Page] Error on attempt {attempt}: {e}")
+
+            recovered = None
+            if attempt < max_attempts:
+                with span("recovery"):
+                    recovered = policy.recover(driver, e)
+                annotate(recoveries=list(policy.page_log))
+            if not recovered:
+                policy.page_failed()
+                log.warning(f"[Each Page] Failed after {attempt} attempts. Logging & skipping this page.")
+                log_not_scraped(current_url, str(e))
+                frames(driver).to_main()
+                return False
+
+    # Switch back to main doc each time
+    frames(driver).to_main()
+    return True
+
+
+def switch_to_apollo_iframe(driver):
+    """
+    Switch to the existing Apollo sidebar iframe (skipped if already inside;
+    the iframe handle is cached until the next refresh).
+    Raises an exception if not found in 20s.
+    """
+    frames(driver).to_apollo(timeout=20)
+
+
+def ensure_all_selected(driver, snapshot=None):
+    """
+    If 'Select all' is available, click it. Otherwise, do nothing.
+    Decides from `snapshot` (page_snapshot.take_snapshot) when given.
+    """
+    try:
+        if snapshot is None:
+            snapshot = take_snapshot(driver, timeout=10)
+        toggle = snapshot["toggle"]
+        if toggle is None:
+            raise NoSuchElementException("Selection toggle not found in the list header.")
+        selection_toggle = snapshot["toggle_text"]
+
+        if "Select all" in selection_toggle:
+            log.info("[Each Page] No contacts selected. Clicking 'Select all'...")
+            toggle.click()
+            pause("after_select_all")
+        else:
+            log.info(f"[Each Page] Contacts already selected (Toggle text: '{selection_toggle}').")
+        session_for(driver).mark(CONTACTS_SELECTED)
+    except Exception as e:
+        log.warning(f"Error ensuring all contacts are selected: {e}")
+
+
+def process_last_action(driver, snapshot=None, list_name=MY_DESIRED_LIST, create_missing=False):
+    """
+    Check if last action = "Add to list “list_name”" (or, for several target
+    lists, "Add to lists “A”, “B”" with exactly the same set).
+      - If yes, just click to save.
+      - Otherwise, do do_full_add_to_list.
+    Decides from `snapshot` (page_snapshot.take_snapshot) when given.
+    """
+    if snapshot is None:
+        snapshot = take_snapshot(driver, timeout=5)
+    if snapshot["last_action"] is None:
+        raise NoSuchElementException("Last action element not found in the Apollo sidebar.")
+    full_text = snapshot["last_action_text"] or ""
+
+    last_lists = snapshot["last_action_lists"] or []
+    if last_lists:
+        log.info(f"[Each Page] Last action shows list(s): {describe_lists(last_lists)}")
+
+        if set(last_lists) == set(target_lists(list_name)):
+            log.info("[Each Page] Matches desired list(s)! Clicking to save data...")
+            annotate(path=PATH_LAST_ACTION)
+            # Snapshot handle; re-found once if the sidebar re-rendered after 'Select all'
+            ctx = frames(driver)
+            ctx.remember("last_action", snapshot["last_action"])
+            expected = arm_verification(driver)
+            ctx.use("last_action", lambda el: driver.execute_script("arguments[0].click();", el), timeout=5)
+            verify_add(driver, expected, describe_lists(list_name))
+            pause("after_save")
+        else:
+            log.info(f"[Each Page] Different list(s) {describe_lists(last_lists)}. Doing full flow.")
+            do_full_add_to_list(driver, list_name, create_missing)
+    else:
+        log.warning(f"[Each Page] Could not parse the list name from '{full_text}'. Doing FULL flow.")
+        do_full_add_to_list(driver, list_name, create_missing)
+
+
+def do_full_add_to_list(driver, list_name=MY_DESIRED_LIST, create_missing=False):
+    """
+    The 'full flow' to manually add contacts to `list_name` (one name, or a
+    sequence of names that are all picked before a single Apply/Add).
+    With FULL_FLOW_MODE = "macro" the whole sequence runs in one injected
+    script first; the step-by-step flow (retried up to 3 times) is the fallback.
+    If a list isn't in the picker and `create_missing` is set, it is created
+    via list_creation.create_new_list (which also adds the selected contacts);
+    with several target lists the flow then runs again for the full set.
+    Whichever path saves, Apollo's confirmation is verified (verify_add).
+    """
+    names = target_lists(list_name)
+    described = describe_lists(names)
+    annotate(path=PATH_FULL_FLOW)
+    expected = arm_verification(driver)
+    created = []
+    with span("do_full_add_to_list"):
+        while True:
+            try:
+                _run_full_flow(driver, names)
+                verify_add(driver, expected, described)
+                pause("after_save")
+                return
+
+            except ListNotFoundError as e:
+                missing = e.list_name or names[0]
+                if not create_missing or missing in created:
+                    raise PanelNotOpenedError(str(e)) from e
+                log.info(f"[Each Page] {e} Creating it...")
+                annotate(path=PATH_CREATE_LIST)
+                # Panel is already open with the contacts selected => no refresh needed
+                if not create_new_list(driver, missing, refresh=False):
+                    raise PanelNotOpenedError(f"Could not create list '{missing}'.") from e
+                created.append(missing)
+                verify_add(driver, expected, f"'{missing}'")
+                if len(names) == 1:
+                    return
+                # The other target lists still need this page's contacts
+                expected = arm_verification(driver)
+
+
+def _run_full_flow(driver, names):
+    """Macro first (FULL_FLOW_MODE = "macro"), then the step-by-step flow."""
+    if FULL_FLOW_MODE == "macro":
+        result = run_add_to_list_macro(driver, names)
+        annotate(macro=result)
+        if result["ok"]:
+            log.info(f"[Each Page] Data saved successfully (FULL flow macro, {result['total_ms']} ms).")
+            return
+        if result["failed_list"]:
+            # The picker rendered its entries and the list isn't among them
+            missing = result["failed_list"]
+            raise ListNotFoundError(f"List '{missing}' is not in the Apollo list picker.", missing)
+        log.warning(f"[Each Page] Macro failed at step '{result['failed_step']}': {result['error']}. "
+              "Falling back to step-by-step flow...")
+    _do_full_add_to_list(driver, names)
+
+
+def _do_full_add_to_list(driver, names):
+    attempts = 3
+    for attempt in range(1, attempts + 1):
+        try:
+            find_clickable(driver, "add_to_list_label", timeout=10).click()
+            pause("after_click")
+
+            remove_buttons = find_all(driver, "remove_list_buttons")
+            for remove_button in remove_buttons:
+                driver.execute_script("arguments[0].click();", remove_button)
+                pause("after_remove")
+
+            select_lists_button = find_clickable(driver, "select_lists_button", timeout=10)
+            select_lists_button.click()
+            pause("after_click")
+
+            for name in names:
+                # value= is quoted by the registry (list names may contain apostrophes)
+                try:
+                    desired_list_elem = find_clickable(driver, "list_option", timeout=10, value=name)
+                except TimeoutException:
+                    if not _list_option_absent(driver, name):
+                        # Picker still empty or the entry not clickable yet: retried like any step
+                        raise
+                    raise ListNotFoundError(f"List '{name}' is not in the Apollo list picker.", name)
+                desired_list_elem.click()
+                pause("after_click")
+
+            apply_button = find_clickable(driver, "apply_button", timeout=10)
+            apply_button.click()
+            pause("after_click")
+
+            add_button = find_clickable(driver, "add_button", timeout=10)
+            add_button.click()
+            log.info("[Each Page] Data saved successfully (FULL flow).")
+            return
+
+        except ListNotFoundError:
+            raise
+
+        except Exception as e:
+            log.warning(f"[Each Page] Error in do_full_add_to_list attempt {attempt}/{attempts}: {e}")
+            if attempt < attempts:
+                log.info("[Each Page] Retrying do_full_add_to_list flow...")
+                pause("flow_retry")
+            else:
+                # Re-raise so handle_each_page can classify, recover or log/skip
+                if isinstance(e, StaleElementReferenceException):
+                    raise
+                raise PanelNotOpenedError(f"Add-to-list flow failed: {e}") from e
+
+
+def _list_option_absent(driver, name):
+    """
+    True only if the list picker has rendered its entries and none of them is
+    `name`. An empty picker (slow, lazily rendered or still filtering) doesn't
+    prove the list is missing, so no list gets created for it.
+    """
+    if not find_all(driver, "list_options"):
+        return False
+    return not find_all(driver, "list_option", value=name)
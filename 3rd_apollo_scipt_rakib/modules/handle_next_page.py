@@ -1,24 +1,41 @@
-# modules/handle_next_page.py
-
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
-from modules.driver_setup import human_delay
-
-def click_next_page(driver):
-    """
-    Tries to click the 'Next' button to go to the next page.
-    Returns True if successful, False otherwise.
-    """
-    try:
-        next_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.XPATH, "//button[@aria-label='Next']"))
-        )
-        next_button.click()
-        print("Clicked the NEXT button to navigate to the next page.")
-        human_delay(5, 2)
-        return True
-    except TimeoutException:
-        print("No more pages available or 'Next' is not clickable. Exiting loop.")
-        return False
+# modules/handle_next_page.py
+
+from selenium.common.exceptions import TimeoutException
+from modules.pacing import pause
+from modules.selector_registry import find_clickable
+from modules.page_snapshot import latest
+from modules.apollo_session import session_for
+from modules.frame_context import frames
+from modules.pagination import results_signature, wait_for_results_change
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+def click_next_page(driver):
+    """
+    Tries to click the 'Next' button to go to the next page.
+    Returns True if successful, False otherwise.
+    Skips the 10s wait when this page's snapshot already saw 'Next' disabled.
+    The move is confirmed by the results list changing (pagination), not a fixed sleep.
+    """
+    if latest("next_enabled") is False:
+        log.info("'Next' is disabled on this page. No more pages; exiting loop.")
+        return False
+
+    try:
+        frames(driver).to_main()  # the pager is in the LinkedIn document
+        next_button = find_clickable(driver, "next_button", timeout=10)
+        before = results_signature(driver)
+        next_button.click()
+        log.info("Clicked the NEXT button to navigate to the next page.")
+        try:
+            wait_for_results_change(driver, before, timeout=20)
+        except TimeoutException:
+            log.warning("Results did not change after 'Next' within 20s; continuing anyway.")
+        session_for(driver).results_changed()
+        # Short settle so the Apollo sidebar picks up the new page
+        pause("after_next")
+        return True
+    except TimeoutException:
+        log.warning("No more pages available or 'Next' is not clickable. Exiting loop.")
+        return False
@@ -0,0 +1,61 @@
+# modules/job_queue.py
+
+from modules.apollo_list import target_lists
+from modules.config_file import load_data_file
+
+
+def load_jobs(path):
+    """
+    Reads a job file: a list of (search URL, target Apollo list) jobs that
+    main.py --jobs runs back to back in one browser session.
+
+    JSON (or YAML, if PyYAML is installed) in either form:
+
+        [{"url": "https://www.linkedin.com/sales/search/people?...", "list": "My List"}, ...]
+        {"jobs": [...]}
+
+    "list" may also be a list of names (or use "lists"): every page is then
+    added to all of them in one Apply/Add.
+
+    Optional per job:
+      name         - label for the logs (default: "job N")
+      create_list  - create the list in Apollo if it does not exist (default: true)
+      start_page   - result page to start at (default: --start-page)
+      end_page     - stop after this result page (default: --end-page)
+
+    Returns a list of dicts with url, list (a name, or a list of names),
+    name, create_list, start_page, end_page.
+    Raises ValueError if the file is malformed.
+    """
+    data = load_data_file(path)
+
+    if isinstance(data, dict):
+        data = data.get("jobs")
+    if not isinstance(data, list) or not data:
+        raise ValueError(f"{path}: expected a non-empty list of jobs (or {{'jobs': [...]}}).")
+
+    jobs = []
+    for number, raw in enumerate(data, start=1):
+        if not isinstance(raw, dict):
+            raise ValueError(f"{path}: job {number} is not a mapping.")
+        url = str(raw.get("url") or "").strip()
+        raw_lists = raw.get("list") or raw.get("lists")
+        if raw_lists is not None and not isinstance(raw_lists, (str, list)):
+            raise ValueError(f"{path}: job {number} 'list' must be a name or a list of names.")
+        lists = target_lists(raw_lists)
+        if not url or not lists:
+            raise ValueError(f"{path}: job {number} needs both 'url' and 'list'.")
+        try:
+            start_page = int(raw["start_page"]) if raw.get("start_page") else None
+            end_page = int(raw["end_page"]) if raw.get("end_page") else None
+        except (TypeError, ValueError):
+            raise ValueError(f"{path}: job {number} has a non-numeric start_page/end_page.")
+        jobs.append({
+            "url": url,
+            "list": lists[0] if len(lists) == 1 else list(lists),
+            "name": str(raw.get("name") or f"job {number}"),
+            "create_list": bool(raw.get("create_list", True)),
+            "start_page": start_page,
+            "end_page": end_page,
+        })
+    return jobs
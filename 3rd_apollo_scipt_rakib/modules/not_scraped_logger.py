@@ -1,22 +1,17 @@
-# modules/not_scraped_logger.py
-
-import csv
-import os
-
-OUTPUT_FILE = "output.csv"
-
-
-def log_not_scraped(url, reason):
-    """
-    Appends a row to output.csv with the URL that failed and the reason.
-    """
-    file_exists = os.path.isfile(OUTPUT_FILE)
-
-    with open(OUTPUT_FILE, mode="a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        # If file didn't exist before, write a header
-        if not file_exists:
-            writer.writerow(["URL", "Reason"])
-        writer.writerow([url, reason])
-
-    print(f"Logged failed URL to {OUTPUT_FILE}: {url} (Reason: {reason})")
+# modules/not_scraped_logger.py
+
+from modules.run_metrics import annotate
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+
+def log_not_scraped(url, reason):
+    """
+    Notes why the current page failed. The reason is attached to the page's
+    metrics record, which main.py stores in the run ledger (modules/run_ledger.py)
+    together with the outcome; `python -m modules.run_ledger failed --csv output.csv`
+    exports the failed pages.
+    """
+    annotate(error=reason)
+    log.info(f"Logged failed URL to the run ledger: {url} (Reason: {reason})")
@@ -0,0 +1,168 @@
+# modules/pacing.py
+
+from modules import clock
+from modules.config_file import load_data_file
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# Time spent on each results page before moving on (seconds):
+# a random pick from range(DWELL_MIN, DWELL_MAX + 1, DWELL_STEP), never the same twice in a row
+DWELL_MIN = 16
+DWELL_MAX = 32
+DWELL_STEP = 4
+
+# Named waits between UI actions: name -> (base, var), sleeping base + random(0, var)
+ACTION_DELAYS = {
+    "after_select_all": (1, 0.5),
+    "after_click": (1, 0.5),          # label / picker / list option / Apply / Add / last action
+    "after_remove": (0.5, 0.2),       # each 'Remove' chip in the list editor
+    "after_save": (1, 0.5),           # contacts saved to the list
+    "flow_retry": (2, 1),             # before retrying the step-by-step full flow
+    "list_editor": (2, 1),            # list creation steps
+    "list_editor_remove": (1, 0.5),
+    "after_next": (1, 1),             # after the results changed, for the Apollo sidebar
+    "main_doc_prepare": (3, 2),       # try_click_apollo_main_doc (future use)
+    "main_doc_scroll": (2, 2),
+    "extension_appear": (4, 3),
+}
+
+# 0 = no cap
+MAX_PAGES_PER_HOUR = 0
+
+# Print the throughput/ETA line every this many pages
+REPORT_EVERY = 5
+
+
+class PacingPolicy:
+    """
+    Every deliberate wait in the run goes through here: the per-page dwell,
+    the small delays between UI actions, and the optional pages-per-hour cap
+    (enforced by stretching the dwell). Keeps track of how much wall time
+    went to waiting versus real work, for the throughput/ETA report.
+    Time and random picks come from modules.clock (virtual in simulations).
+    """
+
+    def __init__(self, dwell_min=DWELL_MIN, dwell_max=DWELL_MAX, dwell_step=DWELL_STEP,
+                 actions=None, max_pages_per_hour=MAX_PAGES_PER_HOUR):
+        self.dwell_choices = list(range(int(dwell_min), int(dwell_max) + 1, max(1, int(dwell_step))))
+        self.actions = dict(ACTION_DELAYS)
+        self.actions.update(actions or {})
+        self.max_pages_per_hour = max_pages_per_hour
+
+        self.started = None
+        self.waiting = 0.0          # seconds slept through this policy
+        self.pages = 0
+        self._last_dwell = None
+        self._page_started = None   # monotonic start of the current page
+
+    @classmethod
+    def from_config(cls, path):
+        """
+        Policy from a JSON/YAML file, e.g.
+            {"dwell_min": 20, "dwell_max": 40, "dwell_step": 5,
+             "max_pages_per_hour": 90, "actions": {"after_click": [1.5, 1]}}
+        Missing keys keep their defaults.
+        """
+        config = load_data_file(path) or {}
+        actions = {name: tuple(value) for name, value in (config.get("actions") or {}).items()}
+        unknown = set(actions) - set(ACTION_DELAYS)
+        if unknown:
+            raise ValueError(f"{path}: unknown pacing actions {sorted(unknown)}")
+        return cls(
+            dwell_min=config.get("dwell_min", DWELL_MIN),
+            dwell_max=config.get("dwell_max", DWELL_MAX),
+            dwell_step=config.get("dwell_step", DWELL_STEP),
+            actions=actions,
+            max_pages_per_hour=config.get("max_pages_per_hour", MAX_PAGES_PER_HOUR),
+        )
+
+    def _sleep(self, seconds):
+        if seconds <= 0:
+            return
+        if self.started is None:
+            self.started = clock.monotonic()
+        clock.sleep(seconds)
+        self.waiting += seconds
+
+    def pause(self, action):
+        """Wait the configured delay for `action` (see ACTION_DELAYS)."""
+        base, var = self.actions[action]
+        self._sleep(base + clock.rng.uniform(0, var))
+
+    def next_dwell(self):
+        """Dwell for the current page: a random choice different from the previous one."""
+        if len(self.dwell_choices) == 1:
+            return self.dwell_choices[0]
+        choice = clock.rng.choice(self.dwell_choices)
+        while choice == self._last_dwell:
+            choice = clock.rng.choice(self.dwell_choices)
+        self._last_dwell = choice
+        return choice
+
+    def dwell(self):
+        """
+        Sleep the page dwell, stretched if needed so the page takes at least
+        3600 / max_pages_per_hour seconds. Returns the seconds slept.
+        """
+        seconds = self.next_dwell()
+        if self.max_pages_per_hour and self._page_started is not None:
+            min_page_time = 3600.0 / self.max_pages_per_hour
+            spent = clock.monotonic() - self._page_started
+            seconds = max(seconds, min_page_time - spent)
+        self._sleep(seconds)
+        return seconds
+
+    def page_started(self):
+        now = clock.monotonic()
+        if self.started is None:
+            self.started = now
+        self._page_started = now
+
+    def page_finished(self):
+        self.pages += 1
+        self._page_started = None
+
+    def report(self, remaining_pages=None):
+        """One-line throughput summary: pages/hour, work vs waiting, ETA."""
+        if self.started is None or not self.pages:
+            return "[Pacing] No pages finished yet."
+        elapsed = clock.monotonic() - self.started
+        active = max(elapsed - self.waiting, 0.0)
+        per_page = elapsed / self.pages
+        pages_per_hour = 3600.0 / per_page if per_page > 0 else 0.0
+        line = (f"[Pacing] {self.pages} pages in {elapsed / 60:.1f} min, {pages_per_hour:.1f} pages/hour; "
+                f"work {active / elapsed * 100 if elapsed else 0:.0f}% / "
+                f"waiting {self.waiting / elapsed * 100 if elapsed else 0:.0f}% "
+                f"({active / self.pages:.1f}s + {self.waiting / self.pages:.1f}s per page)")
+        if remaining_pages is not None:
+            eta = remaining_pages * per_page
+            line += f"; ETA {remaining_pages} pages ~ {eta / 60:.0f} min"
+        return line
+
+
+# Shared instance; main.py replaces it from --pacing-config
+pacing = PacingPolicy()
+
+
+def pause(action):
+    pacing.pause(action)
+
+
+def dwell():
+    return pacing.dwell()
+
+
+def page_started():
+    pacing.page_started()
+
+
+def page_finished(remaining_pages=None):
+    """Count the page and print the report every REPORT_EVERY pages."""
+    pacing.page_finished()
+    if pacing.pages % REPORT_EVERY == 0:
+        log.info(pacing.report(remaining_pages))
+
+
+def print_pacing_report():
+    log.info(pacing.report())
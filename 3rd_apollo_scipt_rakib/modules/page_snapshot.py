@@ -0,0 +1,150 @@
+# modules/page_snapshot.py
+
+from selenium.common.exceptions import (
+    NoSuchFrameException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+from modules.dom_waits import LOCATOR_JS, ensure_script_timeout
+from modules.frame_context import frames
+from modules.selector_registry import SIDEBAR_READY, find_optional, locators, note_match
+
+# Logical elements read by the snapshot (see selector_registry.SELECTORS)
+SNAPSHOT_ELEMENTS = ["selection_toggle", "last_action", "empty_state", "next_button"]
+
+# Waits for the sidebar to render, then reads everything the page handlers
+# need in the same call. The pager and the 'no contacts' message live in the
+# LinkedIn document, so they are read through window.parent when the frames
+# share an origin. Otherwise the pager is null and take_snapshot looks for
+# the empty state in the main document itself (parent_readable is false).
+_SNAPSHOT_JS = LOCATOR_JS + """
+var args = arguments[0];
+var done = arguments[arguments.length - 1];
+
+function text(el) {
+    return el ? (el.innerText || el.textContent || '').trim() : null;
+}
+
+function parentDocument() {
+    try {
+        return window.parent !== window ? window.parent.document : document;
+    } catch (e) { return null; }
+}
+
+function findEmpty() {
+    var pdoc = parentDocument();
+    return (pdoc && firstMatch(args.empty_state, pdoc, false)) || firstMatch(args.empty_state, document, false);
+}
+
+function snapshot(ready) {
+    var toggle = firstMatch(args.selection_toggle, document, false);
+    var last = firstMatch(args.last_action, document, false);
+    var empty = findEmpty();
+
+    var next = null, nextEnabled = null;
+    try {
+        var pdoc = parentDocument();
+        next = pdoc && firstMatch(args.next_button, pdoc, false);
+        nextEnabled = !!(next && !next[1].disabled
+            && next[1].getAttribute('aria-disabled') !== 'true');
+    } catch (e) {}
+
+    var lastText = text(last && last[1]);
+    // 'Add to list “A”' or, after a multi-list save, 'Add to lists “A”, “B”'
+    var lists = [];
+    if (lastText && /Add to lists?/.test(lastText)) {
+        var re = /“([^”]+)”/g, m;
+        while ((m = re.exec(lastText)) !== null) lists.push(m[1].trim());
+    }
+    var toggleText = text(toggle && toggle[1]);
+
+    return {
+        ready: !!ready,
+        toggle: toggle ? toggle[1] : null,
+        toggle_text: toggleText,
+        all_selected: toggleText === null ? null : toggleText.indexOf('Select all') === -1,
+        last_action: last ? last[1] : null,
+        last_action_text: lastText,
+        last_action_list: lists.length ? lists[0] : null,
+        last_action_lists: lists,
+        empty_state: !!empty,
+        parent_readable: parentDocument() !== null,
+        next_enabled: nextEnabled,
+        matched: {
+            selection_toggle: toggle ? toggle[0] : null,
+            last_action: last ? last[0] : null,
+            empty_state: empty ? empty[0] : null,
+            next_button: next ? next[0] : null
+        }
+    };
+}
+
+waitUntil(function () {
+    return firstMatch(args.ready, document, false) || findEmpty();
+}, args.timeout_ms, function (hit) { done(snapshot(hit)); });
+"""
+
+# Last snapshot taken (cleared at the start of every page)
+_latest = {}
+
+
+def take_snapshot(driver, timeout=10):
+    """
+    One WebDriver round trip (inside the Apollo iframe) that waits for the
+    sidebar and returns its state as a dict:
+      ready             - sidebar rendered within `timeout`
+      toggle            - 'Select all' toggle element (or None)
+      toggle_text       - its text
+      all_selected      - True/False, None if the toggle is missing
+      last_action       - last-action element (or None)
+      last_action_text  - its text
+      last_action_list  - list name parsed from 'Add to list “...”' (or None)
+      last_action_lists - every name in 'Add to lists “A”, “B”' ([] if none)
+      empty_state       - the page shows 'There are no contacts on this page'
+      parent_readable   - the script could read the LinkedIn document
+      next_enabled      - pager 'Next' enabled; None if the LinkedIn page isn't readable
+    If the LinkedIn document isn't readable from the iframe (cross-origin),
+    the empty state is looked up there with WebDriver (one frame switch).
+    """
+    args = {"timeout_ms": int(timeout * 1000)}
+    index_maps = {}
+    for name in SNAPSHOT_ELEMENTS:
+        ordered = locators(name)
+        index_maps[name] = [index for index, _ in ordered]
+        args[name] = [[by, value] for _, (by, value) in ordered]
+    args["ready"] = [[by, value] for name in SIDEBAR_READY for _, (by, value) in locators(name)]
+
+    ensure_script_timeout(driver, timeout)
+    try:
+        snap = driver.execute_async_script(_SNAPSHOT_JS, args)
+    except TimeoutException as e:
+        raise TimeoutException(f"Apollo sidebar snapshot timed out after {timeout}s") from e
+    except (StaleElementReferenceException, NoSuchFrameException):
+        # Recovery classifies these by type (stale handle / wrong frame)
+        raise
+    except WebDriverException as e:
+        raise WebDriverException(f"Apollo sidebar snapshot failed: {e.msg}") from e
+
+    for name, matched in snap.pop("matched").items():
+        if matched is not None:
+            note_match(name, index_maps[name][matched])
+
+    if not snap["empty_state"] and not snap["parent_readable"]:
+        with frames(driver).main_document():
+            snap["empty_state"] = find_optional(driver, "empty_state") is not None
+
+    _latest.clear()
+    _latest.update(snap)
+    return snap
+
+
+def latest(key, default=None):
+    """Value from the most recent snapshot of the current page."""
+    return _latest.get(key, default)
+
+
+def forget_snapshot():
+    """Drop the previous page's snapshot."""
+    _latest.clear()
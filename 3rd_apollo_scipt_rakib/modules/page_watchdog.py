@@ -0,0 +1,267 @@
+# modules/page_watchdog.py
+
+import os
+import subprocess
+import threading
+import time
+
+import urllib3
+
+from modules.run_log import get_context, get_logger
+
+try:
+    import psutil  # optional: kills Chrome along with chromedriver on a session reset
+except ImportError:
+    psutil = None
+
+log = get_logger(__name__)
+
+# Bound on a single WebDriver command (HTTP read timeout to chromedriver), so
+# a hung command raises instead of blocking the run. Page loads give up a bit
+# earlier, so a stuck navigation is a normal TimeoutException.
+COMMAND_TIMEOUT = 120
+PAGE_LOAD_TIMEOUT = 90
+
+# Wall-clock budget for one page (start_page .. end_page, all attempts), 0 = off.
+# Time in UNTIMED_PHASES (the pacing dwell) doesn't count.
+PAGE_DEADLINE = 600
+
+# Budget for one run_metrics.span phase; PHASE_DEADLINES overrides it per phase (0 = off)
+DEFAULT_PHASE_DEADLINE = 180
+PHASE_DEADLINES = {
+    "process_last_action": 300,
+    "recovery": 240,
+}
+UNTIMED_PHASES = {"dwell"}
+
+# A deadline passed and the automation thread hasn't come back for this long
+# (stuck in one WebDriver call) => kill chromedriver + Chrome so the call
+# fails and the supervisor starts a new browser. 0 = never reset.
+RESET_AFTER = 60
+
+POLL_INTERVAL = 1.0
+
+
+class PageTimeoutError(Exception):
+    """A phase or page ran past its watchdog deadline."""
+
+    def __init__(self, message, phase=None, scope="phase", limit=None):
+        super().__init__(message)
+        self.phase = phase
+        self.scope = scope
+        self.limit = limit
+
+
+def set_command_timeout(driver, seconds=COMMAND_TIMEOUT, page_load=PAGE_LOAD_TIMEOUT):
+    """Bound every WebDriver command of `driver` to `seconds` and page loads to `page_load`."""
+    executor = driver.command_executor
+    config = getattr(executor, "_client_config", None)
+    if config is not None:
+        config.timeout = seconds
+    else:
+        executor.set_timeout(seconds)  # older Selenium 4: class-wide
+    if page_load:
+        driver.set_page_load_timeout(page_load)
+
+
+def command_failed(exc):
+    """True if `exc` (or its cause) is a WebDriver command that timed out or lost its connection."""
+    for cause in (exc, exc.__cause__, exc.__context__):
+        if isinstance(cause, (urllib3.exceptions.HTTPError, ConnectionError, TimeoutError)):
+            return True
+    return False
+
+
+def _kill_process_tree(process):
+    """Kill chromedriver and the Chrome processes it started."""
+    if psutil is not None:
+        try:
+            for child in psutil.Process(process.pid).children(recursive=True):
+                try:
+                    child.kill()
+                except psutil.Error:
+                    pass
+        except psutil.Error:
+            pass
+    elif os.name == "nt":
+        subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)], capture_output=True)
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+
+class PageWatchdog:
+    """
+    Deadlines for the page loop, watched from a daemon thread:
+      - per page (run_metrics.start_page .. end_page, dwell excluded) and per
+        phase (every run_metrics.span)
+      - a phase past its deadline is logged as a timeout with the phase name;
+        the next span entered inside it raises PageTimeoutError, which the
+        recovery policy handles like any other failure (refresh, retry)
+      - a page past its deadline is logged the same way, gets no further
+        recovery attempts, and the browser is recycled after it
+      - if the automation thread is stuck in one WebDriver call RESET_AFTER
+        past a deadline, chromedriver and Chrome are killed so the call fails;
+        `session_lost` makes recovery give up on the page and main.py start a
+        new browser
+    attach() also bounds each WebDriver command (set_command_timeout).
+    """
+
+    def __init__(self, page_deadline=PAGE_DEADLINE, phase_deadline=DEFAULT_PHASE_DEADLINE,
+                 phase_deadlines=None, command_timeout=COMMAND_TIMEOUT, reset_after=RESET_AFTER):
+        self.page_deadline = page_deadline
+        self.phase_deadline = phase_deadline
+        self.phase_deadlines = dict(PHASE_DEADLINES if phase_deadlines is None else phase_deadlines)
+        self.command_timeout = command_timeout
+        self.reset_after = reset_after
+
+        self.driver = None
+        self.session_lost = False
+        self.page_expired = False
+        self.recycle_reason = None  # set by a page timeout or reset, cleared by attach()
+        self.timeouts = []          # every timeout of the run
+        self.resets = 0
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._page = None           # {"started", "untimed"} while a page is open
+        self._page_timeouts = []
+        self._phases = []           # open spans: [phase, started, limit, tripped]
+        self._pending = None        # timeout not yet delivered to the automation thread
+        self._activity = time.monotonic()
+
+    def limit_for(self, phase):
+        if phase in UNTIMED_PHASES:
+            return None
+        return self.phase_deadlines.get(phase, self.phase_deadline) or None
+
+    def attach(self, driver):
+        """Watch `driver` (call for every new browser); starts the watchdog thread on first use."""
+        if self.command_timeout:
+            set_command_timeout(driver, self.command_timeout, min(PAGE_LOAD_TIMEOUT, self.command_timeout))
+        with self._lock:
+            self.driver = driver
+            self.session_lost = False
+            self.recycle_reason = None
+            self._pending = None
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="page-watchdog", daemon=True)
+            self._thread.start()
+
+    def start_page(self):
+        with self._lock:
+            self._page = {"started": time.monotonic(), "untimed": 0.0}
+            self._page_timeouts = []
+            self.page_expired = False
+
+    def end_page(self):
+        """Disarm the page deadline; returns the page's timeouts (for its metrics record)."""
+        with self._lock:
+            self._page = None
+            self._pending = None
+            timeouts, self._page_timeouts = self._page_timeouts, []
+        return timeouts
+
+    def enter(self, phase):
+        """
+        Span entry (automation thread). Raises PageTimeoutError if an
+        enclosing phase ran past its deadline.
+        """
+        with self._lock:
+            now = self._activity = time.monotonic()
+            pending = self._pending
+            if pending is not None and any(entry is pending["owner"] for entry in self._phases):
+                self._pending = None
+                raise PageTimeoutError(pending["message"], pending["phase"], pending["scope"], pending["limit"])
+            self._phases.append([phase, now, self.limit_for(phase), False])
+
+    def exit(self, phase):
+        """Span exit (automation thread). A phase that finished late has nothing left to abort."""
+        with self._lock:
+            now = self._activity = time.monotonic()
+            if not self._phases:
+                return
+            entry = self._phases.pop()
+            if self._pending is not None and self._pending["owner"] is entry:
+                self._pending = None
+            if entry[0] in UNTIMED_PHASES and self._page is not None:
+                self._page["untimed"] += now - entry[1]
+
+    def timed_out(self, exc):
+        """True if `exc` comes from a deadline, a hung command or a reset browser."""
+        return isinstance(exc, PageTimeoutError) or self.session_lost or command_failed(exc)
+
+    def _watch(self):
+        while True:
+            time.sleep(POLL_INTERVAL)
+            with self._lock:
+                now = time.monotonic()
+                self._check_deadlines(now)
+                pending = self._pending
+                reset = (pending is not None and self.reset_after and not self.session_lost
+                         and self._activity < pending["at"] and now - pending["at"] >= self.reset_after)
+                if reset:
+                    self._pending = None
+            if reset:
+                self._reset_session(pending)
+
+    def _check_deadlines(self, now):
+        for entry in reversed(self._phases):
+            phase, started, limit, tripped = entry
+            if limit and not tripped and now - started > limit:
+                entry[3] = True
+                self._trip(now, "phase", phase, limit, entry)
+                return
+
+        page = self._page
+        if page is None or not self.page_deadline or self.page_expired:
+            return
+        untimed = page["untimed"] + sum(now - e[1] for e in self._phases if e[0] in UNTIMED_PHASES)
+        if now - page["started"] - untimed > self.page_deadline:
+            self.page_expired = True
+            owner = self._phases[-1] if self._phases else None
+            self._trip(now, "page", owner[0] if owner else None, self.page_deadline, owner)
+            self.recycle_reason = f"page {get_context('page_index')} ran past its {self.page_deadline}s deadline"
+
+    def _trip(self, now, scope, phase, limit, owner):
+        record = {"scope": scope, "phase": phase, "limit": limit,
+                  "page_index": get_context("page_index"), "reset": False}
+        message = f"{scope} deadline of {limit}s passed in phase '{phase}'"
+        log.warning(f"[Watchdog] Timeout: {message} (page {record['page_index']}); aborting.")
+        self.timeouts.append(record)
+        if self._page is not None:
+            self._page_timeouts.append(record)
+        self._pending = {"owner": owner, "at": now, "message": message, "record": record,
+                         "phase": phase, "scope": scope, "limit": limit}
+
+    def _reset_session(self, pending):
+        process = getattr(getattr(self.driver, "service", None), "process", None)
+        if process is None:
+            log.error("[Watchdog] Hung WebDriver call but no chromedriver process to reset.")
+            return
+        log.error(f"[Watchdog] Still blocked {self.reset_after}s after the {pending['message']}; "
+                  f"killing chromedriver/Chrome so the run can continue in a new browser.")
+        pending["record"]["reset"] = True
+        self.resets += 1
+        self.recycle_reason = f"watchdog reset a browser hung in '{pending['phase']}'"
+        self.session_lost = True
+        _kill_process_tree(process)
+
+    def summary(self):
+        if not self.timeouts:
+            return "[Watchdog] No timeouts."
+        by_phase = {}
+        for record in self.timeouts:
+            key = f"{record['scope']}:{record['phase']}"
+            by_phase[key] = by_phase.get(key, 0) + 1
+        return (f"[Watchdog] {len(self.timeouts)} timeout(s) {by_phase}, "
+                f"{self.resets} browser session reset(s).")
+
+
+# Shared instance; run_metrics drives it, SessionSupervisor attaches every new driver
+watchdog = PageWatchdog()
+
+
+def print_watchdog_report():
+    log.info(watchdog.summary())
@@ -0,0 +1,161 @@
+# modules/pagination.py
+
+import re
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from modules.dom_waits import LOCATOR_JS, ensure_script_timeout
+from modules.apollo_session import session_for
+from modules.frame_context import frames
+from modules.selector_registry import locators
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# Sales Navigator keeps the 1-based result page in this query parameter
+PAGE_PARAM = "page"
+
+_PAGE_PARAM_RE = re.compile(r"([?&])" + PAGE_PARAM + r"=(\d+)")
+
+# Identifies the results currently rendered: first result's text + result count
+# ('empty' for the "no contacts" state). Changes when the SPA swaps in another
+# page; null while nothing is rendered yet.
+_SIGNATURE_JS = LOCATOR_JS + """
+function signature(locs) {
+    var hit = firstMatch(locs.results, document, false);
+    if (!hit) return firstMatch(locs.empty, document, false) ? 'empty' : null;
+    var first = hit[1];
+    var count = first.parentNode ? first.parentNode.children.length : 1;
+    return count + '|' + (first.innerText || first.textContent || '').trim().slice(0, 200);
+}
+"""
+
+_READ_SIGNATURE_JS = _SIGNATURE_JS + """
+return signature(arguments[0]);
+"""
+
+_WAIT_SIGNATURE_CHANGE_JS = _SIGNATURE_JS + """
+var args = arguments[0];
+var done = arguments[arguments.length - 1];
+waitUntil(function () {
+    var now = signature(args.locators);
+    return now !== null && now !== args.before ? now : null;
+}, args.timeout_ms, function (now) { done(now || null); });
+"""
+
+_READ_PAGER_JS = LOCATOR_JS + """
+var hit = firstMatch(arguments[0], document, false);
+return hit ? (hit[1].innerText || hit[1].textContent || '') : null;
+"""
+
+
+def page_from_url(url):
+    """The page number in a Sales Navigator URL, or None if it has no page parameter."""
+    match = _PAGE_PARAM_RE.search(url or "")
+    return int(match.group(2)) if match else None
+
+
+def url_for_page(url, page):
+    """
+    `url` pointing at result page `page`. Only the page parameter is touched;
+    the (already encoded) search query is kept byte for byte.
+    """
+    if _PAGE_PARAM_RE.search(url):
+        return _PAGE_PARAM_RE.sub(lambda m: f"{m.group(1)}{PAGE_PARAM}={page}", url, count=1)
+    base, hash_sep, fragment = url.partition("#")
+    separator = "&" if "?" in base else "?"
+    return f"{base}{separator}{PAGE_PARAM}={page}{hash_sep}{fragment}"
+
+
+def _script_locators(name):
+    return [[by, value] for _, (by, value) in locators(name)]
+
+
+def _results_locators():
+    return {"results": _script_locators("search_results"), "empty": _script_locators("empty_state")}
+
+
+def current_page(driver):
+    """
+    Current result page: from the URL when it has a page parameter, otherwise
+    from the pager's active page number. None if neither is readable.
+    """
+    page = page_from_url(driver.current_url)
+    if page is not None:
+        return page
+    frames(driver).to_main()
+    try:
+        text = driver.execute_script(_READ_PAGER_JS, _script_locators("pager_current"))
+    except WebDriverException:
+        return None
+    match = re.search(r"\d+", text or "")
+    return int(match.group(0)) if match else None
+
+
+def last_page(driver):
+    """
+    Total number of result pages as shown by the pager (its last page button).
+    None if the pager isn't rendered or readable.
+    """
+    frames(driver).to_main()
+    try:
+        text = driver.execute_script(_READ_PAGER_JS, _script_locators("pager_last"))
+    except WebDriverException:
+        return None
+    numbers = re.findall(r"\d+", (text or "").replace(",", ""))
+    return int(numbers[-1]) if numbers else None
+
+
+def results_signature(driver):
+    """Signature of the rendered results list (None if no results are shown)."""
+    frames(driver).to_main()
+    try:
+        return driver.execute_script(_READ_SIGNATURE_JS, _results_locators())
+    except WebDriverException:
+        return None
+
+
+def wait_for_results_change(driver, before, timeout=20):
+    """
+    Waits (DOM mutations, no polling) until results (or the empty state) are
+    rendered and their signature differs from `before`. Returns the new signature.
+    Raises TimeoutException if the list doesn't change within `timeout`.
+    """
+    frames(driver).to_main()
+    ensure_script_timeout(driver, timeout)
+    args = {
+        "locators": _results_locators(),
+        "before": before,
+        "timeout_ms": int(timeout * 1000),
+    }
+    now = driver.execute_async_script(_WAIT_SIGNATURE_CHANGE_JS, args)
+    if now is None:
+        raise TimeoutException(f"Search results did not change within {timeout}s")
+    return now
+
+
+def goto_page(driver, page, timeout=20):
+    """
+    Jumps straight to result page `page` by rewriting the URL's page parameter
+    (one navigation) and confirms it by watching the results list change.
+    The reload closes the Apollo sidebar; callers reopen it (handle_first_page).
+    Returns True if the pager/URL now show `page`.
+    """
+    ctx = frames(driver)
+    ctx.to_main()
+    target = url_for_page(driver.current_url, page)
+    before = results_signature(driver)
+    log.info(f"[Pagination] Jumping to page {page}...")
+    driver.get(target)
+    session_for(driver).loaded()
+    try:
+        wait_for_results_change(driver, before, timeout)
+    except TimeoutException as e:
+        log.info(f"[Pagination] {e}")
+        return False
+
+    landed = current_page(driver)
+    if landed != page:
+        log.warning(f"[Pagination] Asked for page {page} but landed on page {landed}.")
+        return False
+    return True
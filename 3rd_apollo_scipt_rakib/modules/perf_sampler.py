@@ -0,0 +1,206 @@
+# modules/perf_sampler.py
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from modules.frame_context import frames
+from modules.run_metrics import annotate
+from modules.run_log import get_logger
+
+try:
+    import psutil  # optional: enables the renderer memory readings
+except ImportError:
+    psutil = None
+
+log = get_logger(__name__)
+
+# Flag a page when it grows the tab by at least this much since the previous sample
+HEAP_JUMP_MB = 50
+NODE_JUMP = 5000
+
+# Performance.getMetrics name -> sample key. Gauges are stored as read; the
+# *Duration counters are cumulative seconds, so the sample keeps the per-page delta.
+_GAUGES = {
+    "JSHeapUsedSize": "js_heap_mb",
+    "JSHeapTotalSize": "js_heap_total_mb",
+    "Nodes": "nodes",
+    "Documents": "documents",
+    "Frames": "frames",
+    "JSEventListeners": "js_listeners",
+}
+_DURATIONS = {
+    "LayoutDuration": "layout_s",
+    "RecalcStyleDuration": "style_s",
+    "ScriptDuration": "script_s",
+    "TaskDuration": "task_s",
+}
+
+_COUNT_NODES_JS = "return document.getElementsByTagName('*').length;"
+
+
+def read_performance_metrics(driver):
+    """CDP Performance.getMetrics as {name: value}, or None if unavailable."""
+    if not getattr(driver, "_perf_domain_enabled", False):
+        try:
+            driver.execute_cdp_cmd("Performance.enable", {})
+        except Exception as e:
+            log.warning(f"[Perf] CDP Performance domain unavailable: {e}")
+            return None
+        driver._perf_domain_enabled = True
+    try:
+        result = driver.execute_cdp_cmd("Performance.getMetrics", {})
+    except Exception:
+        return None
+    return {m["name"]: m["value"] for m in result.get("metrics", []) if "name" in m}
+
+
+def renderer_rss_mb(driver):
+    """
+    Largest Chrome renderer RSS (MB) under this chromedriver, split into
+    {"page": ..., "extension": ...} (the Apollo sidebar runs in an extension
+    renderer). None without psutil or when the processes can't be read.
+    """
+    if psutil is None:
+        return None
+    try:
+        root = psutil.Process(driver.service.process.pid)
+        largest = {"page": 0, "extension": 0}
+        for proc in root.children(recursive=True):
+            try:
+                cmdline = " ".join(proc.cmdline())
+                if "--type=renderer" not in cmdline:
+                    continue
+                kind = "extension" if "--extension-process" in cmdline else "page"
+                largest[kind] = max(largest[kind], proc.memory_info().rss)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+    except Exception:
+        return None
+    if not any(largest.values()):
+        return None
+    return {kind: round(rss / (1024 * 1024), 1) for kind, rss in largest.items()}
+
+
+def _dom_node_counts(driver):
+    """Element counts of the LinkedIn document and the Apollo iframe document."""
+    ctx = frames(driver)
+    counts = {"linkedin_nodes": None, "apollo_nodes": None}
+    try:
+        with ctx.main_document():
+            counts["linkedin_nodes"] = driver.execute_script(_COUNT_NODES_JS)
+        with ctx.apollo(timeout=1):
+            counts["apollo_nodes"] = driver.execute_script(_COUNT_NODES_JS)
+    except (TimeoutException, WebDriverException):
+        pass
+    return counts
+
+
+class PerfSampler:
+    """
+    Samples the tab after each page: JS heap, DOM nodes, listeners and the
+    layout/style/script time spent since the previous sample (CDP
+    Performance.getMetrics), per-document element counts for LinkedIn vs the
+    Apollo iframe, and renderer RSS. The sample is attached to the page's
+    metrics record as "perf"; pages that grow the heap or node count by more
+    than the jump thresholds are flagged there and logged.
+    """
+
+    def __init__(self, heap_jump_mb=HEAP_JUMP_MB, node_jump=NODE_JUMP):
+        self.enabled = False
+        self.heap_jump_mb = heap_jump_mb
+        self.node_jump = node_jump
+        self.first = None
+        self.previous = None
+        self._previous_durations = {}
+        self.samples = 0
+        self.flagged = []            # (url, flags)
+        self.peak = {}               # sample key -> max value seen
+
+    def sample(self, driver):
+        """Take one sample. Returns the sample dict (empty if nothing was readable)."""
+        sample = {}
+        raw = read_performance_metrics(driver)
+        if raw:
+            for name, key in _GAUGES.items():
+                if name in raw:
+                    value = raw[name]
+                    sample[key] = round(value / (1024 * 1024), 1) if key.endswith("_mb") else int(value)
+            for name, key in _DURATIONS.items():
+                if name in raw:
+                    before = self._previous_durations.get(name, 0.0)
+                    # Counters restart with a new browser (recycle): treat as a fresh start
+                    sample[key] = round(raw[name] - before if raw[name] >= before else raw[name], 3)
+                    self._previous_durations[name] = raw[name]
+
+        sample.update({k: v for k, v in _dom_node_counts(driver).items() if v is not None})
+        rss = renderer_rss_mb(driver)
+        if rss:
+            sample["renderer_rss_mb"] = rss
+        return sample
+
+    def jumps(self, sample):
+        """Flags for growth since the previous sample that crosses a threshold."""
+        if self.previous is None:
+            return []
+        flags = []
+        heap_delta = sample.get("js_heap_mb", 0) - self.previous.get("js_heap_mb", 0)
+        if "js_heap_mb" in sample and "js_heap_mb" in self.previous and heap_delta >= self.heap_jump_mb:
+            flags.append(f"js_heap +{heap_delta:.0f} MB")
+        for key in ("nodes", "linkedin_nodes", "apollo_nodes"):
+            if key in sample and key in self.previous:
+                delta = sample[key] - self.previous[key]
+                if delta >= self.node_jump:
+                    flags.append(f"{key} +{delta}")
+        return flags
+
+    def sample_page(self, driver, url=None):
+        """Sample after a page, annotate the metrics record and flag jumps. No-op when disabled."""
+        if not self.enabled:
+            return None
+        sample = self.sample(driver)
+        if not sample:
+            return None
+
+        flags = self.jumps(sample)
+        if flags:
+            sample["flags"] = flags
+            self.flagged.append((url, flags))
+            log.warning(f"[Perf] Tab grew on this page: {', '.join(flags)}")
+        annotate(perf=sample)
+
+        self.samples += 1
+        if self.first is None:
+            self.first = sample
+        self.previous = sample
+        for key, value in sample.items():
+            if isinstance(value, (int, float)):
+                self.peak[key] = max(self.peak.get(key, value), value)
+        return sample
+
+    def summary(self):
+        """Printable first -> last / peak growth summary."""
+        if not self.samples:
+            return "[Perf] No samples taken."
+        lines = [f"[Perf] {self.samples} samples, {len(self.flagged)} page(s) flagged:"]
+        for key in ("js_heap_mb", "nodes", "linkedin_nodes", "apollo_nodes", "js_listeners", "documents"):
+            if key in self.first and key in self.previous:
+                lines.append(f"  {key:<16}{self.first[key]:>10} -> {self.previous[key]:<10}"
+                             f"peak {self.peak.get(key)}")
+        rss = self.previous.get("renderer_rss_mb")
+        if rss:
+            lines.append(f"  renderer RSS (last): page {rss['page']} MB, extension {rss['extension']} MB")
+        for url, flags in self.flagged[-5:]:
+            lines.append(f"  flagged: {url} ({', '.join(flags)})")
+        return "\n".join(lines)
+
+
+# Shared instance; main.py enables it with --perf-sample
+sampler = PerfSampler()
+
+
+def sample_page(driver, url=None):
+    return sampler.sample_page(driver, url)
+
+
+def print_perf_summary():
+    if sampler.enabled:
+        log.info(sampler.summary())
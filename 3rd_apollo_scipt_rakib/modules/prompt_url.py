@@ -1,8 +1,8 @@
-# modules/prompt_url.py
-
-def get_base_url():
-    """
-    Prompt the user for the LinkedIn Sales Navigator URL (starting page).
-    """
-    base_url = input("Enter the LinkedIn Sales Navigator URL (starting page):\n")
-    return base_url
+# modules/prompt_url.py
+
+def get_base_url():
+    """
+    Prompt the user for the LinkedIn Sales Navigator URL (starting page).
+    """
+    base_url = input("Enter the LinkedIn Sales Navigator URL (starting page):\n")
+    return base_url
@@ -0,0 +1,239 @@
+# modules/recovery.py
+
+from selenium.common.exceptions import NoSuchFrameException, StaleElementReferenceException
+
+from modules import clock
+from modules.add_verification import AddNotConfirmedError, AddUnconfirmedError
+from modules.apollo_session import (
+    FRAME_UNREACHABLE,
+    NOT_LOADED,
+    PAGE_LOADED,
+    SIDEBAR_CLOSED as SIDEBAR_CLOSED_STATE,
+    session_for,
+)
+from modules.frame_context import frames
+from modules.page_watchdog import PageTimeoutError, command_failed, watchdog
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# Failure classes
+STALE_ELEMENT = "stale_element"
+WRONG_FRAME = "wrong_frame"
+SIDEBAR_CLOSED = "sidebar_closed"
+PANEL_NOT_OPENED = "panel_not_opened"
+EMPTY_RESULTS = "empty_results"
+PAGE_NOT_LOADED = "page_not_loaded"
+ADD_NOT_CONFIRMED = "add_not_confirmed"
+ADD_UNCONFIRMED = "add_unconfirmed"  # no Apollo message at all (with REQUIRE_CONFIRMATION)
+TIMEOUT = "timeout"                # a phase deadline or a single WebDriver command timed out
+SESSION_LOST = "session_lost"      # the watchdog killed a hung browser
+UNKNOWN = "unknown"
+
+# Remedies, cheapest first
+REFIND = "refind"                  # drop cached handles, retry as-is
+RESWITCH = "reswitch"              # back to main doc, re-locate + re-enter the iframe
+REOPEN_SIDEBAR = "reopen_sidebar"  # click the Apollo opener again
+REFRESH = "refresh"                # reload the page, wait for the iframe, reopen Apollo
+
+# Escalation ladder per failure class: the n-th failure of a class on the
+# same page uses the n-th remedy (the last one repeats).
+LADDERS = {
+    STALE_ELEMENT: [REFIND, RESWITCH, REOPEN_SIDEBAR, REFRESH],
+    WRONG_FRAME: [RESWITCH, REOPEN_SIDEBAR, REFRESH],
+    SIDEBAR_CLOSED: [REOPEN_SIDEBAR, REFRESH],
+    PANEL_NOT_OPENED: [REFIND, REOPEN_SIDEBAR, REFRESH],
+    EMPTY_RESULTS: [REFRESH],
+    PAGE_NOT_LOADED: [REFRESH],
+    ADD_NOT_CONFIRMED: [REFIND, REOPEN_SIDEBAR, REFRESH],
+    ADD_UNCONFIRMED: [REOPEN_SIDEBAR, REFRESH],
+    TIMEOUT: [REFRESH],
+    SESSION_LOST: [REFRESH],
+    UNKNOWN: [RESWITCH, REOPEN_SIDEBAR, REFRESH],
+}
+
+# Max recoveries per failure class on one page before giving up on the page
+CLASS_BUDGETS = {
+    EMPTY_RESULTS: 2,
+    PAGE_NOT_LOADED: 2,
+    ADD_NOT_CONFIRMED: 2,
+    ADD_UNCONFIRMED: 1,
+    TIMEOUT: 1,
+    SESSION_LOST: 0,   # nothing to recover in a dead browser; main.py recycles it
+}
+
+MAX_ATTEMPTS = 4       # attempts per page (first try + recoveries)
+BACKOFF_BASE = 0.5     # seconds before the 2nd attempt, doubled each time
+BACKOFF_MAX = 8.0
+
+
+class EmptyResultsError(Exception):
+    """Apollo/LinkedIn shows 'There are no contacts on this page'."""
+
+
+class SidebarClosedError(Exception):
+    """The Apollo iframe is there but the contact panel is not rendered."""
+
+
+class PanelNotOpenedError(Exception):
+    """A step of the add-to-list panel (label, picker, Apply/Add) never became clickable."""
+
+
+def classify(driver, exc):
+    """
+    Sort a failure into one of the classes above. Exception types decide
+    where they are unambiguous; otherwise the session probes the page.
+    """
+    causes = [exc, exc.__cause__]
+    if watchdog.session_lost:
+        return SESSION_LOST
+    if any(isinstance(c, PageTimeoutError) for c in causes) or command_failed(exc):
+        # Checked before probing: a hung browser would hang the probe too
+        return TIMEOUT
+    if any(isinstance(c, EmptyResultsError) for c in causes):
+        return EMPTY_RESULTS
+    if any(isinstance(c, AddUnconfirmedError) for c in causes):
+        return ADD_UNCONFIRMED
+    if any(isinstance(c, AddNotConfirmedError) for c in causes):
+        return ADD_NOT_CONFIRMED
+    if any(isinstance(c, StaleElementReferenceException) for c in causes):
+        return STALE_ELEMENT
+    if any(isinstance(c, NoSuchFrameException) for c in causes):
+        return WRONG_FRAME
+
+    observed = session_for(driver).probe()
+    if observed in (NOT_LOADED, PAGE_LOADED):
+        return PAGE_NOT_LOADED
+    if observed == FRAME_UNREACHABLE:
+        return WRONG_FRAME
+    if observed == SIDEBAR_CLOSED_STATE or isinstance(exc, SidebarClosedError):
+        return SIDEBAR_CLOSED
+    if isinstance(exc, PanelNotOpenedError):
+        return PANEL_NOT_OPENED
+    return UNKNOWN
+
+
+def apply_remedy(driver, remedy):
+    """
+    Run one remedy through the page's ApolloSession, which skips whatever
+    is already in place (e.g. no opener click on an open sidebar).
+    Leaves the driver in the main document.
+    """
+    ctx = frames(driver)
+    session = session_for(driver)
+    if remedy == REFIND:
+        ctx.forget_elements()
+        ctx.to_main()
+    elif remedy == RESWITCH:
+        driver.switch_to.default_content()
+        ctx.invalidate()
+    elif remedy == REOPEN_SIDEBAR:
+        if not session.open_sidebar():
+            raise SidebarClosedError("Could not reopen the Apollo sidebar.")
+    elif remedy == REFRESH:
+        session.refresh()
+        if not session.open_sidebar():
+            log.warning("[Recovery] Apollo sidebar did not reopen after refresh.")
+    else:
+        raise ValueError(f"Unknown remedy: {remedy}")
+
+
+class RecoveryPolicy:
+    """
+    Escalating, per-class recovery for the page handlers:
+
+        policy.begin_page()
+        for attempt in range(1, policy.max_attempts + 1):
+            try:
+                ...work...
+                policy.page_succeeded()
+                break
+            except Exception as e:
+                if attempt == policy.max_attempts or not policy.recover(driver, e):
+                    ...log & skip...
+
+    Keeps run-wide stats of which remedy fixed which failure class.
+    `apply` runs a remedy (default apply_remedy; a simulation passes its own).
+    """
+
+    def __init__(self, max_attempts=MAX_ATTEMPTS, backoff_base=BACKOFF_BASE,
+                 backoff_max=BACKOFF_MAX, ladders=None, budgets=None, apply=None):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.ladders = ladders or LADDERS
+        self.budgets = budgets if budgets is not None else CLASS_BUDGETS
+        self.apply = apply or apply_remedy
+        self.stats = {}        # (failure class, remedy) -> {"fixed": n, "failed": n}
+        self.page_log = []     # [{"failure", "remedy", "error"}] for the current page
+        self._counts = {}      # failure class -> recoveries on this page
+        self._pending = None   # (failure class, remedy) awaiting the next attempt's outcome
+
+    def begin_page(self):
+        self.page_log = []
+        self._counts = {}
+        self._pending = None
+
+    def recover(self, driver, exc):
+        """
+        Classify `exc`, wait the backoff, apply the next remedy on the ladder.
+        Returns (failure class, remedy), or None if the class budget is used up
+        or the page is past its watchdog deadline (the caller should give up
+        on the page).
+        """
+        self._settle(fixed=False)
+        failure = classify(driver, exc)
+        if failure == SESSION_LOST:
+            frames(driver).invalidate()  # no frame to switch back from in a killed browser
+        if watchdog.page_expired:
+            log.warning(f"[Recovery] {failure}: page deadline passed, no further attempts on this page.")
+            return None
+        used = self._counts.get(failure, 0)
+        budget = self.budgets.get(failure)
+        if budget is not None and used >= budget:
+            log.warning(f"[Recovery] '{failure}' budget ({budget}) used up on this page.")
+            return None
+        self._counts[failure] = used + 1
+
+        ladder = self.ladders.get(failure, self.ladders[UNKNOWN])
+        remedy = ladder[min(used, len(ladder) - 1)]
+        delay = min(self.backoff_base * (2 ** (len(self.page_log))), self.backoff_max)
+        log.info(f"[Recovery] {failure} -> {remedy} (after {delay:.1f}s backoff)")
+        self.page_log.append({"failure": failure, "remedy": remedy, "error": str(exc)[:200]})
+        clock.sleep(delay)
+
+        try:
+            self.apply(driver, remedy)
+        except Exception as e:
+            log.warning(f"[Recovery] Remedy '{remedy}' raised: {e}")
+        self._pending = (failure, remedy)
+        return failure, remedy
+
+    def page_succeeded(self):
+        self._settle(fixed=True)
+
+    def page_failed(self):
+        self._settle(fixed=False)
+
+    def summary(self):
+        if not self.stats:
+            return "[Recovery] No recoveries needed."
+        lines = ["[Recovery] Remedy outcomes (failure class -> remedy: fixed/failed):"]
+        for (failure, remedy), counts in sorted(self.stats.items()):
+            lines.append(f"  {failure:<18} -> {remedy:<15} {counts['fixed']}/{counts['failed']}")
+        return "\n".join(lines)
+
+    def _settle(self, fixed):
+        if self._pending is None:
+            return
+        counts = self.stats.setdefault(self._pending, {"fixed": 0, "failed": 0})
+        counts["fixed" if fixed else "failed"] += 1
+        self._pending = None
+
+
+# Shared instance used by the page handlers and main.py
+policy = RecoveryPolicy()
+
+
+def print_recovery_stats():
+    log.info(policy.summary())
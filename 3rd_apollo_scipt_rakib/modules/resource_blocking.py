@@ -0,0 +1,176 @@
+# modules/resource_blocking.py
+
+import json
+
+from modules.config_file import load_data_file
+from modules.run_metrics import annotate
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# Network.setBlockedURLs patterns ('*' wildcard), used with --block-resources
+# default (blocking is off unless asked for). Nothing here touches the
+# results list (text), LinkedIn's own scripts/XHR or apollo.io; the Apollo
+# sidebar runs in a chrome-extension:// frame this tab's block-list never sees.
+DEFAULT_BLOCKED_URLS = [
+    # Avatars, company logos, banners
+    "*media.licdn.com/dms/image/*",
+    "*media-exp*.licdn.com/*",
+    # Images, fonts, media: the path ends in the extension, with or without a
+    # query string ('*.png*' would also hit API URLs with '.png' in a parameter)
+    *[pattern
+      for ext in ("jpg", "jpeg", "png", "gif", "webp", "avif",
+                  "woff", "woff2", "ttf", "otf",
+                  "mp4", "webm", "m3u8", "mp3")
+      for pattern in (f"*.{ext}", f"*.{ext}?*")],
+    # Ads / analytics / trackers
+    "*px.ads.linkedin.com/*",
+    "*snap.licdn.com/*",
+    "*linkedin.com/li/track*",
+    "*linkedin.com/realtime/*",
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+    "*doubleclick.net/*",
+    "*bat.bing.com/*",
+    "*connect.facebook.net/*",
+]
+
+# Typical transfer size per resource type, used to estimate what a blocked
+# request would have cost (blocked requests never report a size)
+ESTIMATED_BYTES = {
+    "Image": 25_000,
+    "Font": 45_000,
+    "Media": 400_000,
+    "Script": 60_000,
+    "Ping": 500,
+    "XHR": 2_000,
+    "Fetch": 2_000,
+    "Other": 5_000,
+}
+
+# chromedriver performance log: network events only
+LOGGING_PREFS = {"performance": "ALL"}
+PERF_LOGGING_PREFS = {"enableNetwork": True, "enablePage": False}
+
+
+def load_block_list(source="default"):
+    """
+    Patterns for `source`: "default", "off"/"none", or a JSON/YAML file like
+        {"use_defaults": true, "block": ["*.svg", "*.svg?*"], "allow": ["*.gif", "*.gif?*"]}
+    where "allow" drops patterns from the defaults (exact match).
+    """
+    if source in (None, "", "off", "none"):
+        return []
+    if source == "default":
+        return list(DEFAULT_BLOCKED_URLS)
+
+    config = load_data_file(source) or {}
+    unknown = set(config) - {"use_defaults", "block", "allow"}
+    if unknown:
+        raise ValueError(f"{source}: unknown resource blocking keys {sorted(unknown)}")
+    patterns = list(DEFAULT_BLOCKED_URLS) if config.get("use_defaults", True) else []
+    allowed = set(config.get("allow") or [])
+    patterns = [p for p in patterns if p not in allowed]
+    patterns += [p for p in config.get("block") or [] if p not in patterns]
+    return patterns
+
+
+def enable_network_log(chrome_options):
+    """Turn on chromedriver's network performance log (read by BlockingReport)."""
+    chrome_options.set_capability("goog:loggingPrefs", LOGGING_PREFS)
+    chrome_options.add_experimental_option("perfLoggingPrefs", PERF_LOGGING_PREFS)
+
+
+def apply_block_list(driver, patterns):
+    """Install `patterns` on the tab via CDP. Returns True if the block-list is active."""
+    if not patterns:
+        return False
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    except Exception as e:
+        log.warning(f"[Blocking] Could not install the block-list (loading everything): {e}")
+        return False
+    log.info(f"[Blocking] Blocking {len(patterns)} URL patterns (images, fonts, media, trackers).")
+    return True
+
+
+class BlockingReport:
+    """
+    Tallies the network log: requests blocked by the block-list (by resource
+    type, with an estimate of the bytes they would have cost) and the
+    requests/bytes actually loaded. collect() drains the log after each page,
+    which also keeps chromedriver's log buffer from growing.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.blocked = {}            # resource type -> count
+        self.loaded_requests = 0
+        self.loaded_bytes = 0
+        self._types = {}             # requestId -> resource type (current page only)
+
+    def _read_log(self, driver):
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return []
+        events = []
+        for entry in entries:
+            try:
+                events.append(json.loads(entry["message"])["message"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return events
+
+    def collect(self, driver):
+        """Drain the network log; annotate the page record with its share. No-op when disabled."""
+        if not self.enabled:
+            return None
+        page = {"blocked": 0, "loaded": 0, "loaded_bytes": 0, "saved_bytes_est": 0}
+        for event in self._read_log(driver):
+            method, params = event.get("method"), event.get("params", {})
+            if method == "Network.requestWillBeSent":
+                self._types[params.get("requestId")] = params.get("type", "Other")
+            elif method == "Network.loadingFailed" and params.get("blockedReason"):
+                kind = params.get("type") or self._types.get(params.get("requestId"), "Other")
+                self.blocked[kind] = self.blocked.get(kind, 0) + 1
+                page["blocked"] += 1
+                page["saved_bytes_est"] += ESTIMATED_BYTES.get(kind, ESTIMATED_BYTES["Other"])
+            elif method == "Network.loadingFinished":
+                page["loaded"] += 1
+                page["loaded_bytes"] += int(params.get("encodedDataLength") or 0)
+        self._types.clear()
+
+        self.loaded_requests += page["loaded"]
+        self.loaded_bytes += page["loaded_bytes"]
+        annotate(network=page)
+        return page
+
+    def saved_bytes(self):
+        return sum(ESTIMATED_BYTES.get(kind, ESTIMATED_BYTES["Other"]) * n for kind, n in self.blocked.items())
+
+    def summary(self):
+        blocked = sum(self.blocked.values())
+        if not blocked and not self.loaded_requests:
+            return "[Blocking] No network activity recorded."
+        by_type = ", ".join(f"{kind} {n}" for kind, n in sorted(self.blocked.items(), key=lambda kv: -kv[1]))
+        saved = self.saved_bytes()
+        total = saved + self.loaded_bytes
+        share = saved / total * 100 if total else 0.0
+        return (f"[Blocking] {blocked} requests blocked ({by_type or 'none'}), "
+                f"~{saved / 1_048_576:.1f} MB saved (estimate, ~{share:.0f}% of page weight); "
+                f"{self.loaded_requests} requests / {self.loaded_bytes / 1_048_576:.1f} MB loaded.")
+
+
+# Shared instance; get_driver enables it when a block-list is installed
+report = BlockingReport()
+
+
+def collect(driver):
+    return report.collect(driver)
+
+
+def print_blocking_report():
+    if report.enabled:
+        log.info(report.summary())
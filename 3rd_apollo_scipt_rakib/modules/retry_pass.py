@@ -0,0 +1,70 @@
+# modules/retry_pass.py
+
+from modules.apollo_list import list_key
+from modules.apollo_session import session_for
+from modules.frame_context import frames
+from modules.handle_each_page import handle_each_page
+from modules.page_watchdog import watchdog
+from modules.run_ledger import LEGACY_FAILURE_CSV, ledger
+from modules.run_metrics import end_page, span, start_page
+from modules import pacing
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+
+def retry_failed_pages(driver, list_name):
+    """
+    Deferred retry pass over the pages that failed for `list_name` (one
+    name or a multi-list set, see apollo_list.list_key) in the
+    run ledger (the old output.csv failure log is imported on first use).
+    Reuses the current browser session: for every pending page
+    (oldest failure first) it navigates to the URL it was last visited at
+    (the ledger keys pages by normalize_url), reopens the Apollo sidebar
+    and runs handle_each_page. Every attempt is recorded in the ledger, so
+    pages that succeed are done and pages that keep failing are dropped
+    after run_ledger.MAX_PAGE_FAILURES.
+    Pages are spaced by the pacing policy's dwell.
+    Returns (retried, recovered).
+    """
+    key = list_key(list_name)
+    imported = ledger.import_failure_csv(LEGACY_FAILURE_CSV, key)
+    if imported:
+        log.info(f"[Retry] Imported {imported} failed page(s) from {LEGACY_FAILURE_CSV} into the run ledger.")
+    urls = ledger.pending_retries(key)
+    if not urls:
+        log.info("[Retry] No failed pages to retry.")
+        return 0, 0
+
+    log.info(f"[Retry] Retrying {len(urls)} failed page(s)...")
+    recovered = 0
+    ctx = frames(driver)
+    for number, url in enumerate(urls, start=1):
+        if number > 1:
+            with span("dwell"):
+                pacing.dwell()
+
+        log.info(f"[Retry] ({number}/{len(urls)}) {url}")
+        start_page(url)
+        pacing.page_started()
+
+        with span("navigate"):
+            ctx.to_main()
+            driver.get(url)
+            session = session_for(driver)
+            session.loaded()
+            # Full page loads close the sidebar; a failure here is left to the recovery ladder
+            if not session.open_sidebar():
+                log.warning("[Retry] Apollo sidebar did not open; handle_each_page will recover.")
+
+        processed = handle_each_page(driver, url, list_name)
+        if processed:
+            recovered += 1
+        ledger.record_page(end_page("ok" if processed else "skipped"), key, retry=True)
+        pacing.page_finished(remaining_pages=len(urls) - number)
+        if watchdog.session_lost:
+            log.warning("[Retry] The watchdog reset a hung browser; the remaining pages stay in the ledger.")
+            return number, recovered
+
+    log.info(f"[Retry] Recovered {recovered}/{len(urls)} page(s).")
+    return len(urls), recovered
@@ -0,0 +1,391 @@
+# modules/run_ledger.py
+"""
+SQLite ledger of every page outcome, across runs.
+
+Query it from the project folder:
+    python -m modules.run_ledger runs
+    python -m modules.run_ledger run 12
+    python -m modules.run_ledger failed --list "My List" --csv output.csv
+    python -m modules.run_ledger import-csv --csv output.csv --list "My List"
+"""
+
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, parse_qsl, quote, urlencode, urlsplit, urlunsplit
+
+from modules.apollo_list import MY_DESIRED_LIST
+
+LEDGER_FILE = "run_ledger.sqlite3"
+
+# Records are committed in batches of this size (and on flush/close)
+COMMIT_EVERY = 10
+
+# A page that has failed this many times (without ever succeeding) is no
+# longer picked up by the retry pass
+MAX_PAGE_FAILURES = 3
+
+# Failure log written before the ledger existed (URL, Reason rows); the
+# retry pass imports it once per list (import_failure_csv)
+LEGACY_FAILURE_CSV = "output.csv"
+
+# Query parameters that differ between visits of the same results page
+VOLATILE_PARAMS = {"sessionId", "viewAllFilters", "_ntb", "trk", "lipi"}
+# Per-visit search-history id inside Sales Navigator's `query` parameter
+_RECENT_SEARCH_RE = re.compile(r"recentSearchParam:\([^()]*\),?")
+
+# PRAGMA user_version once stored URLs are normalized
+_URLS_NORMALIZED = 1
+
+# Page paths
+PATH_LAST_ACTION = "last_action"   # one click on "Add to list “X”"
+PATH_FULL_FLOW = "full_flow"       # label -> remove -> picker -> Apply -> Add
+PATH_CREATE_LIST = "create_list"   # list missing from the picker, created via "Create new list"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    started_at  TEXT NOT NULL,
+    finished_at TEXT,
+    base_url    TEXT,
+    list_name   TEXT,
+    mode        TEXT
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id          INTEGER PRIMARY KEY,
+    run_id      INTEGER REFERENCES runs(id),
+    url         TEXT NOT NULL,
+    page_index  INTEGER,
+    list_name   TEXT,
+    outcome     TEXT NOT NULL,
+    path        TEXT,
+    attempts    INTEGER,
+    duration    REAL,
+    error       TEXT,
+    retry       INTEGER NOT NULL DEFAULT 0,
+    recorded_at TEXT NOT NULL,
+    verification TEXT,
+    expected_contacts  INTEGER,
+    confirmed_contacts INTEGER,
+    visited_url TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_pages_url_list ON pages(url, list_name);
+CREATE INDEX IF NOT EXISTS idx_pages_list_outcome ON pages(list_name, outcome);
+CREATE INDEX IF NOT EXISTS idx_pages_run ON pages(run_id);
+"""
+
+# Columns added after the first release: (name, type), applied to older ledgers
+_ADDED_PAGE_COLUMNS = [
+    ("verification", "TEXT"),
+    ("expected_contacts", "INTEGER"),
+    ("confirmed_contacts", "INTEGER"),
+    ("visited_url", "TEXT"),
+]
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def normalize_url(url):
+    """
+    The ledger key of a results page: `url` without VOLATILE_PARAMS (e.g. the
+    per-session sessionId) and the recentSearchParam inside `query`, the
+    remaining parameters sorted. Every insert and lookup goes through it, so
+    a page matches across sessions.
+    """
+    if not url:
+        return url
+    parts = urlsplit(url)
+    params = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        if key in VOLATILE_PARAMS:
+            continue
+        if key == "query":
+            value = _RECENT_SEARCH_RE.sub("", value)
+        params.append((key, value))
+    query = urlencode(sorted(params), quote_via=quote, safe="()")
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+class RunLedger:
+    """
+    One long-lived WAL-mode connection, opened on first use. Page records are
+    committed every COMMIT_EVERY rows; flush()/close() commit the rest
+    (main.py registers close() with atexit).
+    """
+
+    def __init__(self, path=LEDGER_FILE, commit_every=COMMIT_EVERY):
+        self.path = path
+        self.commit_every = commit_every
+        self.run_id = None
+        self._conn = None
+        self._uncommitted = 0
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+        return self._conn
+
+    def _migrate(self):
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(pages)")}
+        for name, kind in _ADDED_PAGE_COLUMNS:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE pages ADD COLUMN {name} {kind}")
+
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < _URLS_NORMALIZED:
+            # Rows from before normalize_url: re-key them so old failures and completions still match
+            self._conn.create_function("normalize_url", 1, normalize_url)
+            self._conn.execute("UPDATE pages SET visited_url = url, url = normalize_url(url)")
+            self._conn.execute(f"PRAGMA user_version = {_URLS_NORMALIZED}")
+            self._conn.commit()
+
+    def start_run(self, base_url, list_name, mode="search"):
+        """Opens a run row; later page records are tied to it. Returns the run id."""
+        cur = self.conn.execute(
+            "INSERT INTO runs (started_at, base_url, list_name, mode) VALUES (?, ?, ?, ?)",
+            (_now(), base_url, list_name, mode),
+        )
+        self.run_id = cur.lastrowid
+        self.flush()
+        return self.run_id
+
+    def finish_run(self):
+        if self.run_id is not None:
+            self.conn.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (_now(), self.run_id))
+        self.flush()
+
+    def record_page(self, record, list_name, page_index=None, retry=False):
+        """
+        Stores one finished page. `record` is the dict returned by
+        run_metrics.end_page (url, outcome, attempts, duration and the
+        `path` / `error` / `verification` annotations). The page is keyed by
+        normalize_url(url); the URL as visited is kept for the retry pass.
+        """
+        if record is None:
+            return
+        verification = record.get("verification") or {}
+        self.conn.execute(
+            "INSERT INTO pages (run_id, url, page_index, list_name, outcome, path, attempts,"
+            " duration, error, retry, recorded_at, verification, expected_contacts, confirmed_contacts,"
+            " visited_url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, normalize_url(record["url"]), page_index, list_name, record["outcome"],
+             record.get("path"), record.get("attempts"), record.get("duration"),
+             record.get("error"), int(retry), _now(), verification.get("status"),
+             verification.get("expected"), verification.get("confirmed"), record["url"]),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.flush()
+
+    def is_done(self, url, list_name):
+        """True if `url` was already completed for `list_name` in any run."""
+        row = self.conn.execute(
+            "SELECT 1 FROM pages WHERE url = ? AND list_name = ? AND outcome = 'ok' LIMIT 1",
+            (normalize_url(url), list_name),
+        ).fetchone()
+        return row is not None
+
+    def pending_retries(self, list_name, max_failures=MAX_PAGE_FAILURES):
+        """
+        Pages that failed for `list_name`, never succeeded and have failed fewer
+        than `max_failures` times; oldest failure first. Returns the URL each
+        was last visited at (the normalized key only for rows that predate
+        visited_url), since normalize_url drops parameters a navigation may need.
+        """
+        rows = self.conn.execute(
+            "SELECT COALESCE((SELECT visited_url FROM pages p2 WHERE p2.url = pages.url"
+            "  AND p2.list_name = pages.list_name AND p2.visited_url IS NOT NULL"
+            "  ORDER BY p2.id DESC LIMIT 1), url) AS visited"
+            " FROM pages WHERE list_name = ? GROUP BY url"
+            " HAVING SUM(outcome = 'ok') = 0 AND SUM(outcome = 'skipped') BETWEEN 1 AND ?"
+            " ORDER BY MIN(recorded_at)",
+            (list_name, max_failures - 1),
+        ).fetchall()
+        return [row["visited"] for row in rows]
+
+    def import_failure_csv(self, path, list_name):
+        """
+        One-time import of the old CSV failure log (URL, Reason rows) as
+        failed pages for `list_name` under a run with mode 'import', so the
+        retry pass picks them up. Rows that aren't search result pages (e.g.
+        a login redirect) are left out. Does nothing if the file is missing or was
+        already imported for that list. Returns the number of pages imported.
+        """
+        source = os.path.abspath(path)
+        if not os.path.exists(source):
+            return 0
+        if self.conn.execute(
+            "SELECT 1 FROM runs WHERE mode = 'import' AND base_url = ? AND list_name = ? LIMIT 1",
+            (source, list_name),
+        ).fetchone():
+            return 0
+
+        with open(source, newline="", encoding="utf-8") as f:
+            rows = [row for row in csv.DictReader(f) if (row.get("URL") or "").strip()]
+        now = _now()
+        run_id = self.conn.execute(
+            "INSERT INTO runs (started_at, finished_at, base_url, list_name, mode) VALUES (?, ?, ?, ?, 'import')",
+            (now, now, source, list_name),
+        ).lastrowid
+        imported = set()
+        for row in rows:
+            visited = row["URL"].strip()
+            url = normalize_url(visited)
+            if url in imported or "/search/" not in urlsplit(url).path:
+                continue
+            imported.add(url)
+            page = parse_qs(urlsplit(url).query).get("page", [None])[0]
+            self.conn.execute(
+                "INSERT INTO pages (run_id, url, page_index, list_name, outcome, error, recorded_at,"
+                " visited_url) VALUES (?, ?, ?, ?, 'skipped', ?, ?, ?)",
+                (run_id, url, int(page) if page and page.isdigit() else None, list_name,
+                 (row.get("Reason") or "").strip()[:500] or None, now, visited),
+            )
+        self.flush()
+        return len(imported)
+
+    def failed_pages(self, list_name=None):
+        """Per-URL failure rows (never succeeded), for reports and the CSV export."""
+        query = (
+            "SELECT url, list_name, SUM(outcome = 'skipped') AS failures,"
+            " MIN(recorded_at) AS first_failed, MAX(recorded_at) AS last_failed,"
+            " (SELECT error FROM pages p2 WHERE p2.url = pages.url AND p2.list_name IS pages.list_name"
+            "  AND p2.error IS NOT NULL ORDER BY p2.id DESC LIMIT 1) AS last_error"
+            " FROM pages {where} GROUP BY url, list_name"
+            " HAVING SUM(outcome = 'ok') = 0 AND SUM(outcome = 'skipped') > 0"
+            " ORDER BY first_failed"
+        )
+        if list_name is None:
+            return self.conn.execute(query.format(where="")).fetchall()
+        return self.conn.execute(query.format(where="WHERE list_name = ?"), (list_name,)).fetchall()
+
+    def runs(self, limit=20):
+        return self.conn.execute(
+            "SELECT r.*, COUNT(p.id) AS pages, SUM(p.outcome = 'ok') AS ok,"
+            " SUM(p.outcome = 'skipped') AS skipped, SUM(p.verification = 'unconfirmed') AS unconfirmed"
+            " FROM runs r"
+            " LEFT JOIN pages p ON p.run_id = r.id GROUP BY r.id ORDER BY r.id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+
+    def run_stats(self, run_id):
+        """Outcome/path counts, attempts and durations for one run."""
+        return self.conn.execute(
+            "SELECT outcome, path, COUNT(*) AS pages, SUM(attempts - 1) AS retries,"
+            " AVG(duration) AS avg_duration, MAX(duration) AS max_duration"
+            " FROM pages WHERE run_id = ? GROUP BY outcome, path ORDER BY pages DESC",
+            (run_id,),
+        ).fetchall()
+
+    def verification_stats(self, run_id):
+        """Per verification status: pages, contacts selected and contacts Apollo confirmed."""
+        return self.conn.execute(
+            "SELECT verification, COUNT(*) AS pages, SUM(expected_contacts) AS expected,"
+            " SUM(confirmed_contacts) AS confirmed FROM pages"
+            " WHERE run_id = ? AND verification IS NOT NULL GROUP BY verification ORDER BY pages DESC",
+            (run_id,),
+        ).fetchall()
+
+    def flush(self):
+        if self._conn is not None:
+            self._conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+
+# Shared instance used by main.py and the retry pass
+ledger = RunLedger()
+
+
+def close_ledger():
+    ledger.close()
+
+
+def _print_runs(db):
+    print(f"{'run':>5}  {'started':<26}{'mode':<8}{'pages':>7}{'ok':>6}{'skipped':>9}{'unconf.':>9}  list")
+    for row in db.runs():
+        print(f"{row['id']:>5}  {row['started_at']:<26}{row['mode'] or '':<8}{row['pages']:>7}"
+              f"{row['ok'] or 0:>6}{row['skipped'] or 0:>9}{row['unconfirmed'] or 0:>9}  {row['list_name']}")
+
+
+def _print_run(db, run_id):
+    print(f"Run {run_id}:")
+    print(f"  {'outcome':<12}{'path':<14}{'pages':>7}{'retries':>9}{'avg s':>9}{'max s':>9}")
+    for row in db.run_stats(run_id):
+        print(f"  {row['outcome']:<12}{row['path'] or '-':<14}{row['pages']:>7}{row['retries'] or 0:>9}"
+              f"{row['avg_duration'] or 0:>9.1f}{row['max_duration'] or 0:>9.1f}")
+    rows = db.verification_stats(run_id)
+    if rows:
+        print(f"  {'verified':<26}{'pages':>7}{'selected':>10}{'confirmed':>11}")
+        for row in rows:
+            print(f"  {row['verification']:<26}{row['pages']:>7}{row['expected'] or 0:>10}"
+                  f"{row['confirmed'] or 0:>11}")
+
+
+def _print_failed(db, list_name, csv_path):
+    rows = db.failed_pages(list_name)
+    if csv_path:
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["URL", "List", "Failures", "First Failed", "Last Failed", "Last Error"])
+            for row in rows:
+                writer.writerow([row["url"], row["list_name"], row["failures"],
+                                 row["first_failed"], row["last_failed"], row["last_error"]])
+        print(f"Wrote {len(rows)} failed page(s) to {csv_path}")
+        return
+    for row in rows:
+        print(f"{row['failures']:>3}x  {row['last_failed']}  {row['url']}\n       {row['last_error']}")
+    print(f"{len(rows)} failed page(s)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the run ledger.")
+    parser.add_argument("--db", default=LEDGER_FILE, help=f"Ledger file (default: {LEDGER_FILE}).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("runs", help="List recent runs with page counts.")
+    run_cmd = commands.add_parser("run", help="Outcome/path breakdown for one run.")
+    run_cmd.add_argument("run_id", type=int)
+    failed_cmd = commands.add_parser("failed", help="Pages that failed and never succeeded.")
+    failed_cmd.add_argument("--list", dest="list_name", default=None, help="Only this Apollo list.")
+    failed_cmd.add_argument("--csv", default=None, help="Write them to this CSV file instead.")
+    import_cmd = commands.add_parser("import-csv", help="Import the old CSV failure log as failed pages.")
+    import_cmd.add_argument("--csv", default=LEGACY_FAILURE_CSV,
+                            help=f"Failure log with URL,Reason rows (default: {LEGACY_FAILURE_CSV}).")
+    import_cmd.add_argument("--list", dest="list_name", default=MY_DESIRED_LIST,
+                            help="Apollo list (or 'A | B' multi-list key) the pages failed for.")
+    args = parser.parse_args(argv)
+
+    db = RunLedger(args.db)
+    try:
+        if args.command == "runs":
+            _print_runs(db)
+        elif args.command == "run":
+            _print_run(db, args.run_id)
+        elif args.command == "import-csv":
+            count = db.import_failure_csv(args.csv, args.list_name)
+            print(f"Imported {count} failed page(s) from {args.csv} for {args.list_name!r}"
+                  if count else f"Nothing imported (missing, empty or already imported): {args.csv}")
+        else:
+            _print_failed(db, args.list_name, args.csv)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+# modules/run_log.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+LOG_DIR = "logs"
+LOG_FILE = "run.jsonl"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUPS = 5
+
+CONSOLE_LEVEL = "INFO"
+FILE_LEVEL = "DEBUG"
+
+# Parent of every module logger (get_logger(__name__) -> "apollo.modules.x")
+ROOT_LOGGER = "apollo"
+
+# Stamped on every record when it is created (in the automation thread)
+_context = {"run_id": None, "page_index": None, "phase": None}
+_started = time.monotonic()
+_listener = None
+
+
+def get_logger(name):
+    """Logger for a module: get_logger(__name__)."""
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def set_context(**fields):
+    """Update run_id / page_index / phase (or any extra field) for the following records."""
+    _context.update(fields)
+
+
+def get_context(key):
+    return _context.get(key)
+
+
+class _ContextFilter(logging.Filter):
+    def filter(self, record):
+        for key, value in _context.items():
+            setattr(record, key, value)
+        record.elapsed = round(time.monotonic() - _started, 3)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message + run context."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "elapsed": getattr(record, "elapsed", None),
+        }
+        for key in _context:
+            entry[key] = getattr(record, key, None)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(log_dir=LOG_DIR, console_level=CONSOLE_LEVEL, file_level=FILE_LEVEL,
+                  max_bytes=LOG_MAX_BYTES, backups=LOG_BACKUPS):
+    """
+    Routes every module logger through a QueueHandler, so logging never
+    blocks the automation thread on a slow console or pipe. A background
+    QueueListener writes human-readable lines to the console (at
+    `console_level`) and JSON lines to size-rotated files in `log_dir`
+    (at `file_level`; no files when log_dir is None).
+    Returns the run id stamped on every record.
+    """
+    global _listener, _started
+    if _listener is not None:
+        return _context["run_id"]
+
+    _started = time.monotonic()
+    _context["run_id"] = uuid.uuid4().hex[:12]
+
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(message)s", "%H:%M:%S"))
+    handlers = [console]
+
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+        rotating = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, LOG_FILE), maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        rotating.setLevel(file_level)
+        rotating.setFormatter(JsonFormatter())
+        handlers.append(rotating)
+
+    log_queue = queue.Queue(-1)  # unbounded: put() never blocks
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter())
+
+    root = logging.getLogger(ROOT_LOGGER)
+    root.handlers[:] = [queue_handler]
+    root.setLevel(min(logging.getLevelName(console_level), logging.getLevelName(file_level)))
+    root.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Registered first, so it runs after the other atexit reports have logged
+    atexit.register(stop_logging)
+    return _context["run_id"]
+
+
+def stop_logging():
+    """Flush the queue and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
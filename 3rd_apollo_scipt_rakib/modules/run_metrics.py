@@ -0,0 +1,181 @@
+# modules/run_metrics.py
+
+import json
+import math
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from modules import clock
+from modules.page_watchdog import watchdog
+from modules.run_log import get_context, get_logger, set_context
+
+log = get_logger(__name__)
+
+# One JSON record per processed page is appended here
+METRICS_FILE = "metrics.jsonl"
+
+
+class RunMetrics:
+    """
+    Collects named timing spans for the current page and appends one JSONL
+    record per page to METRICS_FILE. Keeps everything in memory as well so
+    a latency summary can be printed at the end of the run.
+    Pages and spans also arm the page watchdog's deadlines.
+    """
+
+    def __init__(self, path=METRICS_FILE):
+        self.path = path
+        self.run_started = None
+        self.pages = []          # finished page records
+        self.current = None      # page record being filled
+        self.attempt = 1
+
+    def start_page(self, url):
+        """Begin a new page record (closes a dangling one as 'aborted')."""
+        if self.current is not None:
+            self.end_page("aborted")
+        now = clock.monotonic()
+        if self.run_started is None:
+            self.run_started = now
+        self.attempt = 1
+        self.current = {
+            "url": url,
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "phases": [],
+            "_t0": now,
+        }
+        watchdog.start_page()
+
+    def set_attempt(self, attempt):
+        """Mark subsequent spans as belonging to retry `attempt` (1-based)."""
+        self.attempt = attempt
+
+    def annotate(self, **fields):
+        """Attach extra fields (e.g. macro step timings) to the current page record."""
+        if self.current is not None:
+            self.current.update(fields)
+
+    @contextmanager
+    def span(self, phase):
+        """
+        Times the wrapped block as `phase`. Exceptions are recorded as the
+        span outcome and re-raised unchanged. Raises PageTimeoutError before
+        the block runs if an enclosing phase is past its watchdog deadline.
+        """
+        watchdog.enter(phase)
+        t0 = clock.monotonic()
+        outcome = "ok"
+        outer_phase = get_context("phase")
+        set_context(phase=phase)
+        try:
+            yield
+        except BaseException as e:
+            outcome = f"error: {type(e).__name__}"
+            raise
+        finally:
+            watchdog.exit(phase)
+            set_context(phase=outer_phase)
+            if self.current is not None:
+                self.current["phases"].append({
+                    "phase": phase,
+                    "attempt": self.attempt,
+                    "outcome": outcome,
+                    "duration": round(clock.monotonic() - t0, 3),
+                })
+
+    def end_page(self, outcome):
+        """Finish the current page record, append it to the JSONL file and return it."""
+        if self.current is None:
+            return None
+        record = self.current
+        self.current = None
+        record["attempts"] = max([p["attempt"] for p in record["phases"]] or [1])
+        record["outcome"] = outcome
+        record["duration"] = round(clock.monotonic() - record.pop("_t0"), 3)
+        timeouts = watchdog.end_page()
+        if timeouts:
+            record["timeouts"] = timeouts
+        self.pages.append(record)
+
+        try:
+            with open(self.path, mode="a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        except OSError as e:
+            log.warning(f"[Metrics] Could not write {self.path}: {e}")
+        return record
+
+    def summary(self):
+        """Returns a printable p50/p95/max per phase + retry and throughput summary."""
+        if self.current is not None:
+            self.end_page("aborted")
+        if not self.pages:
+            return "[Metrics] No pages recorded."
+
+        by_phase = {}
+        for page in self.pages:
+            for p in page["phases"]:
+                by_phase.setdefault(p["phase"], []).append(p["duration"])
+
+        lines = ["[Metrics] Phase latency (seconds):",
+                 f"  {'phase':<30}{'n':>6}{'p50':>9}{'p95':>9}{'max':>9}{'total':>10}"]
+        for phase, durations in by_phase.items():
+            durations.sort()
+            lines.append(
+                f"  {phase:<30}{len(durations):>6}"
+                f"{percentile(durations, 50):>9.2f}{percentile(durations, 95):>9.2f}"
+                f"{durations[-1]:>9.2f}{sum(durations):>10.1f}"
+            )
+
+        retries = sum(page["attempts"] - 1 for page in self.pages)
+        retried_pages = sum(1 for page in self.pages if page["attempts"] > 1)
+        retry_time = sum(
+            p["duration"] for page in self.pages for p in page["phases"] if p["attempt"] > 1
+        )
+        outcomes = {}
+        for page in self.pages:
+            outcomes[page["outcome"]] = outcomes.get(page["outcome"], 0) + 1
+
+        elapsed = clock.monotonic() - self.run_started
+        pages_per_hour = len(self.pages) / elapsed * 3600 if elapsed > 0 else 0.0
+
+        lines.append(f"[Metrics] Pages: {len(self.pages)} {outcomes}")
+        lines.append(f"[Metrics] Retries: {retries} on {retried_pages} page(s), "
+                     f"{retry_time:.1f}s spent in retry attempts")
+        lines.append(f"[Metrics] Throughput: {pages_per_hour:.1f} pages/hour "
+                     f"over {elapsed / 60:.1f} min")
+        return "\n".join(lines)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+# Shared instance used by the page handlers and main.py
+metrics = RunMetrics()
+
+
+def start_page(url):
+    metrics.start_page(url)
+
+
+def set_attempt(attempt):
+    metrics.set_attempt(attempt)
+
+
+def span(phase):
+    return metrics.span(phase)
+
+
+def annotate(**fields):
+    metrics.annotate(**fields)
+
+
+def end_page(outcome):
+    return metrics.end_page(outcome)
+
+
+def print_summary():
+    log.info(metrics.summary())
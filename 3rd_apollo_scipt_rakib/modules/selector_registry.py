@@ -0,0 +1,281 @@
+# modules/selector_registry.py
+
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException
+
+from modules.dom_waits import wait_for_any, RECOVERY_CEILING
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# Every logical element the automation touches, with candidate locators in
+# order of preference. The first entry is the current Apollo/LinkedIn build;
+# later entries are looser fallbacks for when hashed class names change.
+# `{value}` is replaced by a correctly quoted literal (see locators()).
+SELECTORS = {
+    # --- LinkedIn page (main document) ---
+    "apollo_iframe": [
+        (By.ID, "linkedin-sidebar-iframe"),
+        (By.CSS_SELECTOR, "iframe[id*='sidebar-iframe']"),
+    ],
+    "empty_state": [
+        (By.XPATH, "//*[contains(text(), 'There are no contacts on this page')]"),
+    ],
+    "next_button": [
+        (By.XPATH, "//button[@aria-label='Next']"),
+        (By.CSS_SELECTOR, "button.artdeco-pagination__button--next"),
+    ],
+    "pager_current": [
+        (By.CSS_SELECTOR, "li.artdeco-pagination__indicator--number.active"),
+        (By.CSS_SELECTOR, ".artdeco-pagination [aria-current='true']"),
+    ],
+    # Highest page the search has: the pager's last page button, or its
+    # "Page 3 of 40" state text (the last number is the total)
+    "pager_last": [
+        (By.CSS_SELECTOR, "ul.artdeco-pagination__pages > li.artdeco-pagination__indicator--number:last-child"),
+        (By.CSS_SELECTOR, ".artdeco-pagination__page-state"),
+    ],
+    "search_results": [
+        (By.CSS_SELECTOR, "ol.artdeco-list > li.artdeco-list__item"),
+        (By.CSS_SELECTOR, "[data-x-search-result='LEAD']"),
+    ],
+
+    # --- Apollo sidebar (inside 'linkedin-sidebar-iframe') ---
+    "apollo_opener": [
+        (By.CSS_SELECTOR,
+         "#LinkedinOverlay > div > div > div:nth-child(6) "
+         "> div.x_SrTzk.x_pnPas.zp-9-2-0-zp-fixed > div.x_Q33Is.apollo-opener-icon"),
+        (By.CSS_SELECTOR, "#LinkedinOverlay div.apollo-opener-icon"),
+        (By.CSS_SELECTOR, "[class*='apollo-opener']"),
+    ],
+    "list_header": [
+        (By.CSS_SELECTOR, "div.x_FsSHV.list-header"),
+        (By.CSS_SELECTOR, "div.list-header"),
+    ],
+    "selection_toggle": [
+        (By.CSS_SELECTOR, "div.x_FsSHV.list-header .x_ZYlnk"),
+        (By.CSS_SELECTOR, "div.list-header .x_ZYlnk"),
+        (By.XPATH, "//div[contains(@class, 'list-header')]"
+                   "//*[normalize-space(text())='Select all' or normalize-space(text())='Clear selection']"),
+    ],
+    # selected_count and action_toast are ASSUMPTIONS, not taken from a live
+    # Apollo build: '.x_selCount' and '.apollo-toast' only exist in the bench
+    # fixture (bench/fixtures/sidebar.html); the fallbacks are the generic
+    # "N selected" text and ARIA live regions. Until they are checked against
+    # a live Apollo build in DevTools, an 'unconfirmed' page is only logged
+    # (add_verification), never a ledger failure or a retry.
+    "selected_count": [
+        (By.CSS_SELECTOR, "div.x_FsSHV.list-header .x_selCount"),
+        (By.XPATH, "//div[contains(@class, 'list-header')]//*[contains(text(), 'selected')]"),
+        (By.CSS_SELECTOR, "div.list-header"),
+    ],
+    "action_toast": [
+        (By.CSS_SELECTOR, ".apollo-toast"),
+        (By.CSS_SELECTOR, "[role='status']"),
+        (By.CSS_SELECTOR, "[role='alert']"),
+    ],
+    "last_action": [
+        (By.CSS_SELECTOR, "div.x_xCUI9"),
+        (By.XPATH, "//div[not(.//div) and starts-with(normalize-space(.), 'Add to list')]"),
+    ],
+    "add_to_list_label": [
+        (By.XPATH, "//div[@class='x_S1bDQ']//label[@class='x_mPXlR']"),
+        (By.XPATH, "//div[contains(@class, 'x_S1bDQ')]//label[contains(@class, 'x_mPXlR')]"),
+        (By.XPATH, "//label[normalize-space()='Add to list']"),
+    ],
+    "remove_list_buttons": [
+        (By.XPATH, "//button[contains(@aria-label, 'Remove')]"),
+    ],
+    "select_lists_button": [
+        (By.XPATH, "//div[@class='x_pr73O']/span[@class='x_cnXw0']"),
+        (By.XPATH, "//div[contains(@class, 'x_pr73O')]/span[contains(@class, 'x_cnXw0')]"),
+    ],
+    "list_option": [
+        (By.XPATH, "//div[@data-value={value}]"),
+        (By.CSS_SELECTOR, "[data-value={value}]"),
+    ],
+    # Any entry of the open list picker: tells a missing list from a slow picker
+    "list_options": [
+        (By.CSS_SELECTOR, "[data-value]"),
+    ],
+    "apply_button": [
+        (By.XPATH, "//button[span[contains(text(), 'Apply')]]"),
+        (By.XPATH, "//button[normalize-space()='Apply']"),
+    ],
+    "add_button": [
+        (By.XPATH, "//button[span[contains(text(), 'Add')]]"),
+        (By.XPATH, "//button[normalize-space()='Add']"),
+    ],
+    "create_list_button": [
+        (By.XPATH, "//button[contains(@class,'x_qe0Li') and contains(., 'Create new list')]"),
+        (By.XPATH, "//button[contains(., 'Create new list')]"),
+    ],
+    "list_name_input": [
+        (By.XPATH, "//div[@class='x_dJ2fA' and @data-input-box-main]//input[@placeholder='List name']"),
+        (By.CSS_SELECTOR, "input[placeholder='List name']"),
+    ],
+    "create_list_submit": [
+        (By.XPATH, "//button[@type='submit' and contains(., 'Create list & add')]"),
+        (By.XPATH, "//button[contains(., 'Create list')]"),
+    ],
+}
+
+# Anything that proves the Apollo sidebar has rendered its contact panel
+SIDEBAR_READY = ["list_header", "last_action", "add_to_list_label"]
+
+# Session memory: logical name -> index of the candidate that matched last
+_last_good = {}
+# (logical name, candidate index) -> {"hits": n, "misses": n}
+_stats = {}
+
+
+def xpath_literal(value):
+    """Quote `value` for XPath 1.0, including names with both ' and \" in them."""
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    parts = value.split("'")
+    return "concat(" + ", \"'\", ".join(f"'{part}'" for part in parts) + ")"
+
+
+def css_literal(value):
+    """Quote `value` as a CSS string."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def locators(name, value=None):
+    """
+    Ordered candidates for `name` as [(candidate_index, (by, selector)), ...],
+    with the last candidate that matched in this session moved to the front.
+    """
+    candidates = list(enumerate(SELECTORS[name]))
+    if value is not None:
+        candidates = [
+            (index, (by, sel.replace(
+                "{value}", xpath_literal(value) if by == By.XPATH else css_literal(value))))
+            for index, (by, sel) in candidates
+        ]
+    good = _last_good.get(name)
+    if good is not None and good != candidates[0][0]:
+        candidates.sort(key=lambda item: item[0] != good)
+    return candidates
+
+
+def find(driver, name, timeout=10, visible=False, value=None):
+    """
+    Waits (in the current frame) for the first candidate of `name` to match,
+    trying all candidates in one DOM-observer wait so an outdated first
+    choice costs nothing extra. Returns the element; raises TimeoutException.
+    """
+    return find_first(driver, [name], timeout, visible, value)[1]
+
+
+def find_clickable(driver, name, timeout=10, value=None):
+    """find() that also requires the element to be visible and enabled."""
+    return find(driver, name, timeout, visible=True, value=value)
+
+
+def find_first(driver, names, timeout=10, visible=False, value=None):
+    """
+    Waits for whichever of several logical elements shows up first.
+    Returns (name, element).
+    """
+    flat = [(name, index, loc) for name in names for index, loc in locators(name, value)]
+    try:
+        matched, element = wait_for_any(driver, [loc for _, _, loc in flat], timeout, visible)
+    except TimeoutException:
+        for name, index, _ in flat:
+            _record(name, index, hit=False)
+        raise TimeoutException(f"No candidate for {', '.join(names)} matched within {timeout}s")
+
+    name, index, _ = flat[matched]
+    for other_name, other_index, _ in flat[:matched]:
+        if other_name == name:
+            _record(other_name, other_index, hit=False)
+    _record(name, index, hit=True)
+    _last_good[name] = index
+    return name, element
+
+
+def find_all(driver, name, value=None):
+    """
+    All elements for the first candidate of `name` that matches anything right now
+    (no waiting). Returns [] if none match.
+    """
+    for index, (by, selector) in locators(name, value):
+        elements = driver.find_elements(by, selector)
+        if elements:
+            _record(name, index, hit=True)
+            _last_good[name] = index
+            return elements
+        _record(name, index, hit=False)
+    return []
+
+
+def find_optional(driver, name, value=None):
+    """First element for `name` if present right now, else None."""
+    elements = find_all(driver, name, value)
+    return elements[0] if elements else None
+
+
+def wait_for_apollo_iframe(driver, timeout=RECOVERY_CEILING):
+    """
+    Waits (in the main document) for the Apollo 'linkedin-sidebar-iframe'.
+    Replaces the fixed 10s sleep after a refresh.
+    """
+    return find(driver, "apollo_iframe", timeout)
+
+
+def wait_for_sidebar_ready(driver, timeout=15):
+    """
+    Waits (inside the Apollo iframe) for the list header or the action buttons,
+    whichever renders first. Returns the matched element.
+    """
+    return find_first(driver, SIDEBAR_READY, timeout)[1]
+
+
+def note_match(name, index, hit=True):
+    """
+    Record the outcome of an in-page lookup done outside find() (e.g. a
+    snapshot script). `index` is the candidate index from locators().
+    """
+    _record(name, index, hit)
+    if hit:
+        _last_good[name] = index
+
+
+def selector_stats():
+    """
+    Per-locator hit/miss counts as
+    {name: [{"locator": "...", "hits": n, "misses": n, "last_good": bool}, ...]}.
+    """
+    report = {}
+    for (name, index), counts in sorted(_stats.items()):
+        by, selector = SELECTORS[name][index]
+        report.setdefault(name, []).append({
+            "locator": f"{by}={selector}",
+            "hits": counts["hits"],
+            "misses": counts["misses"],
+            "last_good": _last_good.get(name) == index,
+        })
+    return report
+
+
+def print_selector_stats():
+    """Print hit/miss stats; flags elements whose first-choice selector no longer matches."""
+    report = selector_stats()
+    if not report:
+        return
+    log.info("[Selectors] Locator hit/miss stats:")
+    for name, rows in report.items():
+        for row in rows:
+            marker = "*" if row["last_good"] else " "
+            log.info(f"  {marker} {name:<22} hits={row['hits']:<5} misses={row['misses']:<5} {row['locator'][:70]}")
+        if _last_good.get(name, 0) != 0:
+            log.warning(f"  ! {name}: first-choice selector is outdated; fallback #{_last_good[name]} is in use.")
+
+
+def _record(name, index, hit):
+    counts = _stats.setdefault((name, index), {"hits": 0, "misses": 0})
+    counts["hits" if hit else "misses"] += 1
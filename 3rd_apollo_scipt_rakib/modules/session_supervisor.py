@@ -0,0 +1,126 @@
+# modules/session_supervisor.py
+
+import time
+
+from modules.driver_setup import LEAN_JS_HEAP_MB, timed_get
+from modules.apollo_session import session_for
+from modules.handle_first_page import handle_first_page
+from modules.page_watchdog import watchdog
+from modules.perf_sampler import read_performance_metrics, renderer_rss_mb
+from modules.run_log import get_logger
+
+log = get_logger(__name__)
+
+# Defaults for the recycle triggers (0 disables a trigger). The heap
+# threshold sits at 2/3 of the lean profile's V8 cap so the recycle
+# happens well before the renderer would hit out-of-memory.
+RECYCLE_AFTER_PAGES = 200
+RECYCLE_HEAP_MB = LEAN_JS_HEAP_MB * 2 // 3
+RECYCLE_RSS_MB = 2048
+RECYCLE_AFTER_FAILURES = 3
+
+
+class SessionSupervisor:
+    """
+    Owns the Chrome session for a long run and rebuilds it when it gets heavy.
+    A recycle is triggered by:
+      - `max_pages` pages processed by the current driver
+      - the tab's JS heap (CDP Performance.getMetrics) above `max_heap_mb`
+      - the largest renderer process RSS above `max_rss_mb` (needs psutil)
+      - `max_failures` handle_each_page failures in a row
+      - the page watchdog: a page past its deadline, or a browser it killed
+    After a rebuild it reloads the current page and reopens Apollo.
+    """
+
+    def __init__(self, driver_factory,
+                 max_pages=RECYCLE_AFTER_PAGES,
+                 max_heap_mb=RECYCLE_HEAP_MB,
+                 max_rss_mb=RECYCLE_RSS_MB,
+                 max_failures=RECYCLE_AFTER_FAILURES):
+        self.driver_factory = driver_factory
+        self.max_pages = max_pages
+        self.max_heap_mb = max_heap_mb
+        self.max_rss_mb = max_rss_mb
+        self.max_failures = max_failures
+
+        self.driver = None
+        self.pages_on_driver = 0
+        self.consecutive_failures = 0
+        self.recycles = []
+
+    def start(self):
+        """Create the first driver."""
+        self.driver = self.driver_factory()
+        watchdog.attach(self.driver)
+        read_performance_metrics(self.driver)  # enables the CDP Performance domain
+        self.pages_on_driver = 0
+        self.consecutive_failures = 0
+        return self.driver
+
+    def page_done(self, processed):
+        """Update the counters after handle_each_page returned `processed`."""
+        self.pages_on_driver += 1
+        self.consecutive_failures = 0 if processed else self.consecutive_failures + 1
+
+    def recycle_reason(self):
+        """
+        Returns a short reason string if the session should be rebuilt now,
+        otherwise None.
+        """
+        if watchdog.recycle_reason:
+            return watchdog.recycle_reason
+        if self.max_pages and self.pages_on_driver >= self.max_pages:
+            return f"{self.pages_on_driver} pages on this browser"
+        if self.max_failures and self.consecutive_failures >= self.max_failures:
+            return f"{self.consecutive_failures} failed pages in a row"
+
+        heap_mb = self.js_heap_mb()
+        if self.max_heap_mb and heap_mb is not None and heap_mb >= self.max_heap_mb:
+            return f"JS heap {heap_mb:.0f} MB"
+
+        rss_mb = self.renderer_rss_mb()
+        if self.max_rss_mb and rss_mb is not None and rss_mb >= self.max_rss_mb:
+            return f"renderer RSS {rss_mb:.0f} MB"
+        return None
+
+    def recycle(self, current_url, reason=""):
+        """
+        Quit the current browser, start a fresh one, load `current_url`
+        and reopen the Apollo sidebar. Returns the new driver.
+        """
+        log.info(f"[Supervisor] Recycling browser session ({reason})...")
+        started = time.monotonic()
+        try:
+            self.driver.quit()
+        except Exception as e:
+            log.warning(f"[Supervisor] Error while quitting old driver (ignored): {e}")
+
+        driver = self.start()
+        timed_get(driver, current_url)
+        session = session_for(driver)
+        session.loaded()
+        try:
+            opened = session.open_sidebar()
+        except Exception as e:
+            log.warning(f"[Supervisor] Apollo iframe not ready after restart: {e}")
+            opened = False
+        if not opened:
+            # Same retry/refresh/log path as the very first page
+            handle_first_page(driver, current_url)
+
+        elapsed = time.monotonic() - started
+        self.recycles.append({"reason": reason, "seconds": round(elapsed, 1)})
+        log.info(f"[Supervisor] New browser session ready in {elapsed:.1f}s.")
+        return driver
+
+    def js_heap_mb(self):
+        """JS heap used by the tab (MB) via CDP, or None if unavailable."""
+        metrics = read_performance_metrics(self.driver)
+        if not metrics or "JSHeapUsedSize" not in metrics:
+            return None
+        return metrics["JSHeapUsedSize"] / (1024 * 1024)
+
+    def renderer_rss_mb(self):
+        """Largest Chrome renderer RSS (MB) under this chromedriver, or None without psutil."""
+        rss = renderer_rss_mb(self.driver)
+        return max(rss.values()) if rss else None
@@ -0,0 +1,18 @@
+# tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+# The modules are imported as `modules.x` from the project folder, like main.py does
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import clock  # noqa: E402
+
+
+@pytest.fixture
+def virtual_clock():
+    """A fresh, seeded VirtualClock for the test; real time again afterwards."""
+    yield clock.use_virtual_time(seed_value=1)
+    clock.use_real_time()
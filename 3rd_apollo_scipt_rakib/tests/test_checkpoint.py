@@ -0,0 +1,42 @@
+# tests/test_checkpoint.py
+
+from modules.checkpoint import load_checkpoint, new_checkpoint, record_page, save_checkpoint
+
+BASE_URL = "https://www.linkedin.com/sales/search/people?query=(filters:List())"
+
+
+def test_new_checkpoint_jumps_to_the_start_page():
+    state = new_checkpoint(BASE_URL, "My List", start_page=4, end_page=9)
+
+    assert state["page_url"] == BASE_URL + "&page=4"
+    assert state["page_index"] == 4
+    assert state["end_page"] == 9
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    state = new_checkpoint(BASE_URL, "My List")
+    save_checkpoint(state, path)
+
+    assert load_checkpoint(path) == state
+    assert [p.name for p in tmp_path.iterdir()] == ["checkpoint.json"]
+
+
+def test_record_page_moves_to_the_next_page(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    state = new_checkpoint(BASE_URL, "My List")
+    record_page(state, "ok", BASE_URL + "&page=2", path)
+    record_page(state, "skipped", None, path)
+
+    loaded = load_checkpoint(path)
+    assert loaded["page_url"] == BASE_URL + "&page=2"
+    assert loaded["page_index"] == 2
+    assert loaded["counters"] == {"processed": 1, "skipped": 1}
+    assert loaded["finished"]
+
+
+def test_missing_or_corrupt_checkpoint_loads_as_none(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    assert load_checkpoint(str(path)) is None
+    path.write_text("{not json", encoding="utf-8")
+    assert load_checkpoint(str(path)) is None
@@ -0,0 +1,41 @@
+# tests/test_pacing.py
+
+from modules.pacing import PacingPolicy
+
+
+def test_dwell_never_repeats(virtual_clock):
+    policy = PacingPolicy(dwell_min=10, dwell_max=14, dwell_step=2)
+    picks = [policy.next_dwell() for _ in range(50)]
+
+    assert set(picks) <= {10, 12, 14}
+    assert all(a != b for a, b in zip(picks, picks[1:]))
+
+
+def test_pages_per_hour_cap_stretches_the_dwell(virtual_clock):
+    policy = PacingPolicy(dwell_min=10, dwell_max=10, max_pages_per_hour=60)
+    policy.page_started()
+    virtual_clock.advance(5)  # work on the page
+
+    assert policy.dwell() == 55
+    assert virtual_clock.now == 60
+
+
+def test_dwell_is_not_shortened_by_the_cap(virtual_clock):
+    policy = PacingPolicy(dwell_min=10, dwell_max=10, max_pages_per_hour=60)
+    policy.page_started()
+    virtual_clock.advance(120)
+
+    assert policy.dwell() == 10
+    assert virtual_clock.slept == 10
+
+
+def test_report_adds_eta_for_known_remaining_pages(virtual_clock):
+    policy = PacingPolicy(dwell_min=10, dwell_max=10)
+    for _ in range(2):
+        policy.page_started()
+        virtual_clock.advance(50)
+        policy.dwell()
+        policy.page_finished()
+
+    assert "ETA" not in policy.report()
+    assert policy.report(remaining_pages=6).endswith("ETA 6 pages ~ 6 min")
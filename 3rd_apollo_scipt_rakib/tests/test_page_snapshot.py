@@ -0,0 +1,47 @@
+# tests/test_page_snapshot.py
+
+import pytest
+from selenium.common.exceptions import (
+    NoSuchFrameException,
+    StaleElementReferenceException,
+    TimeoutException,
+    WebDriverException,
+)
+
+from modules import recovery
+from modules.page_snapshot import take_snapshot
+
+
+class FailingDriver:
+    """execute_async_script raises `error`; nothing else is reached."""
+
+    def __init__(self, error):
+        self.error = error
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, *args):
+        raise self.error
+
+
+@pytest.mark.parametrize("error, failure", [
+    (StaleElementReferenceException("stale"), recovery.STALE_ELEMENT),
+    (NoSuchFrameException("frame"), recovery.WRONG_FRAME),
+])
+def test_stale_and_frame_errors_keep_their_type(error, failure):
+    with pytest.raises(type(error)) as raised:
+        take_snapshot(FailingDriver(error))
+    assert recovery.classify(None, raised.value) == failure
+
+
+def test_other_errors_are_wrapped_with_their_cause():
+    error = TimeoutException("script timeout")
+    with pytest.raises(TimeoutException) as raised:
+        take_snapshot(FailingDriver(error), timeout=1)
+    assert raised.value.__cause__ is error
+
+    error = WebDriverException("disconnected")
+    with pytest.raises(WebDriverException) as raised:
+        take_snapshot(FailingDriver(error))
+    assert raised.value.__cause__ is error
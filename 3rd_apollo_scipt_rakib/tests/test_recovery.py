@@ -0,0 +1,69 @@
+# tests/test_recovery.py
+
+import pytest
+from selenium.common.exceptions import (
+    NoSuchFrameException,
+    StaleElementReferenceException,
+    WebDriverException,
+)
+
+from modules import recovery
+from modules.add_verification import AddNotConfirmedError, AddUnconfirmedError
+from modules.page_watchdog import PageTimeoutError
+
+
+def _wrapped(cause):
+    try:
+        raise WebDriverException("wrapped") from cause
+    except WebDriverException as e:
+        return e
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (StaleElementReferenceException("stale"), recovery.STALE_ELEMENT),
+    (NoSuchFrameException("frame"), recovery.WRONG_FRAME),
+    (recovery.EmptyResultsError("empty"), recovery.EMPTY_RESULTS),
+    (AddNotConfirmedError("mismatch"), recovery.ADD_NOT_CONFIRMED),
+    (AddUnconfirmedError("silent"), recovery.ADD_UNCONFIRMED),
+    (PageTimeoutError("slow", phase="add"), recovery.TIMEOUT),
+    (_wrapped(StaleElementReferenceException("stale")), recovery.STALE_ELEMENT),
+])
+def test_classify_by_exception_type(exc, expected):
+    # Unambiguous types are classified without probing the page (no driver needed)
+    assert recovery.classify(None, exc) == expected
+
+
+def test_ladder_escalates_and_repeats_last_remedy(virtual_clock):
+    applied = []
+    policy = recovery.RecoveryPolicy(apply=lambda driver, remedy: applied.append(remedy))
+    policy.begin_page()
+    for _ in range(5):
+        assert policy.recover(None, StaleElementReferenceException("stale"))[0] == recovery.STALE_ELEMENT
+
+    assert applied == recovery.LADDERS[recovery.STALE_ELEMENT] + [recovery.REFRESH]
+    # Backoff doubles per recovery on the page, capped at BACKOFF_MAX
+    assert virtual_clock.sleeps == [0.5, 1.0, 2.0, 4.0, recovery.BACKOFF_MAX]
+
+
+def test_class_budget_gives_up_on_the_page(virtual_clock):
+    policy = recovery.RecoveryPolicy(apply=lambda driver, remedy: None)
+    policy.begin_page()
+    assert policy.recover(None, PageTimeoutError("slow")) == (recovery.TIMEOUT, recovery.REFRESH)
+    assert policy.recover(None, PageTimeoutError("slow")) is None
+
+    # Budgets are per page
+    policy.begin_page()
+    assert policy.recover(None, PageTimeoutError("slow")) is not None
+
+
+def test_stats_record_which_remedy_fixed_the_page(virtual_clock):
+    policy = recovery.RecoveryPolicy(apply=lambda driver, remedy: None)
+    policy.begin_page()
+    policy.recover(None, StaleElementReferenceException("stale"))
+    policy.recover(None, StaleElementReferenceException("stale"))
+    policy.page_succeeded()
+
+    assert policy.stats == {
+        (recovery.STALE_ELEMENT, recovery.REFIND): {"fixed": 0, "failed": 1},
+        (recovery.STALE_ELEMENT, recovery.RESWITCH): {"fixed": 1, "failed": 0},
+    }
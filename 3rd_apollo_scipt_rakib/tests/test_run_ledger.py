@@ -0,0 +1,62 @@
+# tests/test_run_ledger.py
+
+import pytest
+
+from modules.run_ledger import MAX_PAGE_FAILURES, RunLedger, normalize_url
+
+SEARCH = "https://www.linkedin.com/sales/search/people"
+QUERY = "query=(recentSearchParam:(id:123,doLogHistory:true),filters:List())"
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    db = RunLedger(str(tmp_path / "ledger.sqlite3"))
+    db.start_run(SEARCH, "My List")
+    yield db
+    db.close()
+
+
+def _record(db, url, outcome, **extra):
+    db.record_page(dict({"url": url, "outcome": outcome}, **extra), "My List")
+
+
+def test_normalize_url_drops_per_visit_parameters():
+    first = f"{SEARCH}?sessionId=abc&page=2&{QUERY}"
+    second = f"{SEARCH}?{QUERY.replace('123', '456')}&page=2&sessionId=xyz"
+
+    key = normalize_url(first)
+    assert key == normalize_url(second)
+    assert "sessionId" not in key and "recentSearchParam" not in key
+    assert normalize_url(key) == key
+
+
+def test_is_done_matches_across_sessions(ledger):
+    _record(ledger, f"{SEARCH}?page=2&sessionId=a", "skipped")
+    assert not ledger.is_done(f"{SEARCH}?page=2&sessionId=b", "My List")
+
+    _record(ledger, f"{SEARCH}?page=2&sessionId=b", "ok")
+    assert ledger.is_done(f"{SEARCH}?page=2&sessionId=c", "My List")
+    assert not ledger.is_done(f"{SEARCH}?page=2", "Other List")
+
+
+def test_unconfirmed_pages_are_done_not_retried(ledger):
+    _record(ledger, f"{SEARCH}?page=3", "ok", verification={"status": "unconfirmed"})
+
+    assert ledger.is_done(f"{SEARCH}?page=3", "My List")
+    assert ledger.pending_retries("My List") == []
+
+
+def test_pending_retries_returns_the_last_visited_url(ledger):
+    _record(ledger, f"{SEARCH}?page=4&sessionId=a", "skipped")
+    _record(ledger, f"{SEARCH}?page=4&sessionId=b", "skipped")
+    _record(ledger, f"{SEARCH}?page=5", "skipped")
+    _record(ledger, f"{SEARCH}?page=5", "ok")
+
+    assert ledger.pending_retries("My List") == [f"{SEARCH}?page=4&sessionId=b"]
+
+
+def test_pending_retries_drops_pages_that_keep_failing(ledger):
+    for _ in range(MAX_PAGE_FAILURES):
+        _record(ledger, f"{SEARCH}?page=6", "skipped")
+
+    assert ledger.pending_retries("My List") == []